@@ -0,0 +1,358 @@
+"""
+User Analytics Engine
+Query side of /user-analytics: the all-time dashboard summary is one $facet
+aggregation over the user's lessons and trigger events (lessons joined in
+with $unionWith, MongoDB 4.4+), served from a short-TTL per-user cache that
+is dropped whenever that user records a new interaction. Date-range analytics
+read daily per-user rollups, kept up to date by a background job, plus a
+live count for today, so a month costs ~30 small documents instead of a scan
+of every raw interaction.
+
+The cache is per process; with several workers another worker's entries
+expire within ANALYTICS_CACHE_TTL. Every worker may run the rollup job -
+rollups are idempotent upserts of whole days, so that only duplicates work
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "30"))
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "4096"))
+ANALYTICS_ROLLUP_INTERVAL = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "900"))
+# Days rebuilt on each run (today and yesterday catch late writes) and on the first run
+ANALYTICS_ROLLUP_LOOKBACK_DAYS = int(os.getenv("ANALYTICS_ROLLUP_LOOKBACK_DAYS", "2"))
+ANALYTICS_ROLLUP_BACKFILL_DAYS = int(os.getenv("ANALYTICS_ROLLUP_BACKFILL_DAYS", "35"))
+ANALYTICS_MAX_RANGE_DAYS = 366
+RECENT_ACTIVITY_LIMIT = 5
+ROLLUP_WRITE_BATCH = 1000
+
+TRIGGER_EVENT = "trigger_event"
+PROGRESS_TRACKING = "progress_tracking"
+LESSON = "lesson"
+UNKNOWN = "unknown"
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _day_offset(day: str, days: int) -> str:
+    return (datetime.fromisoformat(day).date() + timedelta(days=days)).isoformat()
+
+
+def _count_map(rows: Iterable[Dict[str, Any]], key: str = "_id") -> Dict[str, int]:
+    """[{_id: name, count: n}, ...] -> {name: n}, with missing names as 'unknown'"""
+    counts: Dict[str, int] = {}
+    for row in rows:
+        name = row.get(key)
+        name = UNKNOWN if name is None else str(name)
+        counts[name] = counts.get(name, 0) + row["count"]
+    return counts
+
+
+def _count_list(counts: Dict[str, int]) -> List[Dict[str, Any]]:
+    """{name: n} -> [{name, count}]; rollups store lists since names may contain '.' or '$'"""
+    return [{"name": name, "count": count} for name, count in counts.items()]
+
+
+def _add_counts(total: Dict[str, int], rows: Iterable[Dict[str, Any]]):
+    for row in rows:
+        total[row["name"]] = total.get(row["name"], 0) + row["count"]
+
+
+class AnalyticsCache:
+    """Per-user TTL cache of analytics results, LRU-bounded by user"""
+
+    def __init__(self, ttl: float = ANALYTICS_CACHE_TTL, max_users: int = ANALYTICS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_users = max_users
+        # user_id -> {variant: (expires_at, value)}
+        self._entries: "OrderedDict[str, Dict[Any, Tuple[float, Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: str, variant: Any) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(variant)
+            if entry is None or entry[0] <= now:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            # Callers add keys to the result; keep the cached copy clean
+            return dict(entry[1])
+
+    def set(self, user_id: str, variant: Any, value: Dict[str, Any]):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.setdefault(user_id, {})[variant] = (time.monotonic() + self.ttl, dict(value))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "users": len(self._entries), "ttl": self.ttl}
+
+
+class UserAnalyticsEngine:
+    """Summary and date-range analytics over lessons and trigger events"""
+
+    def __init__(self, lectures_collection, user_collection, rollups_collection,
+                 cache: Optional[AnalyticsCache] = None):
+        self.lectures = lectures_collection
+        self.user_data = user_collection
+        self.rollups = rollups_collection
+        self.cache = cache or AnalyticsCache()
+        self.last_rollup: Optional[Dict[str, Any]] = None
+
+    def ensure_indexes(self):
+        """Indexes behind every query here; create_index is a no-op when they exist"""
+        self.lectures.create_index([("user_id", ASCENDING), ("generated_at", DESCENDING)])
+        self.lectures.create_index([("generated_at", ASCENDING)])
+        self.user_data.create_index([("user_id", ASCENDING), ("type", ASCENDING), ("timestamp", DESCENDING)])
+        self.user_data.create_index([("type", ASCENDING), ("timestamp", ASCENDING)])
+        self.rollups.create_index([("user_id", ASCENDING), ("day", ASCENDING)], unique=True)
+
+    def invalidate(self, user_id: Optional[str]):
+        """Drop cached analytics after the user records a lesson, trigger or progress update"""
+        if user_id:
+            self.cache.invalidate(user_id)
+
+    # ---- All-time summary ----
+
+    def _summary_pipeline(self, user_id: str) -> List[Dict[str, Any]]:
+        return [
+            {"$match": {"user_id": user_id, "type": {"$in": [TRIGGER_EVENT, PROGRESS_TRACKING]}}},
+            {"$project": {"_id": 0, "type": 1, "timestamp": 1, "trigger_data.type": 1,
+                          "trigger_data.sub_agent": 1, "progress_data": 1}},
+            {"$unionWith": {"coll": self.lectures.name, "pipeline": [
+                {"$match": {"user_id": user_id}},
+                {"$project": {"_id": 0, "type": {"$literal": LESSON},
+                              "subject": 1, "topic": 1, "generated_at": 1}}
+            ]}},
+            {"$facet": {
+                "counts": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+                "lessons_by_subject": [
+                    {"$match": {"type": LESSON}},
+                    {"$group": {"_id": "$subject", "count": {"$sum": 1}}}
+                ],
+                "triggers_by_agent": [
+                    {"$match": {"type": TRIGGER_EVENT}},
+                    {"$group": {"_id": "$trigger_data.sub_agent", "count": {"$sum": 1}}}
+                ],
+                "triggers_by_type": [
+                    {"$match": {"type": TRIGGER_EVENT}},
+                    {"$group": {"_id": "$trigger_data.type", "count": {"$sum": 1}}}
+                ],
+                "recent_lessons": [
+                    {"$match": {"type": LESSON}},
+                    {"$sort": {"generated_at": -1}},
+                    {"$limit": RECENT_ACTIVITY_LIMIT},
+                    {"$project": {"subject": 1, "topic": 1, "generated_at": 1}}
+                ],
+                "recent_triggers": [
+                    {"$match": {"type": TRIGGER_EVENT}},
+                    {"$sort": {"timestamp": -1}},
+                    {"$limit": RECENT_ACTIVITY_LIMIT},
+                    {"$project": {"trigger_data.type": 1, "timestamp": 1}}
+                ],
+                "progress": [
+                    {"$match": {"type": PROGRESS_TRACKING}},
+                    {"$limit": 1},
+                    {"$project": {"progress_data": 1}}
+                ]
+            }}
+        ]
+
+    @staticmethod
+    def _performance_metrics(progress_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not progress_data:
+            return {}
+        quiz_scores = progress_data.get("educational_progress", {}).get("quiz_scores", [])
+        if not quiz_scores:
+            return {}
+        return {
+            "average_quiz_score": sum(quiz_scores) / len(quiz_scores),
+            "latest_quiz_score": quiz_scores[-1],
+            "quiz_trend": "improving" if len(quiz_scores) > 1 and quiz_scores[-1] > quiz_scores[-2] else "stable",
+            "total_quizzes": len(quiz_scores)
+        }
+
+    def summary(self, user_id: str) -> Dict[str, Any]:
+        """All-time analytics for the user in one aggregation round-trip"""
+        facets = next(self.user_data.aggregate(self._summary_pipeline(user_id)), {})
+        counts = _count_map(facets.get("counts", []))
+        progress = facets.get("progress") or [{}]
+        progress_data = progress[0].get("progress_data")
+        return {
+            "user_id": user_id,
+            "lesson_count": counts.get(LESSON, 0),
+            "trigger_count": counts.get(TRIGGER_EVENT, 0),
+            "progress_data": progress_data,
+            "recent_activity": {
+                "lessons": facets.get("recent_lessons", []),
+                "triggers": facets.get("recent_triggers", [])
+            },
+            "lessons_by_subject": _count_map(facets.get("lessons_by_subject", [])),
+            "triggers_by_agent": _count_map(facets.get("triggers_by_agent", [])),
+            "triggers_by_type": _count_map(facets.get("triggers_by_type", [])),
+            "performance_metrics": self._performance_metrics(progress_data)
+        }
+
+    # ---- Daily rollups ----
+
+    def _lesson_days_pipeline(self, since_day: str, user_id: Optional[str]) -> List[Dict[str, Any]]:
+        match: Dict[str, Any] = {"generated_at": {"$gte": since_day}}
+        match["user_id"] = user_id if user_id else {"$exists": True, "$ne": None}
+        return [
+            {"$match": match},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "day": {"$substr": ["$generated_at", 0, 10]}, "subject": "$subject"},
+                "count": {"$sum": 1}
+            }},
+            {"$group": {
+                "_id": {"user_id": "$_id.user_id", "day": "$_id.day"},
+                "total": {"$sum": "$count"},
+                "breakdown": {"$push": {"name": "$_id.subject", "count": "$count"}}
+            }}
+        ]
+
+    def _trigger_days_pipeline(self, since_day: str, user_id: Optional[str]) -> List[Dict[str, Any]]:
+        match: Dict[str, Any] = {"type": TRIGGER_EVENT, "timestamp": {"$gte": since_day}}
+        if user_id:
+            match["user_id"] = user_id
+        return [
+            {"$match": match},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "day": {"$substr": ["$timestamp", 0, 10]},
+                        "agent": "$trigger_data.sub_agent"},
+                "count": {"$sum": 1}
+            }},
+            {"$group": {
+                "_id": {"user_id": "$_id.user_id", "day": "$_id.day"},
+                "total": {"$sum": "$count"},
+                "breakdown": {"$push": {"name": "$_id.agent", "count": "$count"}}
+            }}
+        ]
+
+    def compute_daily_rollups(self, since_day: str, user_id: Optional[str] = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Rollup documents for every (user, day) with activity on or after since_day"""
+        rollups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        def rollup_for(group_id):
+            key = (group_id["user_id"], group_id["day"])
+            if key not in rollups:
+                rollups[key] = {"user_id": key[0], "day": key[1], "lessons": 0, "triggers": 0,
+                                "lessons_by_subject": [], "triggers_by_agent": []}
+            return rollups[key]
+
+        for row in self.lectures.aggregate(self._lesson_days_pipeline(since_day, user_id)):
+            rollup = rollup_for(row["_id"])
+            rollup["lessons"] = row["total"]
+            rollup["lessons_by_subject"] = _count_list(_count_map(row["breakdown"], "name"))
+        for row in self.user_data.aggregate(self._trigger_days_pipeline(since_day, user_id)):
+            rollup = rollup_for(row["_id"])
+            rollup["triggers"] = row["total"]
+            rollup["triggers_by_agent"] = _count_list(_count_map(row["breakdown"], "name"))
+        return rollups
+
+    def build_rollups(self, days: int = ANALYTICS_ROLLUP_LOOKBACK_DAYS) -> Dict[str, Any]:
+        """Recompute and upsert the rollups of the last `days` days (today included)"""
+        started = time.perf_counter()
+        since_day = _day_offset(_today(), -(days - 1))
+        rollups = self.compute_daily_rollups(since_day)
+        updated_at = datetime.now(timezone.utc).isoformat()
+        operations = [
+            UpdateOne({"user_id": user_id, "day": day}, {"$set": {**rollup, "updated_at": updated_at}}, upsert=True)
+            for (user_id, day), rollup in rollups.items()
+        ]
+        for start in range(0, len(operations), ROLLUP_WRITE_BATCH):
+            self.rollups.bulk_write(operations[start:start + ROLLUP_WRITE_BATCH], ordered=False)
+        self.last_rollup = {
+            "since_day": since_day,
+            "rollups_written": len(operations),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "completed_at": updated_at
+        }
+        return self.last_rollup
+
+    def range_analytics(self, user_id: str, days: int) -> Dict[str, Any]:
+        """Analytics for the last `days` days: stored rollups before today, live counts for today"""
+        today = _today()
+        from_day = _day_offset(today, -(days - 1))
+        daily = list(self.rollups.find(
+            {"user_id": user_id, "day": {"$gte": from_day, "$lt": today}},
+            {"_id": 0, "updated_at": 0}
+        ).sort("day", ASCENDING))
+        daily.extend(self.compute_daily_rollups(today, user_id).values())
+
+        lessons_by_subject: Dict[str, int] = {}
+        triggers_by_agent: Dict[str, int] = {}
+        for rollup in daily:
+            _add_counts(lessons_by_subject, rollup.get("lessons_by_subject", []))
+            _add_counts(triggers_by_agent, rollup.get("triggers_by_agent", []))
+        return {
+            "user_id": user_id,
+            "range": {"from": from_day, "to": today, "days": days},
+            "lesson_count": sum(rollup.get("lessons", 0) for rollup in daily),
+            "trigger_count": sum(rollup.get("triggers", 0) for rollup in daily),
+            "lessons_by_subject": lessons_by_subject,
+            "triggers_by_agent": triggers_by_agent,
+            "daily": [
+                {"day": rollup["day"], "lessons": rollup.get("lessons", 0), "triggers": rollup.get("triggers", 0)}
+                for rollup in daily
+            ]
+        }
+
+    # ---- Entry point ----
+
+    def get_user_analytics(self, user_id: str, days: Optional[int] = None) -> Dict[str, Any]:
+        """All-time summary, or the last `days` days when given; cached per user for a few seconds"""
+        if days is not None and not 1 <= days <= ANALYTICS_MAX_RANGE_DAYS:
+            raise ValueError(f"days must be between 1 and {ANALYTICS_MAX_RANGE_DAYS}")
+        cached = self.cache.get(user_id, days)
+        if cached is not None:
+            return cached
+        analytics = self.summary(user_id) if days is None else self.range_analytics(user_id, days)
+        self.cache.set(user_id, days, analytics)
+        return analytics
+
+    def info(self) -> Dict[str, Any]:
+        return {"cache": self.cache.info(), "last_rollup": self.last_rollup}
+
+
+async def run_rollup_job(engine: UserAnalyticsEngine, interval: int = ANALYTICS_ROLLUP_INTERVAL,
+                         backfill_days: int = ANALYTICS_ROLLUP_BACKFILL_DAYS,
+                         lookback_days: int = ANALYTICS_ROLLUP_LOOKBACK_DAYS):
+    """Background loop: backfill once, then rebuild recent days every `interval` seconds"""
+    try:
+        await asyncio.to_thread(engine.ensure_indexes)
+    except Exception as e:
+        logger.error(f"Failed to create analytics indexes: {e}")
+    days = backfill_days
+    while True:
+        try:
+            summary = await asyncio.to_thread(engine.build_rollups, days)
+            logger.info(f"Analytics rollups rebuilt: {summary}")
+            days = lookback_days
+        except Exception as e:
+            logger.error(f"Analytics rollup job failed: {e}")
+        await asyncio.sleep(interval)
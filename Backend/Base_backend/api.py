@@ -55,6 +55,11 @@ import asyncio
 from pathlib import Path
 from orchestration_config import config, validate_integration_setup
 from orchestration_db_integration import db_integration, get_user_analytics, sync_user_data
+from analytics_engine import run_rollup_job
+from upload_jobs import UploadJobRunner
+from media_serving import serve_media, etag_cache
+from video_catalogue import VideoCatalogue, InvalidCursor, DuplicateContent
+from video_ingest import ingest_upload, VideoTooLarge
 
 # Add orchestration system to path
 orchestration_path = Path(__file__).parent.parent / "orchestration" / "unified_orchestration_system"
@@ -1126,6 +1131,7 @@ def store_lesson_in_db(lesson_data: dict):
                 "collection_type": "generated_lesson"
             }
             lectures_collection.insert_one(lesson_doc)
+            db_integration.analytics.invalidate(lesson_data.get('user_id'))
             print(f"✅ Basic lesson stored for user {lesson_data.get('user_id')}")
 
     except Exception as e:
@@ -1307,12 +1313,25 @@ def generate_progress_recommendations(educational_progress: dict, triggers: list
 
     return recommendations
 
+# Daily per-user rollups behind /user-analytics?days=N, rebuilt in the background
+analytics_rollup_task = None
+
+@app.on_event("startup")
+async def start_analytics_rollups():
+    global analytics_rollup_task
+    analytics_rollup_task = asyncio.create_task(run_rollup_job(db_integration.analytics))
+
+@app.on_event("shutdown")
+async def stop_analytics_rollups():
+    if analytics_rollup_task:
+        analytics_rollup_task.cancel()
+
 @app.get("/user-analytics/{user_id}")
-async def get_user_analytics_endpoint(user_id: str):
-    """Get comprehensive user analytics including orchestration data"""
+async def get_user_analytics_endpoint(user_id: str, days: Optional[int] = None):
+    """Get comprehensive user analytics including orchestration data (last `days` days if given)"""
     try:
-        # Get analytics from database integration
-        analytics = get_user_analytics(user_id)
+        # Get analytics from database integration, off the event loop
+        analytics = await asyncio.to_thread(get_user_analytics, user_id, days)
 
         # Add orchestration-specific analytics if available
         if orchestration_engine:
@@ -1334,39 +1353,53 @@ async def get_user_analytics_endpoint(user_id: str):
 
         return JSONResponse(content=analytics)
 
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e), "user_id": user_id})
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"error": f"Failed to get user analytics: {str(e)}", "user_id": user_id}
         )
 
-@app.post("/process-pdf", response_model=PDFResponse)
-async def process_pdf(file: UploadFile = File(...)):
-    temp_pdf_path = ""
-    try:
-        if not file.filename.lower().endswith(".pdf"):
-            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+# ==== Upload Pipelines ====
+# Parsing/OCR runs in worker processes, the Groq call is awaited asynchronously
+# and embedding, TTS and the MongoDB write run in bounded thread pools, so an
+# upload never blocks the event loop for other endpoints.
+upload_jobs = UploadJobRunner()
+
+@app.on_event("shutdown")
+async def shutdown_upload_jobs():
+    upload_jobs.shutdown()
 
-        temp_pdf_path = os.path.join(TEMP_DIR, f"temp_pdf_{time.strftime('%Y%m%d_%H%M%S')}.pdf")
-        with open(temp_pdf_path, "wb") as temp_file:
+async def save_upload_to_temp(file: UploadFile, temp_path: str):
+    def _copy():
+        with open(temp_path, "wb") as temp_file:
             shutil.copyfileobj(file.file, temp_file)
+    await asyncio.to_thread(_copy)
+
+async def summarize_texts(job_id: str, texts: list, query: str) -> str:
+    groq_api_key = os.getenv("GROQ_API_KEY")
+    agent = await upload_jobs.run_in_thread(job_id, "embed", build_qa_agent, texts, groq_api_key)
+    result = await upload_jobs.run_async(job_id, "llm", agent.ainvoke({"query": query}))
+    return result["result"]
 
-        structured_data = parse_pdf(temp_pdf_path)
+async def run_pdf_pipeline(job_id: str, filename: str, temp_pdf_path: str) -> PDFResponse:
+    try:
+        # Already inside the job runner's process pool: read pages in-process
+        # rather than starting a nested page pool per upload
+        structured_data = await upload_jobs.run_in_process(job_id, "parse", parse_pdf, temp_pdf_path, 1)
         if not structured_data["body"]:
             raise HTTPException(status_code=400, detail="Failed to parse PDF content")
 
         query = "give me detail summary of this pdf"
-        groq_api_key = os.getenv("GROQ_API_KEY")
-        agent = build_qa_agent([structured_data["body"]], groq_api_key=groq_api_key)
-        result = agent.invoke({"query": query})
-        answer = result["result"]
+        answer = await summarize_texts(job_id, [structured_data["body"]], query)
 
-        audio_file = text_to_speech(answer, file_prefix="output_pdf")
+        audio_file = await upload_jobs.run_in_thread(job_id, "tts", text_to_speech, answer, f"output_pdf_{job_id[:8]}")
         audio_url = f"/static/{os.path.basename(audio_file)}" if audio_file else "No audio generated"
 
         # Store to MongoDB
         pdf_doc = {
-            "filename": file.filename,
+            "filename": filename,
             "title": structured_data["title"],
             "sections": [{"heading": s["heading"], "content": s["content"]} for s in structured_data["sections"]],
             "query": query,
@@ -1374,7 +1407,7 @@ async def process_pdf(file: UploadFile = File(...)):
             "audio_file": audio_url,
             "timestamp": datetime.now(timezone.utc)
         }
-        pdf_collection.insert_one(pdf_doc)
+        await upload_jobs.run_in_thread(job_id, "store", pdf_collection.insert_one, pdf_doc)
 
         global pdf_response
         pdf_response = PDFResponse(
@@ -1386,31 +1419,13 @@ async def process_pdf(file: UploadFile = File(...)):
         )
         return pdf_response
 
-    except Exception as e:
-        logger.error(f"Error processing PDF: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
     finally:
         if temp_pdf_path and os.path.exists(temp_pdf_path):
             os.remove(temp_pdf_path)
 
-
-@app.post("/process-img", response_model=ImageResponse)
-async def process_image(file: UploadFile = File(...)):
-    temp_image_path = ""
+async def run_image_pipeline(job_id: str, filename: str, temp_image_path: str) -> ImageResponse:
     try:
-        if not file.filename.lower().endswith((".jpg", ".jpeg", ".png")):
-            raise HTTPException(status_code=400, detail="Only JPG, JPEG, or PNG files are allowed")
-
-        temp_image_path = os.path.join(
-            TEMP_DIR,
-            f"temp_image_{time.strftime('%Y%m%d_%H%M%S')}{os.path.splitext(file.filename)[1]}"
-        )
-
-        with open(temp_image_path, "wb") as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
-
-        ocr_text = extract_text_easyocr(temp_image_path).strip()
+        ocr_text = (await upload_jobs.run_in_process(job_id, "ocr", extract_text_easyocr, temp_image_path)).strip()
         logger.info(f"OCR raw output: {repr(ocr_text)}")
 
         if not ocr_text:
@@ -1419,24 +1434,21 @@ async def process_image(file: UploadFile = File(...)):
             query = "N/A"
         else:
             query = "give me detail summary of this image"
-            groq_api_key = os.getenv("GROQ_API_KEY")
-            agent = build_qa_agent([ocr_text], groq_api_key=groq_api_key)
-            result = agent.invoke({"query": query})
-            answer = result["result"]
+            answer = await summarize_texts(job_id, [ocr_text], query)
 
-        audio_file = text_to_speech(answer, file_prefix="output_image")
+        audio_file = await upload_jobs.run_in_thread(job_id, "tts", text_to_speech, answer, f"output_image_{job_id[:8]}")
         audio_url = f"/static/{os.path.basename(audio_file)}" if audio_file else "No audio generated"
 
         # Store to MongoDB
         image_doc = {
-            "filename": file.filename,
+            "filename": filename,
             "ocr_text": ocr_text,
             "query": query,
             "answer": answer,
             "audio_file": audio_url,
             "timestamp": datetime.now(timezone.utc)
         }
-        image_collection.insert_one(image_doc)
+        await upload_jobs.run_in_thread(job_id, "store", image_collection.insert_one, image_doc)
 
         global image_response
         image_response = ImageResponse(
@@ -1447,13 +1459,82 @@ async def process_image(file: UploadFile = File(...)):
         )
         return image_response
 
+    finally:
+        if temp_image_path and os.path.exists(temp_image_path):
+            os.remove(temp_image_path)
+
+async def dispatch_upload_job(job_id: str, pipeline, wait: bool):
+    """Either await the pipeline or hand back a job id to poll"""
+    if not wait:
+        upload_jobs.submit(job_id, pipeline)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+        )
+    try:
+        return await upload_jobs.execute(job_id, pipeline)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/process-pdf", response_model=PDFResponse)
+async def process_pdf(file: UploadFile = File(...), wait: bool = True):
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    job_id = upload_jobs.create_job("pdf", file.filename)
+    temp_pdf_path = os.path.join(TEMP_DIR, f"temp_pdf_{job_id}.pdf")
+    try:
+        await save_upload_to_temp(file, temp_pdf_path)
+    except Exception as e:
+        logger.error(f"Error processing PDF: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    filename = file.filename
+    return await dispatch_upload_job(
+        job_id, lambda jid: run_pdf_pipeline(jid, filename, temp_pdf_path), wait
+    )
+
+
+@app.post("/process-img", response_model=ImageResponse)
+async def process_image(file: UploadFile = File(...), wait: bool = True):
+    if not file.filename.lower().endswith((".jpg", ".jpeg", ".png")):
+        raise HTTPException(status_code=400, detail="Only JPG, JPEG, or PNG files are allowed")
+
+    job_id = upload_jobs.create_job("image", file.filename)
+    temp_image_path = os.path.join(
+        TEMP_DIR,
+        f"temp_image_{job_id}{os.path.splitext(file.filename)[1]}"
+    )
+    try:
+        await save_upload_to_temp(file, temp_image_path)
     except Exception as e:
         logger.error(f"Error processing image: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if temp_image_path and os.path.exists(temp_image_path):
-            os.remove(temp_image_path)
+    filename = file.filename
+    return await dispatch_upload_job(
+        job_id, lambda jid: run_image_pipeline(jid, filename, temp_image_path), wait
+    )
+
+@app.get("/jobs/metrics")
+async def get_upload_job_metrics():
+    """Per-stage latency histograms and job counts for the upload pipelines"""
+    return upload_jobs.metrics()
+
+@app.get("/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Status of a /process-pdf or /process-img job"""
+    job = upload_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    result = job["result"]
+    return {
+        **{k: v for k, v in job.items() if k != "result"},
+        "result": result.dict() if hasattr(result, "dict") else result
+    }
 
 @app.get("/summarize-pdf", response_model=PDFResponse)
 async def summarize_pdf():
@@ -1467,31 +1548,23 @@ async def summarize_image():
         raise HTTPException(status_code=404, detail="No image has been processed yet.")
     return image_response
 
-@app.get("/api/stream/{filename}")
-async def stream_audio(filename: str):
-    audio_path = os.path.join(TEMP_DIR, filename)
+@app.api_route("/api/stream/{filename}", methods=["GET", "HEAD"])
+async def stream_audio(filename: str, request: Request):
+    audio_path = os.path.join(TEMP_DIR, os.path.basename(filename))
 
     if not os.path.exists(audio_path):
         raise HTTPException(status_code=404, detail="Audio file not found")
 
-    return FileResponse(
-        path=audio_path,
-        media_type="audio/mpeg",
-        filename=filename
-    )
+    return await serve_media(request, audio_path, "audio/mpeg", filename=filename)
 
-@app.get("/api/audio/{filename}")
-async def download_audio(filename: str):
-    audio_path = os.path.join(TEMP_DIR, filename)
+@app.api_route("/api/audio/{filename}", methods=["GET", "HEAD"])
+async def download_audio(filename: str, request: Request):
+    audio_path = os.path.join(TEMP_DIR, os.path.basename(filename))
 
     if not os.path.exists(audio_path):
         raise HTTPException(status_code=404, detail="Audio file not found")
 
-    return FileResponse(
-        path=audio_path,
-        media_type="audio/mpeg",
-        filename=filename
-    )
+    return await serve_media(request, audio_path, "audio/mpeg", filename=filename, disposition="attachment")
 # ==== AnimateDiff Video Generation Proxy ====
 class VideoGenerationRequest(BaseModel):
     # Old format fields (for backward compatibility)
@@ -1783,8 +1856,29 @@ async def proxy_video_generation_flexible(request: dict):
 VIDEOS_DIR = "generated_videos"
 os.makedirs(VIDEOS_DIR, exist_ok=True)
 
-# In-memory storage for video metadata (in production, use a database)
-video_metadata_store = {}
+# Persistent video metadata, shared by all workers
+video_catalogue = VideoCatalogue()
+
+@app.on_event("startup")
+async def reconcile_video_catalogue():
+    """Index videos on disk that have no record and drop records whose file is gone"""
+    try:
+        summary = await asyncio.to_thread(video_catalogue.reconcile, VIDEOS_DIR)
+        print(f"🎬 Video catalogue ready: {summary}")
+    except Exception as e:
+        print(f"❌ Video catalogue reconciliation failed: {e}")
+
+def _duplicate_video_response(existing: dict, ingest_stats: dict) -> dict:
+    return {
+        "success": True,
+        "message": "Video already stored",
+        "duplicate": True,
+        "video_id": existing["video_id"],
+        "access_url": f"/videos/{existing['video_id']}",
+        "filename": existing["filename"],
+        "file_size": existing["file_size"],
+        **ingest_stats
+    }
 
 @app.post("/receive-video")
 async def receive_video_from_generation_system(
@@ -1811,20 +1905,57 @@ async def receive_video_from_generation_system(
         print(f"🎬 Filename: {filename}")
         print(f"🎬 Metadata: {video_meta}")
 
-        # Save the video file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
+        # Stream to a temp file off the event loop, hashing as we go
+        ingest = await ingest_upload(video, VIDEOS_DIR)
+        print(f"🎬 Received {ingest.size} bytes in {ingest.seconds:.2f}s ({ingest.throughput_mbps} MB/s)")
 
-        # Store metadata
-        video_metadata_store[video_id] = {
-            **video_meta,
-            "video_id": video_id,
-            "filename": filename,
-            "file_path": file_path,
-            "received_at": datetime.now().isoformat(),
-            "file_size": os.path.getsize(file_path)
+        ingest_stats = {
+            "sha256": ingest.sha256,
+            "ingest_seconds": round(ingest.seconds, 3),
+            "throughput_mbps": ingest.throughput_mbps
         }
 
+        # Whatever fails from here on must not leave the upload on disk
+        stored = False
+        try:
+            # Identical content is stored once: hand back the existing video
+            existing = await asyncio.to_thread(video_catalogue.find_by_sha256, ingest.sha256)
+            if existing and os.path.exists(existing["file_path"]):
+                print(f"🎬 Duplicate of video {existing['video_id']}; not storing again")
+                return _duplicate_video_response(existing, ingest_stats)
+            if existing:
+                # Its file is gone; the hash belongs to this upload now
+                await asyncio.to_thread(video_catalogue.remove, existing["video_id"])
+
+            # Atomic rename: readers never see a partially written video
+            os.replace(ingest.temp_path, file_path)
+
+            # Store metadata
+            try:
+                await asyncio.to_thread(video_catalogue.add, {
+                    **video_meta,
+                    "video_id": video_id,
+                    "filename": filename,
+                    "file_path": file_path,
+                    "received_at": datetime.now().isoformat(),
+                    "file_size": ingest.size,
+                    "sha256": ingest.sha256
+                })
+            except DuplicateContent:
+                # An identical upload running at the same time was stored first
+                existing = await asyncio.to_thread(video_catalogue.find_by_sha256, ingest.sha256)
+                print(f"🎬 Duplicate of video {existing['video_id']} stored concurrently; not storing again")
+                return _duplicate_video_response(existing, ingest_stats)
+            stored = True
+        finally:
+            if not stored:
+                for path in (ingest.temp_path, file_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        # The upload hash doubles as the ETag, so playback never re-reads the file for it
+        etag_cache.prime(file_path, ingest.sha256)
+
         # Generate access URL
         access_url = f"/videos/{video_id}"
 
@@ -1834,12 +1965,17 @@ async def receive_video_from_generation_system(
         return {
             "success": True,
             "message": "Video received and stored successfully",
+            "duplicate": False,
             "video_id": video_id,
             "access_url": access_url,
             "filename": filename,
-            "file_size": os.path.getsize(file_path)
+            "file_size": ingest.size,
+            **ingest_stats
         }
 
+    except VideoTooLarge as e:
+        print(f"❌ {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except json.JSONDecodeError as e:
         print(f"❌ Invalid metadata JSON: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Invalid metadata JSON: {str(e)}")
@@ -1847,16 +1983,16 @@ async def receive_video_from_generation_system(
         print(f"❌ Error receiving video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error receiving video: {str(e)}")
 
-@app.get("/videos/{video_id}")
-async def get_video(video_id: str):
+@app.api_route("/videos/{video_id}", methods=["GET", "HEAD"])
+async def get_video(video_id: str, request: Request):
     """
     GET endpoint to serve stored videos
     """
     try:
-        if video_id not in video_metadata_store:
+        video_info = await asyncio.to_thread(video_catalogue.get, video_id)
+        if video_info is None:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        video_info = video_metadata_store[video_id]
         file_path = video_info["file_path"]
 
         if not os.path.exists(file_path):
@@ -1866,14 +2002,12 @@ async def get_video(video_id: str):
         print(f"🎬 Serving video: {video_id}")
         print(f"🎬 File path: {file_path}")
 
-        return FileResponse(
-            path=file_path,
-            media_type="video/mp4",
+        return await serve_media(
+            request,
+            file_path,
+            "video/mp4",
             filename=video_info["filename"],
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Cache-Control": "public, max-age=3600"
-            }
+            extra_headers={"Access-Control-Allow-Origin": "*"}
         )
 
     except HTTPException:
@@ -1888,11 +2022,10 @@ async def get_video_info(video_id: str):
     GET endpoint to retrieve video metadata
     """
     try:
-        if video_id not in video_metadata_store:
+        video_info = await asyncio.to_thread(video_catalogue.get, video_id)
+        if video_info is None:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        video_info = video_metadata_store[video_id]
-
         # Remove file_path from response for security
         response_info = {k: v for k, v in video_info.items() if k != "file_path"}
 
@@ -1908,23 +2041,33 @@ async def get_video_info(video_id: str):
         raise HTTPException(status_code=500, detail=f"Error getting video info: {str(e)}")
 
 @app.get("/videos")
-async def list_videos():
+async def list_videos(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    subject: Optional[str] = None,
+    topic: Optional[str] = None
+):
     """
-    GET endpoint to list all stored videos
+    GET endpoint to list stored videos, newest first.
+    Pass the returned next_cursor to fetch the following page.
     """
     try:
-        videos = []
-        for video_id, info in video_metadata_store.items():
-            # Remove file_path from response for security
-            video_summary = {k: v for k, v in info.items() if k != "file_path"}
-            videos.append(video_summary)
+        page, next_cursor = await asyncio.to_thread(
+            video_catalogue.list, limit=limit, cursor=cursor, subject=subject, topic=topic
+        )
+
+        # Remove file_path from response for security
+        videos = [{k: v for k, v in info.items() if k != "file_path"} for info in page]
 
         return {
             "success": True,
             "count": len(videos),
-            "videos": videos
+            "videos": videos,
+            "next_cursor": next_cursor
         }
 
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"❌ Error listing videos: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error listing videos: {str(e)}")
@@ -48,6 +48,7 @@ user_collection = db["user_data"]  # For storing chat messages
 user_data_collection = db["User"]  # For storing user information
 subjects_collection = db["subjects"]  # For storing subject information
 lectures_collection = db["lectures"]  # For storing lecture information
+analytics_rollups_collection = db["user_daily_rollups"]  # Daily per-user analytics rollups
 
 # Keep these for backward compatibility
 pdf_collection = db["pdf_collection"]
@@ -0,0 +1,338 @@
+"""
+Static Media Serving
+Serves generated videos and audio with HTTP range requests (206 partial
+content, including multipart/byteranges), strong content-hash ETags,
+Last-Modified and conditional GET, so players can seek and browsers can
+revalidate without re-downloading whole files
+"""
+
+import os
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(256 * 1024)))
+MEDIA_MAX_RANGES = int(os.getenv("MEDIA_MAX_RANGES", "16"))
+MEDIA_ETAG_CACHE_SIZE = int(os.getenv("MEDIA_ETAG_CACHE_SIZE", "2048"))
+
+ByteRange = Tuple[int, int]  # inclusive (first, last) byte positions
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class ETagCache:
+    """
+    Strong ETags from a SHA-256 of the file content.
+
+    Hashing a video on every request would cost more than sending it, so
+    digests are cached per path and reused while size and mtime are unchanged.
+    """
+
+    def __init__(self, max_entries: int = MEDIA_ETAG_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, path: str, stat: os.stat_result) -> str:
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                self.stats["hits"] += 1
+                return entry[1]
+
+        etag = f'"{self._hash_file(path)[:32]}"'
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[path] = (version, etag)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def prime(self, path: str, sha256: Optional[str] = None):
+        """
+        Record a file's ETag ahead of its first request, e.g. right after it
+        is written. Pass the SHA-256 if the writer already computed it.
+        """
+        stat = os.stat(path)
+        if sha256 is None:
+            self.get(path, stat)
+            return
+        with self._lock:
+            self._entries[path] = ((stat.st_size, stat.st_mtime_ns), f'"{sha256[:32]}"')
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+etag_cache = ETagCache()
+
+
+def parse_range_header(header: str, file_size: int) -> Optional[List[ByteRange]]:
+    """
+    Parse a Range header into sorted, coalesced (first, last) byte ranges.
+
+    Returns None when the header should be ignored (not a bytes range, or
+    syntactically invalid) and raises RangeNotSatisfiable when no range
+    overlaps the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges: List[ByteRange] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or not (first.isdigit() or last.isdigit()):
+            return None
+        if first and last and not (first.isdigit() and last.isdigit()):
+            return None
+
+        if not first:
+            # Suffix range: the final N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            ranges.append((max(0, file_size - length), file_size - 1))
+            continue
+
+        start = int(first)
+        end = int(last) if last else file_size - 1
+        if last and end < start:
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def content_disposition(filename: str, disposition: str = "inline") -> str:
+    """
+    Content-Disposition value with the filename as an escaped quoted-string;
+    names that are not printable ASCII also get an RFC 5987 filename* and a
+    plain-ASCII fallback
+    """
+    fallback = "".join(c if " " <= c < "\x7f" else "_" for c in filename)
+    quoted = fallback.replace("\\", "\\\\").replace('"', '\\"')
+    value = f'{disposition}; filename="{quoted}"'
+    if fallback != filename:
+        value += f"; filename*=UTF-8''{quote(filename, safe='')}"
+    return value
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) <= since
+
+
+class MediaFileResponse(Response):
+    """
+    Sends a whole file or a set of byte ranges from it.
+
+    Uses the ASGI zero-copy send extension (the server calls sendfile) when
+    the server advertises it, and falls back to chunked reads off the event
+    loop otherwise.
+    """
+
+    def __init__(self, path: str, file_size: int, media_type: str, headers: Dict[str, str],
+                 ranges: Optional[List[ByteRange]] = None, send_body: bool = True):
+        self.path = path
+        self.file_size = file_size
+        self.ranges = ranges
+        self.send_body = send_body
+        self.status_code = 206 if ranges else 200
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+        self.parts: List[Tuple[bytes, int, int]] = []
+
+        headers = dict(headers)
+        if ranges and len(ranges) > 1:
+            boundary = uuid.uuid4().hex
+            headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+            length = 0
+            for start, end in ranges:
+                preamble = (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                ).encode("latin-1")
+                self.parts.append((preamble, start, end))
+                length += len(preamble) + (end - start + 1) + 2
+            self.epilogue = f"--{boundary}--\r\n".encode("latin-1")
+            length += len(self.epilogue)
+        else:
+            headers["Content-Type"] = media_type
+            start, end = ranges[0] if ranges else (0, file_size - 1)
+            if ranges:
+                headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            self.parts.append((b"", start, end))
+            self.epilogue = b""
+            length = end - start + 1
+
+        headers["Content-Length"] = str(length)
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zero_copy = "http.response.zerocopysend" in scope.get("extensions", {})
+        with open(self.path, "rb") as f:
+            for preamble, start, end in self.parts:
+                if preamble:
+                    await send({"type": "http.response.body", "body": preamble, "more_body": True})
+                if zero_copy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": f.fileno(),
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": True
+                    })
+                else:
+                    await self._send_chunks(f, start, end, send)
+                if self.ranges and len(self.ranges) > 1:
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        await send({"type": "http.response.body", "body": self.epilogue, "more_body": False})
+
+    @staticmethod
+    async def _send_chunks(f, start: int, end: int, send: Send):
+        remaining = end - start + 1
+        offset = start
+        while remaining > 0:
+            size = min(MEDIA_CHUNK_SIZE, remaining)
+            chunk = await asyncio.to_thread(_read_at, f, size, offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+
+def _read_at(f, size: int, offset: int) -> bytes:
+    """Read size bytes at offset; positioned reads where the OS has them (not Windows)."""
+    if hasattr(os, "pread"):
+        return os.pread(f.fileno(), size, offset)
+    # Each response opens its own handle and awaits one read at a time, so
+    # moving the shared file position cannot interleave with another reader
+    f.seek(offset)
+    return f.read(size)
+
+
+async def serve_media(request: Request, path: str, media_type: str, filename: Optional[str] = None,
+                      cache_control: str = "public, max-age=3600", extra_headers: Optional[Dict[str, str]] = None,
+                      disposition: str = "inline") -> Response:
+    """Build the response for a GET/HEAD of a media file, honouring Range and conditional headers"""
+    stat = await asyncio.to_thread(os.stat, path)
+    etag = await asyncio.to_thread(etag_cache.get, path, stat)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        **(extra_headers or {})
+    }
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename, disposition)
+
+    # Conditional GET: If-None-Match takes precedence over If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag, weak=True)
+    else:
+        not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, stat.st_mtime)
+    if not_modified:
+        headers.pop("Content-Disposition", None)
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header and stat.st_size > 0:
+        # If-Range: only honour the range if the client's copy is current
+        if_range = request.headers.get("if-range")
+        if if_range and not (
+            _etag_matches(if_range, etag, weak=False) if if_range.strip().startswith(('"', 'W/'))
+            else _not_modified_since(if_range, stat.st_mtime)
+        ):
+            range_header = None
+
+    if range_header and stat.st_size > 0:
+        try:
+            ranges = parse_range_header(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{stat.st_size}"
+            return Response(status_code=416, headers=headers)
+        if ranges and len(ranges) > MEDIA_MAX_RANGES:
+            ranges = None  # too fragmented to be worth it; send the whole file
+
+    return MediaFileResponse(
+        path,
+        stat.st_size,
+        media_type,
+        headers,
+        ranges=ranges,
+        send_body=request.method != "HEAD"
+    )
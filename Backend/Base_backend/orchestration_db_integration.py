@@ -6,8 +6,9 @@ Manages MongoDB integration between Base_backend and Orchestration system
 import json
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
-from db import user_collection, subjects_collection, lectures_collection, tests_collection
+from db import user_collection, subjects_collection, lectures_collection, tests_collection, analytics_rollups_collection
 from orchestration_config import config
+from analytics_engine import UserAnalyticsEngine
 import logging
 
 # Set up logging
@@ -19,6 +20,7 @@ class OrchestrationDBIntegration:
     
     def __init__(self):
         self.config = config
+        self.analytics = UserAnalyticsEngine(lectures_collection, user_collection, analytics_rollups_collection)
     
     def store_enhanced_lesson(self, lesson_data: Dict[str, Any]) -> str:
         """Store enhanced lesson in MongoDB with orchestration metadata"""
@@ -35,6 +37,7 @@ class OrchestrationDBIntegration:
             # Insert into lectures collection
             result = lectures_collection.insert_one(lesson_doc)
             lesson_id = str(result.inserted_id)
+            self.analytics.invalidate(lesson_data.get("user_id"))
             
             # Log the storage
             if self.config.LOG_ORCHESTRATION_CALLS:
@@ -78,6 +81,7 @@ class OrchestrationDBIntegration:
                 {"$set": progress_doc},
                 upsert=True
             )
+            self.analytics.invalidate(user_id)
             
             if self.config.LOG_ORCHESTRATION_CALLS:
                 logger.info(f"User progress stored for: {user_id}")
@@ -119,6 +123,7 @@ class OrchestrationDBIntegration:
             
             # Store in user collection
             user_collection.insert_one(trigger_doc)
+            self.analytics.invalidate(user_id)
             
             logger.info(f"Trigger event logged for user: {user_id}")
             return True
@@ -170,62 +175,12 @@ class OrchestrationDBIntegration:
             logger.error(f"Failed to sync orchestration user data: {e}")
             return False
     
-    def get_user_analytics(self, user_id: str) -> Dict[str, Any]:
-        """Get comprehensive user analytics from MongoDB"""
+    def get_user_analytics(self, user_id: str, days: Optional[int] = None) -> Dict[str, Any]:
+        """Get comprehensive user analytics from MongoDB, or for the last `days` days"""
         try:
-            analytics = {
-                "user_id": user_id,
-                "lesson_count": 0,
-                "trigger_count": 0,
-                "progress_data": None,
-                "recent_activity": [],
-                "performance_metrics": {}
-            }
-            
-            # Count lessons
-            analytics["lesson_count"] = lectures_collection.count_documents({"user_id": user_id})
-            
-            # Count triggers
-            analytics["trigger_count"] = user_collection.count_documents({
-                "user_id": user_id, 
-                "type": "trigger_event"
-            })
-            
-            # Get progress data
-            analytics["progress_data"] = self.get_user_progress(user_id)
-            
-            # Get recent activity (last 10 items)
-            recent_lessons = list(lectures_collection.find(
-                {"user_id": user_id},
-                {"subject": 1, "topic": 1, "generated_at": 1, "_id": 0}
-            ).sort("generated_at", -1).limit(5))
-            
-            recent_triggers = list(user_collection.find(
-                {"user_id": user_id, "type": "trigger_event"},
-                {"trigger_data.type": 1, "timestamp": 1, "_id": 0}
-            ).sort("timestamp", -1).limit(5))
-            
-            analytics["recent_activity"] = {
-                "lessons": recent_lessons,
-                "triggers": recent_triggers
-            }
-            
-            # Calculate performance metrics
-            if analytics["progress_data"]:
-                progress = analytics["progress_data"]
-                educational_progress = progress.get("educational_progress", {})
-                quiz_scores = educational_progress.get("quiz_scores", [])
-                
-                if quiz_scores:
-                    analytics["performance_metrics"] = {
-                        "average_quiz_score": sum(quiz_scores) / len(quiz_scores),
-                        "latest_quiz_score": quiz_scores[-1],
-                        "quiz_trend": "improving" if len(quiz_scores) > 1 and quiz_scores[-1] > quiz_scores[-2] else "stable",
-                        "total_quizzes": len(quiz_scores)
-                    }
-            
-            return analytics
-            
+            return self.analytics.get_user_analytics(user_id, days)
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get user analytics: {e}")
             return {"user_id": user_id, "error": str(e)}
@@ -270,9 +225,9 @@ def store_enhanced_lesson(lesson_data: Dict[str, Any]) -> str:
     """Store enhanced lesson - convenience function"""
     return db_integration.store_enhanced_lesson(lesson_data)
 
-def get_user_analytics(user_id: str) -> Dict[str, Any]:
+def get_user_analytics(user_id: str, days: Optional[int] = None) -> Dict[str, Any]:
     """Get user analytics - convenience function"""
-    return db_integration.get_user_analytics(user_id)
+    return db_integration.get_user_analytics(user_id, days)
 
 def sync_user_data(user_id: str, orchestration_session: Dict[str, Any]) -> bool:
     """Sync user data - convenience function"""
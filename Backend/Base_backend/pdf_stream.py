@@ -0,0 +1,168 @@
+"""
+Streaming PDF Extraction
+Yields page text lazily and parses large documents across a process pool
+"""
+
+import os
+import re
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# Documents with at least this many pages are split into page ranges and
+# parsed in worker processes; smaller ones are read page by page in-process.
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "64"))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+MAX_PDF_WORKERS = int(os.getenv("PDF_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Same heading rule parse_pdf has always used ("1 Intro", "2.3. Results", ...)
+SECTION_HEADING = re.compile(r'^(?:\d+\.?)+\s+.+')
+# A bare section number whose title was wrapped onto the following line
+SECTION_NUMBER_ONLY = re.compile(r'^(?:\d+\.?)+\s*$')
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text for pages [start, stop) - runs inside a worker process"""
+    doc = fitz.open(file_path)
+    try:
+        return [doc.load_page(page_num).get_text() for page_num in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _page_count(file_path: str) -> int:
+    doc = fitz.open(file_path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(
+    file_path: str,
+    max_workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+    parallel_threshold: int = PARALLEL_PAGE_THRESHOLD,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for every page of a PDF, in page order.
+
+    Small documents are read lazily one page at a time. Large documents are
+    split into page ranges that are extracted in a process pool; only a
+    bounded window of ranges is in flight so memory does not scale with the
+    size of the document.
+    """
+    page_count = _page_count(file_path)
+    workers = max_workers or MAX_PDF_WORKERS
+
+    if page_count < parallel_threshold or workers <= 1:
+        doc = fitz.open(file_path)
+        try:
+            for page_num in range(page_count):
+                yield page_num, doc.load_page(page_num).get_text()
+        finally:
+            doc.close()
+        return
+
+    ranges = deque(
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    )
+    logger.info(f"Parsing {page_count} pages of {file_path} with {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        while ranges and len(in_flight) < workers * 2:
+            start, stop = ranges.popleft()
+            in_flight.append((start, executor.submit(_extract_page_range, file_path, start, stop)))
+
+        while in_flight:
+            start, future = in_flight.popleft()
+            texts = future.result()
+            if ranges:
+                next_start, next_stop = ranges.popleft()
+                in_flight.append(
+                    (next_start, executor.submit(_extract_page_range, file_path, next_start, next_stop))
+                )
+            for offset, text in enumerate(texts):
+                yield start + offset, text
+
+
+class SectionAccumulator:
+    """Builds title, body and numbered sections incrementally from page text"""
+
+    def __init__(self):
+        self.title = ""
+        self.sections: List[Dict[str, str]] = []
+        self._body_parts: List[str] = []
+        self._heading: Optional[str] = None
+        self._content: List[str] = []
+        self._pending_number: Optional[List[str]] = None
+
+    def feed(self, text: str) -> None:
+        """Consume the text of one page"""
+        self._body_parts.append(text)
+        self._body_parts.append("\n")
+        for line in text.split("\n"):
+            self._feed_line(line)
+
+    def _feed_line(self, line: str) -> None:
+        stripped = line.strip()
+        if not self.title and stripped:
+            self.title = stripped
+
+        if self._pending_number is not None:
+            self._pending_number.append(line)
+            if stripped:
+                pending, self._pending_number = self._pending_number, None
+                self._start_section("\n".join(pending).strip())
+            return
+
+        if SECTION_NUMBER_ONLY.match(line):
+            self._pending_number = [line]
+        elif SECTION_HEADING.match(line):
+            self._start_section(stripped)
+        elif self._heading is not None:
+            self._content.append(line)
+
+    def _start_section(self, heading: str) -> None:
+        self._close_section()
+        self._heading = heading
+        self._content = []
+
+    def _close_section(self) -> None:
+        if self._heading is not None:
+            self.sections.append({
+                "heading": self._heading,
+                "content": "\n".join(self._content).strip()
+            })
+        self._heading = None
+        self._content = []
+
+    def result(self) -> Dict:
+        if self._pending_number is not None:
+            pending, self._pending_number = self._pending_number, None
+            # Trailing whitespace-only lines still complete a heading
+            if any(pending[1:]):
+                self._start_section("\n".join(pending).strip())
+            else:
+                self._content.extend(pending)
+        self._close_section()
+        return {
+            "title": self.title,
+            "body": "".join(self._body_parts).strip(),
+            "sections": self.sections
+        }
+
+
+def parse_pdf_streaming(file_path: str, max_workers: Optional[int] = None) -> Dict:
+    """Parse a PDF into title, body and sections without quadratic string building"""
+    accumulator = SectionAccumulator()
+    for _, text in iter_pdf_pages(file_path, max_workers=max_workers):
+        accumulator.feed(text)
+    return accumulator.result()
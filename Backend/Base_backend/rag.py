@@ -3,14 +3,12 @@ from typing import List, Optional
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import requests
+import httpx
 import logging
 from fastapi.responses import FileResponse
 import os
-import fitz  # PyMuPDF
 import easyocr
 from PIL import Image
-import re
-import time
 import socket
 import cv2
 from dotenv import load_dotenv
@@ -30,6 +28,10 @@ import shutil
 import logging
 from langchain.llms.base import LLM
 from typing import Optional, List
+from pdf_stream import parse_pdf_streaming
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from audio_cache import AudioCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +42,9 @@ TEMP_DIR = "temp"
 if not os.path.exists(TEMP_DIR):
     os.makedirs(TEMP_DIR)
 
+# Generated speech is cached in TEMP_DIR by content hash with a size cap
+audio_cache = AudioCache(TEMP_DIR)
+
 # Pydantic models for response structure
 class Section(BaseModel):
     heading: str
@@ -61,22 +66,28 @@ class ImageResponse(BaseModel):
 pdf_response: PDFResponse | None = None
 image_response: ImageResponse| None = None
 
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
 class SimpleGroqLLM(LLM):
     groq_api_key: str
     model: str = "llama3-8b-8192"
 
-    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.groq_api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
+    def _request(self, prompt: str) -> Dict:
+        """Keyword arguments for the chat completions POST (requests and httpx alike)"""
+        return {
+            "headers": {
+                "Authorization": f"Bearer {self.groq_api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+            }
         }
 
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload)
-
+    @staticmethod
+    def _parse_response(response) -> str:
+        """Answer text from a requests or httpx response; failures raise RuntimeError"""
         try:
             result = response.json()
 
@@ -92,48 +103,49 @@ class SimpleGroqLLM(LLM):
             else:
                 raise ValueError(f"Unexpected response format from Groq API: {result}")
 
-        except requests.exceptions.JSONDecodeError:
-            logger.error(f"Groq API returned invalid JSON: {response.text}")
+        except ValueError as e:
+            # Also covers invalid JSON from either client
+            logger.error(f"Groq API returned invalid response: {e}")
             raise RuntimeError("Failed to parse Groq API response.")
         except Exception as e:
             logger.error(f"Groq API call failed: {e}")
             raise RuntimeError("Failed to generate response from Groq API.")
-    
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        response = requests.post(GROQ_CHAT_URL, **self._request(prompt))
+        return self._parse_response(response)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        try:
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                response = await client.post(GROQ_CHAT_URL, **self._request(prompt))
+        except Exception as e:
+            logger.error(f"Groq API call failed: {e}")
+            raise RuntimeError("Failed to generate response from Groq API.")
+        return self._parse_response(response)
+
     @property
     def _llm_type(self) -> str:
         return "groq-llm"
     
-def parse_pdf(file_path: str) -> Dict:
+def parse_pdf(file_path: str, max_workers: Optional[int] = None) -> Dict:
     try:
-        doc = fitz.open(file_path)
-        raw_text = ""
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text = page.get_text()
-            raw_text += text + "\n"
-        doc.close()
-        lines = raw_text.strip().split('\n')
-        title = next((line.strip() for line in lines if line.strip()), "")
-        section_pattern = re.compile(r'^(?:\d+\.?)+\s+.+', re.MULTILINE)
-        matches = list(section_pattern.finditer(raw_text))
-        sections = []
-        for i, match in enumerate(matches):
-            start = match.end()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(raw_text)
-            section_title = match.group().strip()
-            section_body = raw_text[start:end].strip()
-            sections.append({"heading": section_title, "content": section_body})
-        return {
-            "title": title,
-            "body": raw_text.strip(),
-            "sections": sections
-        }
+        return parse_pdf_streaming(file_path, max_workers=max_workers)
     except Exception as e:
         logger.error(f"Error parsing PDF: {e}")
         return {"title": "", "body": "", "sections": []}
 
+# EasyOCR model loading is expensive; keep one reader per process
+_easyocr_reader = None
+
+def get_easyocr_reader():
+    global _easyocr_reader
+    if _easyocr_reader is None:
+        _easyocr_reader = easyocr.Reader(['en' , 'hi'], gpu=False)
+    return _easyocr_reader
+
 def extract_text_easyocr(image_path: str) -> str:
-    reader = easyocr.Reader(['en' , 'hi'], gpu=False)
+    reader = get_easyocr_reader()
     result = reader.readtext(image_path, detail=0)
     print("OCR result list:", result)
     return " ".join(result)
@@ -166,17 +178,22 @@ def build_qa_agent(texts: List[str], groq_api_key: str) -> RetrievalQA:
     return qa
 
 def text_to_speech(text: str, file_prefix: str = "output") -> str:
+    """Synthesise text with gTTS, reusing the cached file for repeated text.
+
+    file_prefix is kept for callers; cached files are named by content hash.
+    """
     try:
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(TEMP_DIR, f"{file_prefix}_{timestamp}.mp3")
-        logger.info(f"Generating audio with Google TTS to {output_file}")
-        tts = gTTS(text=text, lang="en")
-        tts.save(output_file)
-        if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
-            logger.error(f"Audio file {output_file} was not created or is empty")
-            return ""
+        cache_key = audio_cache.make_key(text, engine="gtts", voice="en", rate="normal")
+
+        def synthesize(tmp_path: str):
+            logger.info(f"Generating audio with Google TTS for {file_prefix}")
+            tts = gTTS(text=text, lang="en")
+            tts.save(tmp_path)
+
+        output_file, cached = audio_cache.get_or_create(cache_key, synthesize)
+        if cached:
+            logger.info(f"Reusing cached audio {output_file}")
         return output_file
     except Exception as e:
         logger.error(f"Error in text-to-speech: {e}")
         return ""
-
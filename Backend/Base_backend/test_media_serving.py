@@ -0,0 +1,172 @@
+"""
+Tests for range requests and headers of the static media responses
+
+parse_range_header is tested directly; MediaFileResponse is exercised
+through serve_media on a small FastAPI app with the Starlette test client.
+"""
+
+import re
+from urllib.parse import unquote
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from media_serving import RangeNotSatisfiable, content_disposition, parse_range_header, serve_media
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes, each position distinguishable
+SIZE = len(CONTENT)
+
+
+class TestParseRangeHeader:
+
+    @pytest.mark.parametrize("header, expected", [
+        ("bytes=0-99", [(0, 99)]),
+        ("bytes=100-", [(100, SIZE - 1)]),
+        ("bytes=-100", [(SIZE - 100, SIZE - 1)]),
+        ("bytes=-5000", [(0, SIZE - 1)]),
+        ("bytes=1000-5000", [(1000, SIZE - 1)]),
+        ("bytes=0-0", [(0, 0)]),
+        ("BYTES = 10-19", [(10, 19)]),
+    ])
+    def test_single_ranges(self, header, expected):
+        assert parse_range_header(header, SIZE) == expected
+
+    def test_multiple_ranges_are_sorted_and_coalesced(self):
+        header = "bytes=500-599, 0-9, 10-19, 550-700, -24"
+        assert parse_range_header(header, SIZE) == [(0, 19), (500, 700), (1000, SIZE - 1)]
+
+    def test_unsatisfiable_parts_are_dropped(self):
+        assert parse_range_header("bytes=5000-6000,0-9,-0", SIZE) == [(0, 9)]
+
+    @pytest.mark.parametrize("header", ["bytes=5000-", "bytes=1024-2000", "bytes=-0", "bytes=5000-,-0"])
+    def test_unsatisfiable(self, header):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header(header, SIZE)
+
+    @pytest.mark.parametrize("header", [
+        "items=0-9", "bytes=", "bytes=abc", "bytes=9-0", "bytes=-", "bytes=1-2-3", "bytes=0-9,x-y", "bytes=5",
+    ])
+    def test_invalid_headers_are_ignored(self, header):
+        assert parse_range_header(header, SIZE) is None
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / "lesson.mp4"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@pytest.fixture
+def client(media_file):
+    app = FastAPI()
+
+    @app.api_route("/media/{name}", methods=["GET", "HEAD"])
+    async def media(name: str, request: Request):
+        return await serve_media(request, media_file, "video/mp4", filename=name)
+
+    with TestClient(app) as client:
+        yield client
+
+
+def parse_multipart(response):
+    boundary = re.search(r"boundary=(\S+)", response.headers["content-type"]).group(1).encode()
+    body = response.content
+    assert body.endswith(b"--" + boundary + b"--\r\n")
+    parts = []
+    for chunk in body.split(b"--" + boundary)[1:-1]:
+        head, _, data = chunk.partition(b"\r\n\r\n")
+        assert data.endswith(b"\r\n")
+        content_range = re.search(rb"Content-Range: bytes (\d+)-(\d+)/(\d+)", head)
+        assert b"Content-Type: video/mp4" in head
+        parts.append((tuple(int(g) for g in content_range.groups()), data[:-2]))
+    return parts
+
+
+class TestMediaFileResponse:
+
+    def test_full_file(self, client):
+        response = client.get("/media/lesson.mp4")
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["content-length"] == str(SIZE)
+        assert response.headers["accept-ranges"] == "bytes"
+        assert "content-range" not in response.headers
+
+    @pytest.mark.parametrize("header, start, end", [
+        ("bytes=-100", SIZE - 100, SIZE - 1),
+        ("bytes=1000-", 1000, SIZE - 1),
+        ("bytes=10-19", 10, 19),
+        ("bytes=1000-9999", 1000, SIZE - 1),
+    ])
+    def test_single_range(self, client, header, start, end):
+        response = client.get("/media/lesson.mp4", headers={"Range": header})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes {start}-{end}/{SIZE}"
+        assert response.headers["content-length"] == str(end - start + 1)
+        assert response.headers["content-type"] == "video/mp4"
+        assert response.content == CONTENT[start:end + 1]
+
+    def test_unsatisfiable_range(self, client):
+        response = client.get("/media/lesson.mp4", headers={"Range": "bytes=5000-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{SIZE}"
+
+    def test_invalid_range_sends_whole_file(self, client):
+        response = client.get("/media/lesson.mp4", headers={"Range": "bytes=9-0"})
+        assert response.status_code == 200
+        assert response.content == CONTENT
+
+    def test_multiple_ranges(self, client):
+        response = client.get("/media/lesson.mp4", headers={"Range": "bytes=0-9, -4, 500-509"})
+        assert response.status_code == 206
+        assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+        assert response.headers["content-length"] == str(len(response.content))
+        assert parse_multipart(response) == [
+            ((0, 9, SIZE), CONTENT[0:10]),
+            ((500, 509, SIZE), CONTENT[500:510]),
+            ((SIZE - 4, SIZE - 1, SIZE), CONTENT[-4:]),
+        ]
+
+    def test_head_sends_headers_only(self, client):
+        response = client.head("/media/lesson.mp4", headers={"Range": "bytes=0-9"})
+        assert response.status_code == 206
+        assert response.headers["content-length"] == "10"
+        assert response.content == b""
+
+    def test_stale_if_range_sends_whole_file(self, client):
+        response = client.get("/media/lesson.mp4", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert response.content == CONTENT
+
+    def test_etag_revalidation(self, client):
+        etag = client.get("/media/lesson.mp4").headers["etag"]
+        response = client.get("/media/lesson.mp4", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+class TestContentDisposition:
+
+    def test_plain_name(self):
+        assert content_disposition("lesson.mp4") == 'inline; filename="lesson.mp4"'
+        assert content_disposition("a b.mp3", "attachment") == 'attachment; filename="a b.mp3"'
+
+    def test_quotes_and_backslashes_are_escaped(self):
+        assert content_disposition('say "hi"\\.mp4') == r'inline; filename="say \"hi\"\\.mp4"'
+
+    def test_non_ascii_name(self):
+        value = content_disposition("पाठ 1.mp4")
+        fallback, encoded = re.fullmatch(r'inline; filename="([^"]*)"; filename\*=UTF-8\'\'(\S+)', value).groups()
+        assert fallback == "___ 1.mp4"
+        assert unquote(encoded) == "पाठ 1.mp4"
+
+    def test_control_characters_cannot_break_the_header(self):
+        value = content_disposition("evil\r\nSet-Cookie: x=1.mp4")
+        assert "\r" not in value and "\n" not in value
+        assert value.startswith('inline; filename="evil__Set-Cookie: x=1.mp4"; filename*=UTF-8\'\'')
+
+    def test_served_header(self, client):
+        response = client.get('/media/say "hi".mp4')
+        assert response.headers["content-disposition"] == r'inline; filename="say \"hi\".mp4"'
@@ -0,0 +1,148 @@
+"""
+Upload Job Execution
+Runs the PDF/image upload pipelines off the event loop with a bounded
+executor per stage, tracks job status and records per-stage latency
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from worker_pools import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# CPU-bound parse/OCR work runs in worker processes; embedding, TTS and the
+# database write are blocking calls that run in small thread pools
+PARSE_WORKERS = int(os.getenv("UPLOAD_PARSE_WORKERS", str(min(2, os.cpu_count() or 1))))
+EMBED_WORKERS = int(os.getenv("UPLOAD_EMBED_WORKERS", "2"))
+LLM_CONCURRENCY = int(os.getenv("UPLOAD_LLM_CONCURRENCY", "8"))
+TTS_WORKERS = int(os.getenv("UPLOAD_TTS_WORKERS", "4"))
+STORE_WORKERS = int(os.getenv("UPLOAD_STORE_WORKERS", "4"))
+MAX_TRACKED_JOBS = int(os.getenv("UPLOAD_MAX_TRACKED_JOBS", "500"))
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class UploadJobRunner:
+    """Executes upload pipelines stage by stage and keeps their status"""
+
+    STAGES = ("parse", "ocr", "embed", "llm", "tts", "store")
+
+    def __init__(self):
+        self.parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        self.thread_executors = {
+            "embed": ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="upload-embed"),
+            "tts": ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="upload-tts"),
+            "store": ThreadPoolExecutor(max_workers=STORE_WORKERS, thread_name_prefix="upload-store"),
+        }
+        self.llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        self.histograms = {stage: LatencyHistogram(LATENCY_BUCKETS) for stage in self.STAGES}
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks = set()
+
+    # ---- job bookkeeping ----
+
+    def create_job(self, kind: str, filename: str) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "kind": kind,
+            "filename": filename,
+            "status": "queued",
+            "stage": None,
+            "created_at": now,
+            "updated_at": now,
+            "stage_timings": {},
+            "result": None,
+            "error": None
+        }
+        while len(self.jobs) > MAX_TRACKED_JOBS:
+            self.jobs.popitem(last=False)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def _update(self, job_id: str, **fields):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+            job["updated_at"] = time.time()
+
+    # ---- stage execution ----
+
+    async def _timed(self, job_id: str, stage: str, awaitable: Awaitable) -> Any:
+        self._update(job_id, status="running", stage=stage)
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            elapsed = time.perf_counter() - start
+            self.histograms[stage].observe(elapsed)
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job["stage_timings"][stage] = round(elapsed, 4)
+
+    async def run_in_process(self, job_id: str, stage: str, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await self._timed(job_id, stage, loop.run_in_executor(self.parse_executor, func, *args))
+
+    async def run_in_thread(self, job_id: str, stage: str, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        executor = self.thread_executors[stage]
+        return await self._timed(job_id, stage, loop.run_in_executor(executor, func, *args))
+
+    async def run_async(self, job_id: str, stage: str, coro: Awaitable) -> Any:
+        async with self.llm_semaphore:
+            return await self._timed(job_id, stage, coro)
+
+    # ---- job lifecycle ----
+
+    async def execute(self, job_id: str, pipeline: Callable[[str], Awaitable[Any]]) -> Any:
+        """Run a pipeline for a job and record its outcome"""
+        try:
+            result = await pipeline(job_id)
+            self._update(job_id, status="completed", stage=None, result=result)
+            return result
+        except Exception as e:
+            logger.error(f"Upload job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=getattr(e, "detail", None) or str(e))
+            raise
+
+    def submit(self, job_id: str, pipeline: Callable[[str], Awaitable[Any]]):
+        """Start a pipeline in the background; poll get_job for the outcome"""
+        task = asyncio.create_task(self._execute_quietly(job_id, pipeline))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _execute_quietly(self, job_id: str, pipeline: Callable[[str], Awaitable[Any]]):
+        try:
+            await self.execute(job_id, pipeline)
+        except Exception:
+            pass  # failure is recorded on the job
+
+    def metrics(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+        return {
+            "jobs": statuses,
+            "in_flight": len(self._tasks),
+            "stage_latency_seconds": {stage: h.snapshot() for stage, h in self.histograms.items()}
+        }
+
+    def shutdown(self):
+        self.parse_executor.shutdown(wait=False, cancel_futures=True)
+        for executor in self.thread_executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
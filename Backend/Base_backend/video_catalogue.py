@@ -0,0 +1,271 @@
+"""
+Video Catalogue
+Persistent, indexed metadata store for videos received from the generation
+system. Backed by a local SQLite file so every uvicorn worker sees the same
+catalogue and it survives restarts; listing uses keyset (cursor) pagination
+so each page costs O(page size) regardless of how many videos exist
+"""
+
+import os
+import re
+import json
+import base64
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VIDEO_CATALOGUE_PATH = os.getenv("VIDEO_CATALOGUE_PATH", os.path.join("generated_videos", "video_catalogue.db"))
+VIDEO_PAGE_SIZE = int(os.getenv("VIDEO_PAGE_SIZE", "50"))
+VIDEO_MAX_PAGE_SIZE = int(os.getenv("VIDEO_MAX_PAGE_SIZE", "500"))
+STALE_PARTIAL_SECONDS = 3600
+
+# Files written by /receive-video: <uuid>_<YYYYmmdd_HHMMSS>.mp4
+_VIDEO_FILENAME = re.compile(
+    r"^(?P<video_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})_(?P<stamp>\d{8}_\d{6})\.mp4$"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id     TEXT PRIMARY KEY,
+    filename     TEXT NOT NULL,
+    file_path    TEXT NOT NULL,
+    file_size    INTEGER NOT NULL,
+    received_at  TEXT NOT NULL,
+    received_ts  REAL NOT NULL,
+    subject      TEXT,
+    topic        TEXT,
+    title        TEXT,
+    metadata     TEXT NOT NULL,
+    sha256       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_videos_received ON videos (received_ts DESC, video_id DESC);
+CREATE INDEX IF NOT EXISTS idx_videos_subject ON videos (subject, received_ts DESC, video_id DESC);
+CREATE INDEX IF NOT EXISTS idx_videos_topic ON videos (topic, received_ts DESC, video_id DESC);
+"""
+
+# Columns added after the first release, applied to existing databases
+_MIGRATIONS = (
+    ("sha256", "ALTER TABLE videos ADD COLUMN sha256 TEXT"),
+)
+# Content hashes are unique so concurrent identical uploads cannot both be
+# stored. Duplicates recorded before that keep the hash on the oldest record
+# only (NULLs don't collide)
+_POST_MIGRATION = """
+DROP INDEX IF EXISTS idx_videos_sha256;
+UPDATE videos SET sha256 = NULL
+WHERE sha256 IS NOT NULL AND EXISTS (
+    SELECT 1 FROM videos AS older
+    WHERE older.sha256 = videos.sha256
+      AND (older.received_ts, older.video_id) < (videos.received_ts, videos.video_id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_videos_sha256_unique ON videos (sha256);
+"""
+
+# Columns stored outside the metadata JSON blob
+_COLUMNS = ("video_id", "filename", "file_path", "file_size", "received_at", "sha256")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class DuplicateContent(Exception):
+    """Another record already holds this content hash"""
+
+
+def _encode_cursor(received_ts: float, video_id: str) -> str:
+    raw = json.dumps([received_ts, video_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        received_ts, video_id = json.loads(raw)
+        return float(received_ts), str(video_id)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def _metadata_field(metadata: Dict[str, Any], name: str) -> Optional[str]:
+    """subject/topic may sit at the top level or inside a nested 'metadata' dict"""
+    value = metadata.get(name)
+    if value is None and isinstance(metadata.get("metadata"), dict):
+        value = metadata["metadata"].get(name)
+    return str(value).strip().lower() if value not in (None, "") else None
+
+
+class VideoCatalogue:
+    """SQLite-backed store of video metadata records"""
+
+    def __init__(self, db_path: str = VIDEO_CATALOGUE_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(videos)")}
+            for column, statement in _MIGRATIONS:
+                if column not in existing:
+                    conn.execute(statement)
+            conn.executescript(_POST_MIGRATION)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets workers read while another writes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = json.loads(row["metadata"])
+        record.update({name: row[name] for name in _COLUMNS})
+        return record
+
+    # ---- writes ----
+
+    def add(self, record: Dict[str, Any]):
+        """
+        Insert or replace (by video_id) a record shaped like the old in-memory
+        entries. Raises DuplicateContent if another video has the same sha256
+        """
+        received_at = record["received_at"]
+        metadata = {k: v for k, v in record.items() if k not in _COLUMNS}
+        try:
+            with self._connect() as conn:
+                # Upsert on video_id only: INSERT OR REPLACE would also settle a
+                # sha256 conflict by deleting the other video's record
+                conn.execute(
+                    "INSERT INTO videos "
+                    "(video_id, filename, file_path, file_size, received_at, received_ts, subject, topic, title, metadata, sha256) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (video_id) DO UPDATE SET "
+                    "filename = excluded.filename, file_path = excluded.file_path, file_size = excluded.file_size, "
+                    "received_at = excluded.received_at, received_ts = excluded.received_ts, "
+                    "subject = excluded.subject, topic = excluded.topic, title = excluded.title, "
+                    "metadata = excluded.metadata, sha256 = excluded.sha256",
+                    (
+                        record["video_id"],
+                        record["filename"],
+                        record["file_path"],
+                        record["file_size"],
+                        received_at,
+                        datetime.fromisoformat(received_at).timestamp(),
+                        _metadata_field(record, "subject"),
+                        _metadata_field(record, "topic"),
+                        record.get("title"),
+                        json.dumps(metadata, default=str),
+                        record.get("sha256")
+                    )
+                )
+        except sqlite3.IntegrityError as e:
+            if "sha256" not in str(e):
+                raise
+            raise DuplicateContent(record.get("sha256")) from e
+
+    def remove(self, video_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    # ---- reads ----
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def find_by_sha256(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """An existing record with identical content, if any"""
+        row = self._connect().execute(
+            "SELECT * FROM videos WHERE sha256 = ? ORDER BY received_ts LIMIT 1", (sha256,)
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def list(self, limit: int = VIDEO_PAGE_SIZE, cursor: Optional[str] = None,
+             subject: Optional[str] = None, topic: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first page of records and the cursor for the next page
+        (None on the last page). Filters use the subject/topic indexes.
+        """
+        limit = max(1, min(limit, VIDEO_MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if subject:
+            clauses.append("subject = ?")
+            params.append(subject.strip().lower())
+        if topic:
+            clauses.append("topic = ?")
+            params.append(topic.strip().lower())
+        if cursor:
+            received_ts, video_id = _decode_cursor(cursor)
+            # Row-value comparison lets SQLite seek straight into the index
+            clauses.append("(received_ts, video_id) < (?, ?)")
+            params.extend([received_ts, video_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT * FROM videos {where} ORDER BY received_ts DESC, video_id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1]["received_ts"], rows[-1]["video_id"])
+        return [self._to_record(row) for row in rows], next_cursor
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    # ---- reconciliation ----
+
+    def reconcile(self, videos_dir: str) -> Dict[str, int]:
+        """
+        Bring the catalogue in line with the files on disk: drop records whose
+        file is gone and index videos that were written without a record
+        (e.g. received before the catalogue existed)
+        """
+        on_disk = {}
+        for name in os.listdir(videos_dir):
+            if name.endswith(".partial"):
+                # Left behind by an upload interrupted mid-write
+                path = os.path.join(videos_dir, name)
+                if time.time() - os.path.getmtime(path) > STALE_PARTIAL_SECONDS:
+                    os.remove(path)
+                continue
+            match = _VIDEO_FILENAME.match(name)
+            if match:
+                on_disk[match.group("video_id")] = (name, match.group("stamp"))
+
+        conn = self._connect()
+        known = {row["video_id"]: row["file_path"] for row in conn.execute("SELECT video_id, file_path FROM videos")}
+
+        removed = [video_id for video_id, path in known.items() if not os.path.exists(path)]
+        with conn:
+            conn.executemany("DELETE FROM videos WHERE video_id = ?", [(v,) for v in removed])
+
+        added = 0
+        for video_id, (name, stamp) in on_disk.items():
+            if video_id in known:
+                continue
+            file_path = os.path.join(videos_dir, name)
+            self.add({
+                "video_id": video_id,
+                "filename": name,
+                "file_path": file_path,
+                "file_size": os.path.getsize(file_path),
+                "received_at": datetime.strptime(stamp, "%Y%m%d_%H%M%S").isoformat(),
+                "recovered": True
+            })
+            added += 1
+
+        if removed or added:
+            logger.info(f"Video catalogue reconciled: {added} files indexed, {len(removed)} stale records removed")
+        return {"indexed": added, "removed": len(removed), "total": self.count()}
@@ -0,0 +1,81 @@
+"""
+Video Ingest
+Streams an uploaded video to a temporary file in fixed-size chunks off the
+event loop, hashing it on the way, so large uploads never block other
+requests and identical content can be recognised before it is stored
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+VIDEO_INGEST_CHUNK_SIZE = int(os.getenv("VIDEO_INGEST_CHUNK_SIZE", str(1024 * 1024)))
+VIDEO_MAX_UPLOAD_MB = float(os.getenv("VIDEO_MAX_UPLOAD_MB", "1024"))
+
+
+class VideoTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Video exceeds the {max_bytes / (1024 * 1024):g} MB upload limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class IngestResult:
+    temp_path: str
+    sha256: str
+    size: int
+    seconds: float
+
+    @property
+    def throughput_mbps(self) -> float:
+        """Megabytes per second written to disk"""
+        return round(self.size / (1024 * 1024) / self.seconds, 2) if self.seconds else 0.0
+
+
+def _write_chunk(f, digest, chunk: bytes):
+    f.write(chunk)
+    digest.update(chunk)
+
+
+async def ingest_upload(upload: UploadFile, dest_dir: str,
+                        max_bytes: int = int(VIDEO_MAX_UPLOAD_MB * 1024 * 1024),
+                        chunk_size: int = VIDEO_INGEST_CHUNK_SIZE) -> IngestResult:
+    """
+    Copy an upload into dest_dir as a .partial file and return its hash.
+
+    The caller renames temp_path into place (os.replace is atomic on the same
+    filesystem) or deletes it; on error the partial file is removed here.
+    Raises VideoTooLarge as soon as max_bytes is exceeded.
+    """
+    temp_path = os.path.join(dest_dir, f".{uuid.uuid4().hex}.partial")
+    digest = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+
+    f = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise VideoTooLarge(max_bytes)
+            await asyncio.to_thread(_write_chunk, f, digest, chunk)
+        await asyncio.to_thread(os.fsync, f.fileno())
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    await asyncio.to_thread(f.close)
+
+    return IngestResult(temp_path, digest.hexdigest(), size, time.perf_counter() - started)
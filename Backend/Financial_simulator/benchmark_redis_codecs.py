@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Redis simulation-state throughput benchmark.
+
+Stores and reads back a simulation state shaped like the one
+run_simulation caches under simulation:<id> (inputs plus one entry of agent
+results per month), comparing the previous path - json.dumps/json.loads on a
+decode_responses client - with the shared redis_connection store under each
+available codec, with and without zstd compression.
+
+Reported per row: encoded size, encode+decode time alone, and get/set
+round-trips per second through the client. Without --redis-url the client is
+fakeredis, which has no network cost, so the round-trip rows mostly show
+client-side cost; against a real server the size difference also shows up as
+transfer time.
+
+Usage:
+    python benchmark_redis_codecs.py --months 12 --ops 2000
+    python benchmark_redis_codecs.py --redis-url redis://localhost:6379/15
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+import redis
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from redis_connection import (
+    MSGPACK_AVAILABLE, ORJSON_AVAILABLE, ZSTD_AVAILABLE,
+    CommandMetrics, RedisStore, ValueSerializer
+)
+
+KEY = "financial_crew:benchmark:simulation"
+
+
+def make_state(months: int, seed: int = 7):
+    """A cached simulation state with months of agent results."""
+    rng = random.Random(seed)
+    categories = ["rent", "groceries", "transport", "utilities", "dining", "shopping", "health", "education"]
+
+    def month_result(month):
+        expenses = {c: round(rng.uniform(50, 2500), 2) for c in categories}
+        return {
+            "month": month,
+            "cashflow_result": {
+                "income": {"salary": 85000, "freelance": round(rng.uniform(0, 15000), 2)},
+                "expenses": expenses,
+                "savings": round(85000 - sum(expenses.values()), 2),
+                "transactions": [
+                    {"date": f"2025-{month:02d}-{day:02d}", "category": rng.choice(categories),
+                     "amount": round(rng.uniform(5, 900), 2), "note": "auto-categorised"}
+                    for day in range(1, 29)
+                ],
+            },
+            "discipline_result": {"score": rng.randint(40, 100), "violations": rng.randint(0, 6),
+                                  "recommendations": ["Reduce dining out", "Automate savings transfers"]},
+            "goal_tracking_result": {"goals": [
+                {"name": name, "target": target, "saved": round(rng.uniform(0, target), 2), "on_track": rng.random() > 0.3}
+                for name, target in [("Emergency fund", 300000), ("Laptop", 90000), ("Travel", 150000)]
+            ]},
+            "behavior_result": {"traits": {"impulse": rng.random(), "planning": rng.random()},
+                                "summary": "Spending spikes after salary credit; steadier mid-month. " * 3},
+            "karma_result": {"karma_score": rng.randint(0, 100), "actions": ["donation", "timely bill payment"]},
+            "financial_strategy_result": {"strategy": "Shift 10% of discretionary spend into a recurring deposit. " * 4,
+                                          "allocations": {"equity": 0.5, "debt": 0.3, "gold": 0.1, "cash": 0.1}},
+            "economic_context": {"inflation": round(rng.uniform(3, 7), 2), "repo_rate": 6.5, "sentiment": "neutral"},
+            "market_context": {"nifty_change": round(rng.uniform(-4, 4), 2), "gold_change": round(rng.uniform(-2, 3), 2)},
+        }
+
+    return {
+        "simulation_id": "bench-0001",
+        "user_inputs": {"user_id": "u123", "name": "Asha", "income": 85000, "goals": ["Emergency fund", "Laptop"]},
+        "n_months": months,
+        "simulation_unit": "Month",
+        "status": "completed",
+        "start_time": time.time(),
+        "months": [month_result(m) for m in range(1, months + 1)],
+    }
+
+
+def make_clients(redis_url):
+    """(text client, bytes client) for the server under test."""
+    if redis_url:
+        return redis.Redis.from_url(redis_url, decode_responses=True), redis.Redis.from_url(redis_url)
+    import fakeredis
+    server = fakeredis.FakeServer()
+    return (fakeredis.FakeRedis(server=server, decode_responses=True),
+            fakeredis.FakeRedis(server=server))
+
+
+def time_ops(fn, ops: int):
+    timings = []
+    for _ in range(ops):
+        started = time.perf_counter_ns()
+        fn()
+        timings.append(time.perf_counter_ns() - started)
+    return timings
+
+
+def report(label, size, codec_us, set_timings, get_timings):
+    set_mean = statistics.mean(set_timings)
+    get_mean = statistics.mean(get_timings)
+    print(f"{label:<18}{size / 1024:>10.1f}{codec_us:>12.1f}{1e9 / set_mean:>10.0f}{1e9 / get_mean:>10.0f}"
+          f"{get_timings[len(get_timings) // 2] / 1000:>12.1f}")
+
+
+def main(args):
+    state = make_state(args.months)
+    text_client, bytes_client = make_clients(args.redis_url)
+    print(f"{args.months} months, {args.ops} ops per row, "
+          f"{'redis ' + args.redis_url if args.redis_url else 'fakeredis (no network)'}")
+    print(f"{'path':<18}{'KiB':>10}{'codec us':>12}{'set/s':>10}{'get/s':>10}{'get p50 us':>12}")
+
+    # Previous path: json text on a decode_responses client
+    encoded = json.dumps(state)
+    started = time.perf_counter_ns()
+    for _ in range(args.ops):
+        json.loads(json.dumps(state))
+    codec_us = (time.perf_counter_ns() - started) / args.ops / 1000
+    set_timings = time_ops(lambda: text_client.set(KEY, json.dumps(state), ex=3600), args.ops)
+    get_timings = time_ops(lambda: json.loads(text_client.get(KEY)), args.ops)
+    report("legacy json", len(encoded.encode()), codec_us, set_timings, get_timings)
+
+    codecs = ["stdjson"]
+    if ORJSON_AVAILABLE:
+        codecs.append("orjson")
+    if MSGPACK_AVAILABLE:
+        codecs.append("msgpack")
+    for codec in codecs:
+        for compress in ([False, True] if ZSTD_AVAILABLE else [False]):
+            # compress_min_bytes=0 disables compression; 1 compresses everything
+            serializer = ValueSerializer(codec, compress_min_bytes=1 if compress else 0,
+                                         compress_level=args.level)
+            store = RedisStore(bytes_client, serializer, CommandMetrics())
+            encoded = serializer.dumps(state)
+            assert serializer.loads(encoded) == json.loads(json.dumps(state))
+            started = time.perf_counter_ns()
+            for _ in range(args.ops):
+                serializer.loads(serializer.dumps(state))
+            codec_us = (time.perf_counter_ns() - started) / args.ops / 1000
+            set_timings = time_ops(lambda: store.set(KEY, state, ex=3600), args.ops)
+            get_timings = time_ops(lambda: store.get(KEY), args.ops)
+            report(f"{codec}{' + zstd' if compress else ''}", len(encoded), codec_us, set_timings, get_timings)
+
+    bytes_client.delete(KEY)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulation-state get/set throughput per Redis codec")
+    parser.add_argument("--months", type=int, default=12, help="months of results in the cached state")
+    parser.add_argument("--ops", type=int, default=2000, help="timed operations per row")
+    parser.add_argument("--level", type=int, default=3, help="zstd compression level")
+    parser.add_argument("--redis-url", help="benchmark against this server instead of fakeredis")
+    main(parser.parse_args())
@@ -10,8 +10,8 @@ import json
 import os
 from datetime import datetime, timedelta
 import time
+import sys
 import uuid
-import redis
 import yaml
 
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
@@ -50,27 +50,28 @@ from database.mongodb_client import (
     generate_simulation_id
 )
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from redis_connection import get_redis_connection
+
 # Load environment variables
 load_dotenv()
 
 # Initialize Redis client with error handling
 redis_client = None
+redis_store = None
 try:
-    redis_client = redis.Redis(
-        host=os.getenv("REDIS_HOST", "localhost"),
-        port=int(os.getenv("REDIS_PORT", 6379)),
-        password=os.getenv("REDIS_PASSWORD", ""),
-        decode_responses=True,  # Automatically decode responses to strings
-        socket_connect_timeout=5,  # 5 second timeout
-        socket_timeout=5
-    )
-    # Test the connection
-    redis_client.ping()
+    # Shared pool (5 second socket timeouts by default, see REDIS_SOCKET_TIMEOUT)
+    redis_connection = get_redis_connection()
+    redis_connection.ping()
+    redis_client = redis_connection.sync
+    # Keys are passed in already namespaced, so the store adds no prefix
+    redis_store = redis_connection.store()
     print("✅ Redis connection established successfully")
 except Exception as e:
     print(f"⚠️ Redis connection failed: {e}")
     print("⚠️ Continuing without Redis caching - using in-memory fallback")
     redis_client = None
+    redis_store = None
 
 # In-memory cache fallback when Redis is not available
 _memory_cache = {}
@@ -78,13 +79,10 @@ _memory_cache = {}
 # Redis utility functions with fallback
 def redis_cache_get(key, namespace="financial_crew"):
     """Get data from Redis cache or memory fallback."""
-    if redis_client is not None:
+    if redis_store is not None:
         try:
             full_key = f"{namespace}:{key}"
-            data = redis_client.get(full_key)
-            if data:
-                return json.loads(data)
-            return None
+            return redis_store.get(full_key)
         except Exception as e:
             print(f"Redis cache get error: {e}")
             # Fall back to memory cache
@@ -96,10 +94,10 @@ def redis_cache_get(key, namespace="financial_crew"):
 
 def redis_cache_set(key, value, expiry=3600, namespace="financial_crew"):
     """Set data in Redis cache with expiry in seconds or memory fallback."""
-    if redis_client is not None:
+    if redis_store is not None:
         try:
             full_key = f"{namespace}:{key}"
-            redis_client.setex(full_key, expiry, json.dumps(value))
+            redis_store.set(full_key, value, ex=expiry)
             return True
         except Exception as e:
             print(f"Redis cache set error: {e}")
@@ -113,10 +111,10 @@ def redis_cache_set(key, value, expiry=3600, namespace="financial_crew"):
 
 def redis_cache_delete(key, namespace="financial_crew"):
     """Delete data from Redis cache or memory fallback."""
-    if redis_client is not None:
+    if redis_store is not None:
         try:
             full_key = f"{namespace}:{key}"
-            return bool(redis_client.delete(full_key))
+            return bool(redis_store.delete(full_key))
         except Exception as e:
             print(f"Redis cache delete error: {e}")
             # Fall back to memory cache
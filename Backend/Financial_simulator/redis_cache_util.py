@@ -3,13 +3,15 @@ Redis cache utility for the Financial Crew application.
 """
 
 import os
-import json
-import redis
+import sys
 import hashlib
 from datetime import timedelta
 from functools import wraps
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from redis_connection import get_redis_connection
+
 # Load environment variables
 load_dotenv()
 
@@ -18,17 +20,14 @@ class RedisCache:
     
     def __init__(self, namespace="financial_crew"):
         """
-        Initialize Redis connection using environment variables.
+        Initialize the cache on the shared Redis connection.
         
         Args:
             namespace (str): Namespace prefix for cache keys
         """
-        self.redis_client = redis.Redis(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True  # Automatically decode responses to strings
-        )
+        connection = get_redis_connection()
+        self.redis_client = connection.sync
+        self.store = connection.store(namespace)
         self.namespace = namespace
         self.default_expiry = timedelta(hours=24)  # Default cache expiry time
     
@@ -42,7 +41,7 @@ class RedisCache:
         Returns:
             str: Namespaced key
         """
-        return f"{self.namespace}:{key}"
+        return self.store.key(key)
     
     def set(self, key, value, expiry=None):
         """
@@ -50,21 +49,18 @@ class RedisCache:
         
         Args:
             key (str): Cache key
-            value (any): Data to cache (will be JSON serialized)
+            value (any): Data to cache (serialised with the shared codec)
             expiry (timedelta, optional): Custom expiry time
         
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Convert data to JSON string
-            json_data = json.dumps(value)
-            
             # Set expiry time (in seconds)
             ex_seconds = int(expiry.total_seconds()) if expiry else int(self.default_expiry.total_seconds())
             
             # Store in Redis
-            return self.redis_client.setex(self._get_key(key), ex_seconds, json_data)
+            return self.store.set(key, value, ex=ex_seconds)
         except Exception as e:
             print(f"Error setting cache data: {e}")
             return False
@@ -80,10 +76,7 @@ class RedisCache:
             any: Cached data or None if not found
         """
         try:
-            data = self.redis_client.get(self._get_key(key))
-            if data:
-                return json.loads(data)
-            return None
+            return self.store.get(key)
         except Exception as e:
             print(f"Error getting cache data: {e}")
             return None
@@ -99,7 +92,7 @@ class RedisCache:
             bool: True if successful, False otherwise
         """
         try:
-            return bool(self.redis_client.delete(self._get_key(key)))
+            return bool(self.store.delete(key))
         except Exception as e:
             print(f"Error deleting cache data: {e}")
             return False
@@ -112,10 +105,17 @@ class RedisCache:
             int: Number of keys deleted
         """
         try:
-            keys = self.redis_client.keys(f"{self.namespace}:*")
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
+            # SCAN in batches rather than KEYS, which blocks the server
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=f"{self.namespace}:*", count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    deleted += self.redis_client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.delete(*batch)
+            return deleted
         except Exception as e:
             print(f"Error clearing namespace: {e}")
             return 0
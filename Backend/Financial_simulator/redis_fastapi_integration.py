@@ -55,17 +55,19 @@ async def check_rate_limit(request: Request, response: Response):
     # Use client IP as the rate limit key
     client_ip = request.client.host
     
-    # Check rate limit
-    is_limited, remaining, reset_time = rate_limiter.is_rate_limited(client_ip)
+    # Check rate limit (one round-trip; the result also carries the header values)
+    result = rate_limiter.check(client_ip)
+    headers = rate_limiter.headers_for(result)
     
     # Add rate limit headers to response
-    response.headers.update(rate_limiter.get_rate_limit_headers(client_ip, increment=False))
+    response.headers.update(headers)
     
     # Raise exception if rate limited
-    if is_limited:
+    if result.limited:
         raise HTTPException(
             status_code=429,
-            detail=f"Rate limit exceeded. Try again in {reset_time} seconds."
+            detail=f"Rate limit exceeded. Try again in {result.retry_after} seconds.",
+            headers=headers
         )
     
     return client_ip
@@ -3,11 +3,13 @@ Redis Pub/Sub messaging for the Financial Crew application.
 """
 
 import os
-import json
+import sys
 import threading
-import redis
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from redis_connection import JsonCodec, get_redis_connection
+
 # Load environment variables
 load_dotenv()
 
@@ -15,13 +17,10 @@ class RedisPubSub:
     """Redis Pub/Sub messaging for real-time communication."""
     
     def __init__(self):
-        """Initialize Redis connection using environment variables."""
-        self.redis_client = redis.Redis(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True
-        )
+        """Initialize Pub/Sub on the shared Redis connection."""
+        self.redis_client = get_redis_connection().sync
+        # Messages stay plain JSON (no codec header) so other subscribers can read them
+        self.codec = JsonCodec()
         self.pubsub = self.redis_client.pubsub()
         self.subscribers = {}
         self.running = False
@@ -39,11 +38,8 @@ class RedisPubSub:
             int: Number of clients that received the message
         """
         try:
-            # Convert message to JSON string
-            json_message = json.dumps(message)
-            
             # Publish to channel
-            return self.redis_client.publish(channel, json_message)
+            return self.redis_client.publish(channel, self.codec.dumps(message))
         except Exception as e:
             print(f"Error publishing message: {e}")
             return 0
@@ -116,7 +112,9 @@ class RedisPubSub:
             
             # Get channel and data
             channel = message['channel']
-            data = json.loads(message['data'])
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            data = self.codec.loads(message['data'])
             
             # Call subscriber callback
             if channel in self.subscribers:
@@ -154,7 +152,7 @@ class RedisPubSub:
         """Close the Redis connection and stop the listener."""
         try:
             self._stop_listener()
+            # The client belongs to the shared connection pool, which stays open
             self.pubsub.close()
-            self.redis_client.close()
         except Exception as e:
             print(f"Error closing Redis connection: {e}")
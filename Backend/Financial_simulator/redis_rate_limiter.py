@@ -1,118 +1,153 @@
 """
 Redis-based rate limiter for the Financial Crew application.
+
+Limits are enforced with GCRA over one or more policies per key, checked and
+recorded atomically in a single round-trip; the script and key layout are
+shared with the security middleware through redis_gcra.
 """
 
 import os
-import time
-import redis
+import sys
+from collections import namedtuple
+
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from redis_connection import get_redis_connection
+from redis_gcra import GcraLimiter
+
 # Load environment variables
 load_dotenv()
 
+RateLimitPolicy = namedtuple("RateLimitPolicy", ["limit", "window", "name"])
+RateLimitPolicy.__new__.__defaults__ = (None,)
+RateLimitPolicy.__doc__ = "At most `limit` requests in any `window` seconds, stored under `name`"
+
+RateLimitResult = namedtuple("RateLimitResult", ["limited", "limit", "window", "remaining", "reset_after", "retry_after"])
+RateLimitResult.__doc__ = (
+    "Outcome of a check, reported for the policy that denied the request, or "
+    "the one closest to denying it. reset_after is the time in seconds until "
+    "that policy is fully replenished and retry_after the time until the "
+    "request would be allowed (0 unless limited)"
+)
+
+
 class RedisRateLimiter:
     """Redis-based rate limiter to control API request rates."""
-    
-    def __init__(self, limit=100, window=3600):
+
+    def __init__(self, limit=100, window=3600, policies=None, redis_client=None):
         """
-        Initialize Redis connection using environment variables.
-        
+        Initialize the limiter on the shared Redis connection.
+
         Args:
             limit (int): Maximum number of requests allowed in the time window
             window (int): Time window in seconds
+            policies (list): RateLimitPolicy entries enforced together on every
+                key, e.g. 10 per second and 1000 per hour; overrides limit and window
+            redis_client (redis.Redis): Client to use instead of the shared one
+        """
+        self.redis_client = redis_client or get_redis_connection().sync
+        policies = policies or [RateLimitPolicy(limit, window)]
+        self.policies = [
+            RateLimitPolicy(p.limit, p.window, p.name or f"{p.limit}r{p.window}s") for p in policies
+        ]
+        self.limit = self.policies[0].limit
+        self.window = self.policies[0].window
+        self._gcra = GcraLimiter(self.redis_client, prefix="rate_limit")
+        self._gcra_policies = [(p.name, p.limit, p.window) for p in self.policies]
+
+    def _keys(self, key):
+        return self._gcra.keys(key, self._gcra_policies)
+
+    def check(self, key, increment=True, cost=1):
         """
-        self.redis_client = redis.Redis(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True
+        Check a key against every policy in one atomic round-trip.
+
+        Args:
+            key (str): Identifier for the client (e.g., IP address, user ID)
+            increment (bool): Whether to record the request if it is allowed
+            cost (int): How many requests this one counts as
+
+        Returns:
+            RateLimitResult: Whether the request is limited, with the values
+                for rate limit headers
+        """
+        reply = self._gcra.check(key, self._gcra_policies, cost=cost, record=increment)
+        policy = self.policies[reply.index]
+        return RateLimitResult(
+            limited=reply.limited,
+            limit=policy.limit,
+            window=policy.window,
+            remaining=reply.remaining,
+            reset_after=reply.reset_after,
+            retry_after=reply.retry_after
         )
-        self.limit = limit
-        self.window = window
-    
+
     def is_rate_limited(self, key, increment=True):
         """
         Check if a key is rate limited.
-        
+
         Args:
             key (str): Identifier for the client (e.g., IP address, user ID)
             increment (bool): Whether to increment the counter if not rate limited
-        
+
         Returns:
             tuple: (is_limited, remaining, reset_time)
                 - is_limited (bool): True if rate limited, False otherwise
                 - remaining (int): Number of requests remaining in the window
-                - reset_time (int): Time in seconds until the window resets
+                - reset_time (int): Seconds until the request would be allowed
+                  when limited, otherwise until the limit is fully replenished
+        """
+        result = self.check(key, increment)
+        reset_time = result.retry_after if result.limited else result.reset_after
+        return result.limited, result.remaining, reset_time
+
+    @staticmethod
+    def headers_for(result):
+        """
+        Rate limit headers for a check result.
+
+        Args:
+            result (RateLimitResult): Result returned by check()
+
+        Returns:
+            dict: Rate limit headers, with Retry-After when limited
         """
-        # Get the current timestamp
-        current_time = int(time.time())
-        
-        # Create a key with the current window
-        window_start = current_time - (current_time % self.window)
-        window_key = f"rate_limit:{key}:{window_start}"
-        
-        # Get the current count
-        count = int(self.redis_client.get(window_key) or 0)
-        
-        # Check if rate limited
-        is_limited = count >= self.limit
-        
-        # Increment the counter if not rate limited and increment is True
-        if not is_limited and increment:
-            # Use pipeline to ensure atomic operations
-            pipe = self.redis_client.pipeline()
-            pipe.incr(window_key)
-            # Set expiry if it doesn't exist
-            pipe.expire(window_key, self.window)
-            pipe.execute()
-            count += 1
-        
-        # Calculate remaining requests and reset time
-        remaining = max(0, self.limit - count)
-        reset_time = window_start + self.window - current_time
-        
-        return is_limited, remaining, reset_time
-    
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(result.reset_after),
+            "X-RateLimit-Limited": "1" if result.limited else "0"
+        }
+        if result.limited:
+            headers["Retry-After"] = str(result.retry_after)
+        return headers
+
     def get_rate_limit_headers(self, key, increment=True):
         """
         Get rate limit headers for HTTP responses.
-        
+
         Args:
             key (str): Identifier for the client
             increment (bool): Whether to increment the counter
-        
+
         Returns:
             dict: Rate limit headers
         """
-        is_limited, remaining, reset_time = self.is_rate_limited(key, increment)
-        
-        return {
-            "X-RateLimit-Limit": str(self.limit),
-            "X-RateLimit-Remaining": str(remaining),
-            "X-RateLimit-Reset": str(reset_time),
-            "X-RateLimit-Limited": "1" if is_limited else "0"
-        }
-    
+        return self.headers_for(self.check(key, increment))
+
     def reset_rate_limit(self, key):
         """
         Reset rate limit for a key.
-        
+
         Args:
             key (str): Identifier for the client
-        
+
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Get the current timestamp
-            current_time = int(time.time())
-            
-            # Create a key with the current window
-            window_start = current_time - (current_time % self.window)
-            window_key = f"rate_limit:{key}:{window_start}"
-            
-            # Delete the key
-            return bool(self.redis_client.delete(window_key))
+            return bool(self.redis_client.delete(*self._keys(key)))
         except Exception as e:
             print(f"Error resetting rate limit: {e}")
             return False
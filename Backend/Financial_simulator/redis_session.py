@@ -3,11 +3,13 @@ Redis session management for the Financial Crew application.
 """
 
 import os
-import json
-import redis
+import sys
 from datetime import timedelta
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from redis_connection import get_redis_connection
+
 # Load environment variables
 load_dotenv()
 
@@ -15,13 +17,10 @@ class RedisSession:
     """Redis session management for storing user session data."""
     
     def __init__(self):
-        """Initialize Redis connection using environment variables."""
-        self.redis_client = redis.Redis(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True  # Automatically decode responses to strings
-        )
+        """Initialize the session store on the shared Redis connection."""
+        connection = get_redis_connection()
+        self.redis_client = connection.sync
+        self.store = connection.store("session")
         self.default_expiry = timedelta(hours=24)  # Default session expiry time
     
     def set_session(self, session_id, data, expiry=None):
@@ -37,14 +36,11 @@ class RedisSession:
             bool: True if successful, False otherwise
         """
         try:
-            # Convert data to JSON string
-            json_data = json.dumps(data)
-            
             # Set expiry time (in seconds)
             ex_seconds = int(expiry.total_seconds()) if expiry else int(self.default_expiry.total_seconds())
             
             # Store in Redis
-            return self.redis_client.setex(f"session:{session_id}", ex_seconds, json_data)
+            return self.store.set(session_id, data, ex=ex_seconds)
         except Exception as e:
             print(f"Error setting session data: {e}")
             return False
@@ -60,10 +56,7 @@ class RedisSession:
             dict: Session data or None if not found
         """
         try:
-            data = self.redis_client.get(f"session:{session_id}")
-            if data:
-                return json.loads(data)
-            return None
+            return self.store.get(session_id)
         except Exception as e:
             print(f"Error getting session data: {e}")
             return None
@@ -79,7 +72,7 @@ class RedisSession:
             bool: True if successful, False otherwise
         """
         try:
-            return bool(self.redis_client.delete(f"session:{session_id}"))
+            return bool(self.store.delete(session_id))
         except Exception as e:
             print(f"Error deleting session: {e}")
             return False
@@ -96,13 +89,9 @@ class RedisSession:
             bool: True if successful, False otherwise
         """
         try:
-            # Get current session data
-            data = self.get_session(session_id)
-            if not data:
-                return False
-            
-            # Set with new expiry
-            return self.set_session(session_id, data, expiry)
+            # EXPIRE updates the TTL in place, without reading and rewriting the data
+            ex_seconds = int(expiry.total_seconds()) if expiry else int(self.default_expiry.total_seconds())
+            return bool(self.redis_client.expire(self.store.key(session_id), ex_seconds))
         except Exception as e:
             print(f"Error updating session expiry: {e}")
             return False
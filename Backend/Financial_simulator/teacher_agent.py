@@ -20,7 +20,7 @@ from langchain_core.documents import Document
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from langchain.globals import set_debug
-from langchain_community.document_loaders import PyPDFLoader
+from utils.pdf_stream import iter_pdf_documents
 # Try to import the updated MongoDB Atlas Vector Search
 try:
     from langchain_mongodb import MongoDBAtlasVectorSearch
@@ -103,16 +103,16 @@ class TeacherAgentState(TypedDict):
 def process_pdf(pdf_path: str) -> List[Document]:
     """Process a PDF file and return a list of documents."""
     try:
-        # Load PDF
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
-
-        # Split documents
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
-        split_docs = text_splitter.split_documents(documents)
+
+        # Stream pages and split each one as it arrives instead of loading
+        # the whole document up front
+        split_docs = []
+        for page_document in iter_pdf_documents(pdf_path):
+            split_docs.extend(text_splitter.split_documents([page_document]))
 
         return split_docs
     except Exception as e:
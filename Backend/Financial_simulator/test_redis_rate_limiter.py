@@ -0,0 +1,114 @@
+"""
+Tests for the Redis rate limiter
+
+Runs against fakeredis (which executes the Lua script with lupa) or, when
+REDIS_TEST_URL is set, a real server such as redis://localhost:6379/15.
+"""
+
+import os
+import time
+import threading
+import uuid
+
+import pytest
+import redis
+
+from redis_rate_limiter import RedisRateLimiter, RateLimitPolicy
+
+
+@pytest.fixture
+def redis_client():
+    url = os.getenv("REDIS_TEST_URL")
+    if url:
+        client = redis.Redis.from_url(url, decode_responses=True)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    yield client
+    client.close()
+
+
+def make_limiter(client, **kwargs):
+    limiter = RedisRateLimiter(redis_client=client, **kwargs)
+    return limiter, f"test-{uuid.uuid4().hex}"
+
+
+class TestRedisRateLimiter:
+
+    def test_admits_up_to_limit(self, redis_client):
+        """A burst of limit requests is admitted and the next is refused"""
+        limiter, key = make_limiter(redis_client, limit=5, window=60)
+        results = [limiter.check(key) for _ in range(6)]
+
+        assert [r.limited for r in results] == [False] * 5 + [True]
+        assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+        assert results[-1].retry_after >= 1
+        assert "Retry-After" in limiter.headers_for(results[-1])
+
+    def test_peek_does_not_consume(self, redis_client):
+        limiter, key = make_limiter(redis_client, limit=2, window=60)
+        for _ in range(5):
+            assert not limiter.check(key, increment=False).limited
+        assert limiter.check(key).remaining == 1
+
+    def test_refused_requests_are_not_recorded(self, redis_client):
+        """Hammering while limited does not push the retry time further out"""
+        limiter, key = make_limiter(redis_client, limit=10, window=1)
+        for _ in range(10):
+            limiter.check(key)
+        for _ in range(50):
+            assert limiter.check(key).limited
+        time.sleep(0.25)
+        assert not limiter.check(key).limited
+
+    def test_no_double_burst_at_window_edge(self, redis_client):
+        """Half a window after a full burst only about half the limit is free again"""
+        limiter, key = make_limiter(redis_client, limit=20, window=2)
+        assert sum(not limiter.check(key).limited for _ in range(40)) == 20
+        time.sleep(1)
+        admitted = sum(not limiter.check(key).limited for _ in range(40))
+        assert 9 <= admitted <= 11
+
+    def test_multiple_policies(self, redis_client):
+        """The tightest policy decides, and a refusal is charged to no policy"""
+        limiter, key = make_limiter(
+            redis_client,
+            policies=[RateLimitPolicy(3, 1), RateLimitPolicy(5, 3600)]
+        )
+        assert sum(not limiter.check(key).limited for _ in range(10)) == 3
+        time.sleep(1.05)
+        results = [limiter.check(key) for _ in range(5)]
+        assert sum(not r.limited for r in results) == 2
+        # The hourly policy is the one now refusing, with a long wait
+        assert results[-1].limit == 5 and results[-1].retry_after > 60
+
+    def test_reset(self, redis_client):
+        limiter, key = make_limiter(redis_client, limit=1, window=60)
+        limiter.check(key)
+        assert limiter.check(key).limited
+        assert limiter.reset_rate_limit(key)
+        assert not limiter.check(key).limited
+
+    def test_no_over_admission_under_concurrency(self, redis_client):
+        """Many threads racing on one key never get more than the limit through"""
+        limit, threads, per_thread = 50, 16, 25
+        limiter, key = make_limiter(redis_client, limit=limit, window=3600)
+        admitted = []
+        start = threading.Barrier(threads)
+
+        def worker():
+            count = 0
+            start.wait()
+            for _ in range(per_thread):
+                if not limiter.check(key).limited:
+                    count += 1
+            admitted.append(count)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        assert sum(admitted) == limit
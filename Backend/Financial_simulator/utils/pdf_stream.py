@@ -0,0 +1,89 @@
+"""
+Streaming PDF page extraction for the teacher agent.
+Pages are yielded lazily as LangChain documents; large PDFs are extracted
+across a process pool in page ranges so parse time scales with cores.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+# PDFs with at least this many pages are parsed in worker processes
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "64"))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+MAX_PDF_WORKERS = int(os.getenv("PDF_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of pages [start, stop). Runs inside a worker process.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start: First page index (inclusive)
+        stop: Last page index (exclusive)
+
+    Returns:
+        List of page texts in page order
+    """
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_documents(
+    pdf_path: str,
+    max_workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+    parallel_threshold: int = PARALLEL_PAGE_THRESHOLD,
+) -> Iterator[Document]:
+    """
+    Yield one Document per PDF page, in page order.
+
+    The metadata matches PyPDFLoader ({"source": path, "page": index}) so the
+    documents can be passed to the same text splitters.
+
+    Args:
+        pdf_path: Path to the PDF file
+        max_workers: Worker processes for large PDFs (defaults to PDF_MAX_WORKERS)
+        pages_per_task: Number of pages extracted per worker task
+        parallel_threshold: Minimum page count before the process pool is used
+
+    Yields:
+        Document for each page
+    """
+    page_count = len(PdfReader(pdf_path).pages)
+    workers = max_workers or MAX_PDF_WORKERS
+
+    if page_count < parallel_threshold or workers <= 1:
+        reader = PdfReader(pdf_path)
+        for page_num in range(page_count):
+            text = reader.pages[page_num].extract_text() or ""
+            yield Document(page_content=text, metadata={"source": pdf_path, "page": page_num})
+        return
+
+    ranges = deque(
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded window of ranges in flight so memory stays flat
+        in_flight = deque()
+        while ranges and len(in_flight) < workers * 2:
+            start, stop = ranges.popleft()
+            in_flight.append((start, executor.submit(_extract_page_range, pdf_path, start, stop)))
+
+        while in_flight:
+            start, future = in_flight.popleft()
+            texts = future.result()
+            if ranges:
+                next_start, next_stop = ranges.popleft()
+                in_flight.append(
+                    (next_start, executor.submit(_extract_page_range, pdf_path, next_start, next_stop))
+                )
+            for offset, text in enumerate(texts):
+                yield Document(page_content=text, metadata={"source": pdf_path, "page": start + offset})
@@ -0,0 +1,217 @@
+"""
+Content-Addressed Audio Cache for Gurukul Platform
+==================================================
+
+Synthesised speech is stored under a hash of everything that affects the
+audio (text, engine, voice, rate), so identical requests from the TTS
+service, the Base_backend RAG pipeline and the chatbot reuse one file on
+disk instead of synthesising again. The directory is capped in size and the
+least recently used files are evicted first.
+
+Usage:
+    from audio_cache import AudioCache
+    cache = AudioCache("tts_outputs", max_bytes=256 * 1024 * 1024)
+
+    key = cache.make_key(text, engine="gtts", voice="en", rate="normal")
+    path, hit = cache.get_or_create(key, lambda tmp_path: gTTS(text).save(tmp_path))
+"""
+
+import os
+import re
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class AudioCache:
+    """
+    Size-bounded, content-addressed store of audio files.
+
+    The file name is the cache key, so a directory shared by several worker
+    processes never holds the same audio twice. Recency is tracked in memory
+    and mirrored to file mtimes, so the LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, extension: str = ".mp3"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._async_key_locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_existing()
+
+    @staticmethod
+    def make_key(text: str, engine: str, voice: str = "", rate="") -> str:
+        """Hash of every input that changes the synthesised audio"""
+        payload = json.dumps([text, engine, voice, str(rate)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def filename(self, key: str) -> str:
+        return f"{key}{self.extension}"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, self.filename(key))
+
+    def _load_existing(self):
+        """Index files left by earlier runs, oldest first"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            stem, ext = os.path.splitext(name)
+            if ext != self.extension or not _KEY_PATTERN.match(stem):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            found.append((stat.st_mtime, stem, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _touch(self, key: str):
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self.path_for(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file path for a key, or None on a miss"""
+        path = self.path_for(key)
+        with self._lock:
+            if key in self._entries:
+                if os.path.exists(path):
+                    self._touch(key)
+                    return path
+                # Removed behind our back (another worker evicted it)
+                self._total_bytes -= self._entries.pop(key)
+                return None
+
+            # Another process may have produced it since we indexed the directory
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+                self._entries[key] = size
+                self._total_bytes += size
+                self._touch(key)
+                self._evict()
+                return path
+        return None
+
+    def put_file(self, key: str, source_path: str) -> str:
+        """Atomically move a finished file into the cache"""
+        path = self.path_for(key)
+        os.replace(source_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key]
+            self._entries[key] = size
+            self._total_bytes += size
+            self._entries.move_to_end(key)
+            self._evict()
+        return path
+
+    def get_or_create(self, key: str, synthesize: Callable[[str], None]) -> Tuple[str, bool]:
+        """
+        Return (path, hit). On a miss, synthesize(tmp_path) must write the
+        audio to tmp_path; the result is then renamed into the cache. Only
+        one thread synthesises a given key at a time.
+        """
+        path = self.get(key)
+        if path:
+            self.stats["hits"] += 1
+            return path, True
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                path = self.get(key)
+                if path:
+                    self.stats["hits"] += 1
+                    return path, True
+
+                self.stats["misses"] += 1
+                tmp_path = self._temp_path(key)
+                try:
+                    synthesize(tmp_path)
+                    return self._store_temp(key, tmp_path), False
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    async def get_or_create_async(self, key: str, synthesize: Callable[[str], Awaitable[None]]) -> Tuple[str, bool]:
+        """Same as get_or_create for an async synthesize(tmp_path) coroutine"""
+        path = self.get(key)
+        if path:
+            self.stats["hits"] += 1
+            return path, True
+
+        key_lock = self._async_key_locks.setdefault(key, asyncio.Lock())
+        async with key_lock:
+            try:
+                path = self.get(key)
+                if path:
+                    self.stats["hits"] += 1
+                    return path, True
+
+                self.stats["misses"] += 1
+                tmp_path = self._temp_path(key)
+                try:
+                    await synthesize(tmp_path)
+                    return self._store_temp(key, tmp_path), False
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            finally:
+                self._async_key_locks.pop(key, None)
+
+    def _temp_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{uuid.uuid4().hex}.partial{self.extension}")
+
+    def _store_temp(self, key: str, tmp_path: str) -> str:
+        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            raise RuntimeError("Audio generation produced no data")
+        return self.put_file(key, tmp_path)
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
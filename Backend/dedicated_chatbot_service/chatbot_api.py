@@ -7,6 +7,8 @@ import os
 import sys
 import shutil
 import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import List, Optional
 from fastapi import FastAPI, HTTPException, File, UploadFile
@@ -24,24 +26,45 @@ from llm_service import LLMService
 
 # Define streaming TTS function (always available)
 def text_to_speech_stream(text):
-    """Generate TTS audio and return as bytes stream"""
+    """Generate TTS audio and return as bytes, reusing cached audio for repeated text"""
     try:
         from gtts import gTTS
-        import io
 
-        # Generate TTS audio in memory
-        tts = gTTS(text=text, lang="en")
+        # Cached in this service's own TEMP_DIR (not shared with rag.py); same key as generate_tts_stream
+        cache_key = AudioCache.make_key(text, engine="gtts", voice="en", rate="normal")
 
-        # Create in-memory buffer
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
+        def synthesize(tmp_path):
+            tts = gTTS(text=text, lang="en")
+            tts.save(tmp_path)
 
-        return audio_buffer.getvalue()
+        audio_path, _ = audio_cache.get_or_create(cache_key, synthesize)
+        with open(audio_path, "rb") as audio_file:
+            return audio_file.read()
     except Exception as e:
         print(f"TTS Streaming Error: {e}")
         return None
 
+def synthesize_mp3_bytes(text):
+    """Synthesise one chunk of text with gTTS and return the MP3 bytes"""
+    from gtts import gTTS
+    import io
+
+    audio_buffer = io.BytesIO()
+    gTTS(text=text, lang="en").write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+async def iter_bytes(data, chunk_size=64 * 1024):
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+async def iter_file_chunks(path, chunk_size=64 * 1024):
+    with open(path, "rb") as audio_file:
+        while True:
+            data = await asyncio.to_thread(audio_file.read, chunk_size)
+            if not data:
+                break
+            yield data
+
 # Import PDF and image processing functions
 try:
     from rag import parse_pdf, build_qa_agent, extract_text_easyocr, text_to_speech
@@ -92,6 +115,14 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.join(current_dir, '..'))
 from shared_config import load_shared_config
+from audio_cache import AudioCache
+from tts_streaming import (
+    TimeToFirstAudioMetrics,
+    iter_synthesized_chunks,
+    prefetch_first_chunk,
+    record_time_to_first_audio,
+    split_sentences
+)
 
 # Load centralized configuration
 load_shared_config("dedicated_chatbot_service")
@@ -124,6 +155,14 @@ llm_service = LLMService()
 TEMP_DIR = os.path.join(os.path.dirname(__file__), "temp")
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# Size-capped, content-addressed cache for synthesised speech
+audio_cache = AudioCache(TEMP_DIR)
+
+# gTTS calls are network-bound, so sentence chunks run in a small thread pool
+TTS_STREAM_WORKERS = int(os.getenv("TTS_STREAM_WORKERS", "3"))
+tts_stream_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix="tts-stream")
+tts_stream_metrics = TimeToFirstAudioMetrics()
+
 # Global variables for storing latest processing results
 pdf_response = None
 image_response = None
@@ -464,37 +503,63 @@ async def summarize_image():
 # Streaming TTS Endpoint (New)
 @app.post("/tts/stream")
 async def generate_tts_stream(request: dict):
-    """Generate TTS audio and stream directly without saving to disk"""
-    try:
-        text = request.get("text", "").strip()
-        if not text:
-            raise HTTPException(status_code=400, detail="Text is required")
+    """
+    Generate TTS audio and stream it without saving to disk.
 
-        # Generate audio stream
-        audio_data = text_to_speech_stream(text)
+    Text that was spoken before is streamed straight from the audio cache.
+    Otherwise it is split into sentences that are synthesised in a small
+    worker pool and streamed in order as each one is ready. Send
+    "chunked": false to render the whole text before responding.
+    """
+    text = request.get("text", "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required")
 
-        if not audio_data:
-            raise HTTPException(status_code=500, detail="Failed to generate audio stream")
+    started_at = time.perf_counter()
+    cache_key = AudioCache.make_key(text, engine="gtts", voice="en", rate="normal")
+    cached_path = audio_cache.get(cache_key)
 
-        # Create streaming response
-        def generate_audio():
-            yield audio_data
+    try:
+        if cached_path:
+            audio = iter_file_chunks(cached_path)
+        elif request.get("chunked", True):
+            audio = iter_synthesized_chunks(
+                split_sentences(text), synthesize_mp3_bytes, tts_stream_executor, window=TTS_STREAM_WORKERS
+            )
+        else:
+            audio_data = await asyncio.to_thread(text_to_speech_stream, text)
+            if not audio_data:
+                raise HTTPException(status_code=500, detail="Failed to generate audio stream")
+            audio = iter_bytes(audio_data)
 
-        return StreamingResponse(
-            generate_audio(),
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline; filename=tts_audio.mp3",
-                "Cache-Control": "no-cache",
-                "X-Text-Length": str(len(text)),
-                "X-Timestamp": datetime.now(timezone.utc).isoformat()
-            }
-        )
+        # Surface a failure on the first chunk as an error status
+        audio = await prefetch_first_chunk(audio)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"TTS streaming error: {e}")
         raise HTTPException(status_code=500, detail=f"TTS streaming failed: {str(e)}")
 
+    return StreamingResponse(
+        record_time_to_first_audio(audio, tts_stream_metrics, started_at),
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "inline; filename=tts_audio.mp3",
+            "Cache-Control": "no-cache",
+            "X-Text-Length": str(len(text)),
+            "X-Timestamp": datetime.now(timezone.utc).isoformat()
+        }
+    )
+
+@app.get("/tts/metrics")
+async def tts_stream_metrics_endpoint():
+    """Time-to-first-audio and cache metrics for TTS streaming"""
+    return {
+        "streaming": tts_stream_metrics.summary(),
+        "audio_cache": audio_cache.info()
+    }
+
 # TTS Endpoint (Legacy - for backward compatibility)
 @app.post("/tts")
 async def generate_tts(request: dict):
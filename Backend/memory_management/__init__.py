@@ -40,7 +40,9 @@ from .models import (
     PersonaMemorySummary,
     MemorySearchResponse,
     ContentType,
-    ImportanceLevel
+    ImportanceLevel,
+    CountMode,
+    SearchMode
 )
 
 from .database import get_memory_database, MemoryDatabase
@@ -59,6 +61,8 @@ __all__ = [
     "MemorySearchResponse",
     "ContentType",
     "ImportanceLevel",
+    "CountMode",
+    "SearchMode",
     
     # Database
     "get_memory_database",
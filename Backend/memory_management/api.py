@@ -5,6 +5,7 @@ This module implements the FastAPI endpoints for memory storage and retrieval
 with comprehensive error handling, validation, and security measures.
 """
 
+import asyncio
 import logging
 import time
 from datetime import datetime
@@ -23,9 +24,10 @@ from .models import (
     MemoryChunkResponse, InteractionResponse, MemoryListResponse,
     InteractionListResponse, PersonaMemorySummary, MemorySearchResponse,
     ErrorResponse, SuccessResponse, MemoryCreateResponse, InteractionCreateResponse,
-    ContentType, ImportanceLevel
+    ContentType, ImportanceLevel, CountMode, SearchMode
 )
 from .database import get_memory_database, MemoryDatabase
+from .pagination import InvalidCursor
 from .auth import verify_api_key, get_current_user
 from .utils import format_memory_response, format_interaction_response, paginate_results
 
@@ -66,6 +68,28 @@ security = HTTPBearer()
 db: MemoryDatabase = get_memory_database()
 
 
+@app.on_event("startup")
+async def start_persona_stats_reconciler():
+    """Periodically repair drift in the incremental persona counters."""
+    db.stats_reconciler.start()
+
+
+@app.on_event("shutdown")
+async def stop_persona_stats_reconciler():
+    db.stats_reconciler.stop()
+
+
+@app.on_event("startup")
+async def start_embedding_worker():
+    """Embed new and edited memories in the background for semantic search."""
+    db.semantic_index.start()
+
+
+@app.on_event("shutdown")
+async def stop_embedding_worker():
+    db.semantic_index.stop()
+
+
 @app.middleware("http")
 async def add_request_id_middleware(request, call_next):
     """Add unique request ID for tracking."""
@@ -133,7 +157,8 @@ async def health_check():
         return {
             "status": "healthy",
             "timestamp": datetime.utcnow().isoformat(),
-            "database": "connected"
+            "database": "connected",
+            "semantic_search": db.semantic_index.stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -249,7 +274,9 @@ async def create_interaction(
 async def get_memories(
     persona: Optional[str] = Query(None, description="Persona ID to filter by"),
     limit: int = Query(50, ge=1, le=500, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    offset: int = Query(0, ge=0, description="Number of results to skip (ignored when cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: CountMode = Query(CountMode.ESTIMATED, description="How to compute total_count for memories"),
     user_id: Optional[str] = Query(None, description="User ID to filter by"),
     content_type: Optional[List[ContentType]] = Query(None, description="Content types to filter by"),
     min_importance: Optional[ImportanceLevel] = Query(None, description="Minimum importance level"),
@@ -263,19 +290,26 @@ async def get_memories(
     - Returns memories for the specified persona
     - Supports filtering by content type and importance
     - Results ordered by importance and timestamp
+    - total_count is estimated from the persona counters by default;
+      count=exact runs a (briefly cached) count, count=none skips it
     
     **For Recent Interactions (recent_interactions=true):**
     - Returns recent interactions for chain-of-thought processing
     - Results ordered chronologically (oldest first)
     - Supports user and persona filtering
+    - next_cursor pages back to older interactions
+    
+    Pass next_cursor back as cursor to fetch the following page; cursor
+    pages cost the same however deep they are, unlike offset.
     """
     try:
         if recent_interactions:
             # Retrieve recent interactions
-            interactions_data = db.get_recent_interactions(
+            interactions_data, next_cursor = db.get_recent_interactions(
                 limit=limit,
                 user_id=user_id,
-                persona_id=persona
+                persona_id=persona,
+                cursor=cursor
             )
             
             interactions = [format_interaction_response(data) for data in interactions_data]
@@ -285,34 +319,34 @@ async def get_memories(
                 total_count=len(interactions),
                 page=1,
                 page_size=limit,
-                has_next=False,
-                has_previous=False
+                has_next=next_cursor is not None,
+                has_previous=cursor is not None,
+                next_cursor=next_cursor
             )
         
         elif persona:
             # Retrieve memories by persona
-            memories_data, total_count = db.get_memories_by_persona(
+            memories_data, total_count, next_cursor = db.get_memories_by_persona(
                 persona_id=persona,
                 user_id=user_id,
                 limit=limit,
                 offset=offset,
                 content_types=content_type,
-                min_importance=min_importance
+                min_importance=min_importance,
+                cursor=cursor,
+                count_mode=count
             )
             
             memories = [format_memory_response(data) for data in memories_data]
             
-            page = (offset // limit) + 1
-            has_next = offset + limit < total_count
-            has_previous = offset > 0
-            
             return MemoryListResponse(
                 memories=memories,
                 total_count=total_count,
-                page=page,
+                page=None if cursor else (offset // limit) + 1,
                 page_size=limit,
-                has_next=has_next,
-                has_previous=has_previous
+                has_next=next_cursor is not None,
+                has_previous=cursor is not None or offset > 0,
+                next_cursor=next_cursor
             )
         
         else:
@@ -321,6 +355,8 @@ async def get_memories(
                 detail="Either 'persona' parameter or 'recent_interactions=true' must be specified"
             )
             
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except PyMongoError as e:
         logger.error(f"Database error retrieving memories: {e}")
         raise HTTPException(
@@ -415,18 +451,23 @@ async def search_memories(
     user_id: Optional[str] = Query(None, description="User ID filter"),
     content_type: Optional[List[ContentType]] = Query(None, description="Content type filter"),
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
+    mode: SearchMode = Query(SearchMode.HYBRID, description="Ranking: text relevance only, or hybrid with semantic similarity"),
     current_user: str = Depends(get_current_user)
 ):
     """Search memories using text query."""
     try:
         start_time = time.time()
 
-        results_data = db.search_memories(
+        # Off the event loop: hybrid ranking embeds the query and may load a
+        # persona's vector index
+        results_data = await asyncio.to_thread(
+            db.search_memories,
             query=query,
             persona_id=persona_id,
             user_id=user_id,
             content_types=content_type,
-            limit=limit
+            limit=limit,
+            mode=mode
         )
 
         search_time = time.time() - start_time
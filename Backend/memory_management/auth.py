@@ -6,6 +6,7 @@ for secure access to memory management endpoints.
 """
 
 import os
+import math
 import time
 import hashlib
 import logging
@@ -16,6 +17,8 @@ from collections import defaultdict, deque
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from .rate_limit import RateLimitDecision, RateLimitPolicy, SlidingWindowRateLimiter
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -48,11 +51,29 @@ security = HTTPBearer()
 
 # Rate limiting storage
 class RateLimiter:
-    """Simple in-memory rate limiter."""
+    """In-memory rate limiter: an hourly and a one-minute burst limit per API key."""
     
     def __init__(self):
-        self.requests: Dict[str, deque] = defaultdict(deque)
-        self.burst_requests: Dict[str, deque] = defaultdict(deque)
+        self.limiter = SlidingWindowRateLimiter([
+            RateLimitPolicy("burst", RATE_LIMIT_BURST, 60),
+            RateLimitPolicy("hourly", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
+        ])
+    
+    def check(self, identifier: str) -> RateLimitDecision:
+        """
+        Record a request if the rate limits allow it.
+        
+        Args:
+            identifier: Unique identifier (API key hash)
+            
+        Returns:
+            RateLimitDecision: Whether it was allowed, and if not which limit
+            refused it and how long until it would be allowed
+        """
+        decision = self.limiter.hit(identifier)
+        if not decision.allowed:
+            logger.warning(f"{decision.policy.capitalize()} rate limit exceeded for {identifier}")
+        return decision
     
     def is_allowed(self, identifier: str) -> bool:
         """
@@ -64,62 +85,15 @@ class RateLimiter:
         Returns:
             bool: True if request is allowed
         """
-        now = time.time()
-        
-        # Clean old requests
-        self._cleanup_old_requests(identifier, now)
-        
-        # Check burst limit (last minute)
-        burst_window = now - 60  # 1 minute
-        burst_count = sum(1 for req_time in self.burst_requests[identifier] if req_time > burst_window)
-        
-        if burst_count >= RATE_LIMIT_BURST:
-            logger.warning(f"Burst rate limit exceeded for {identifier}")
-            return False
-        
-        # Check hourly limit
-        window_start = now - RATE_LIMIT_WINDOW
-        hourly_count = sum(1 for req_time in self.requests[identifier] if req_time > window_start)
-        
-        if hourly_count >= RATE_LIMIT_REQUESTS:
-            logger.warning(f"Hourly rate limit exceeded for {identifier}")
-            return False
-        
-        # Record this request
-        self.requests[identifier].append(now)
-        self.burst_requests[identifier].append(now)
-        
-        return True
-    
-    def _cleanup_old_requests(self, identifier: str, now: float):
-        """Remove old requests outside the rate limit window."""
-        # Clean hourly requests
-        window_start = now - RATE_LIMIT_WINDOW
-        while (self.requests[identifier] and 
-               self.requests[identifier][0] <= window_start):
-            self.requests[identifier].popleft()
-        
-        # Clean burst requests
-        burst_window = now - 60
-        while (self.burst_requests[identifier] and 
-               self.burst_requests[identifier][0] <= burst_window):
-            self.burst_requests[identifier].popleft()
+        return self.check(identifier).allowed
     
     def get_remaining_requests(self, identifier: str) -> Dict[str, int]:
         """Get remaining requests for an identifier."""
-        now = time.time()
-        self._cleanup_old_requests(identifier, now)
-        
-        window_start = now - RATE_LIMIT_WINDOW
-        hourly_count = sum(1 for req_time in self.requests[identifier] if req_time > window_start)
-        
-        burst_window = now - 60
-        burst_count = sum(1 for req_time in self.burst_requests[identifier] if req_time > burst_window)
-        
+        remaining = self.limiter.remaining(identifier)
         return {
-            "hourly_remaining": max(0, RATE_LIMIT_REQUESTS - hourly_count),
-            "burst_remaining": max(0, RATE_LIMIT_BURST - burst_count),
-            "reset_time": int(now + RATE_LIMIT_WINDOW)
+            "hourly_remaining": remaining["hourly"],
+            "burst_remaining": remaining["burst"],
+            "reset_time": int(time.time() + RATE_LIMIT_WINDOW)
         }
 
 
@@ -165,7 +139,8 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
     
     # Check rate limits
     key_hash = hash_api_key(api_key)
-    if not rate_limiter.is_allowed(key_hash):
+    decision = rate_limiter.check(key_hash)
+    if not decision.allowed:
         remaining = rate_limiter.get_remaining_requests(key_hash)
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -173,7 +148,7 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
             headers={
                 "X-RateLimit-Remaining": str(remaining["hourly_remaining"]),
                 "X-RateLimit-Reset": str(remaining["reset_time"]),
-                "Retry-After": "3600"
+                "Retry-After": str(math.ceil(decision.retry_after))
             }
         )
     
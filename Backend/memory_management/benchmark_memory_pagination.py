@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Memory listing pagination benchmark.
+
+Measures the latency of fetching one page of a persona's memories at
+increasing depths, comparing skip/limit offset paging with keyset paging
+from a continuation token. Where the server supports explain, the index keys
+and documents each page examined are reported as well; with keyset paging
+they stay at the page size whatever the depth.
+
+Memories are seeded into a throwaway database that is dropped afterwards.
+
+Usage:
+    python benchmark_memory_pagination.py --uri mongodb://localhost:27017/ --memories 200000 --depths 0 1000 10000 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from pymongo import MongoClient, ASCENDING
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pagination import MEMORY_SORT, encode_cursor, decode_cursor, keyset_filter
+
+PERSONA_ID = "benchmark_persona"
+USER_ID = "benchmark_user"
+
+
+def make_chunk(timestamp: datetime) -> dict:
+    return {
+        "memory_id": str(uuid4()),
+        "user_id": USER_ID,
+        "persona_id": PERSONA_ID,
+        "content": "benchmark memory " * 8,
+        "content_type": "text",
+        "metadata": {"tags": [], "importance": random.randint(1, 10), "topic": None},
+        "timestamp": timestamp,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+        "is_active": True
+    }
+
+
+def seed(collection, target: int, batch: int = 5000):
+    started = datetime.utcnow()
+    have = collection.count_documents({"persona_id": PERSONA_ID})
+    while have < target:
+        count = min(batch, target - have)
+        # Coarse timestamps so plenty of keys tie and the _id tie-breaker is exercised
+        collection.insert_many([make_chunk(started - timedelta(minutes=(have + i) // 4)) for i in range(count)],
+                               ordered=False)
+        have += count
+
+
+def explain_examined(db, query: dict, skip: int, limit: int):
+    """(keys, documents) examined by the page query, or None if explain isn't available."""
+    try:
+        command = {"find": "memory_chunks", "filter": query, "sort": dict(MEMORY_SORT), "limit": limit}
+        if skip:
+            command["skip"] = skip
+        stats = db.command("explain", command, verbosity="executionStats")["executionStats"]
+        return stats["totalKeysExamined"], stats["totalDocsExamined"]
+    except Exception:
+        return None
+
+
+def time_page(collection, query: dict, skip: int, limit: int, repeats: int) -> list:
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        find = collection.find(query).sort(MEMORY_SORT)
+        if skip:
+            find = find.skip(skip)
+        list(find.limit(limit + 1))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main(args):
+    client = MongoClient(args.uri)
+    db = client[args.db_name]
+    collection = db.memory_chunks
+    collection.create_index([("persona_id", ASCENDING), ("is_active", ASCENDING), *MEMORY_SORT],
+                            name="persona_active_importance_keyset")
+    query = {"persona_id": PERSONA_ID, "is_active": True}
+
+    try:
+        seed(collection, args.memories)
+        print(f"{'depth':>8} {'strategy':<8}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'keys':>9}{'docs':>9}")
+        for depth in args.depths:
+            if depth >= args.memories:
+                continue
+            keyset_query = query
+            if depth:
+                # Token for the page starting at depth, as the previous page would have returned it
+                previous = next(collection.find(query).sort(MEMORY_SORT).skip(depth - 1).limit(1))
+                token = encode_cursor(MEMORY_SORT, previous)
+                keyset_query = {"$and": [query, keyset_filter(MEMORY_SORT, decode_cursor(token, MEMORY_SORT))]}
+
+                first_offset = next(collection.find(query).sort(MEMORY_SORT).skip(depth).limit(1))
+                first_keyset = next(collection.find(keyset_query).sort(MEMORY_SORT).limit(1))
+                assert first_offset["_id"] == first_keyset["_id"], "keyset page diverged from offset page"
+
+            for name, page_query, skip in (("offset", query, depth), ("keyset", keyset_query, 0)):
+                latencies = time_page(collection, page_query, skip, args.limit, args.repeats)
+                p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+                examined = explain_examined(db, page_query, skip, args.limit + 1)
+                keys, docs = examined if examined else ("-", "-")
+                print(f"{depth:>8} {name:<8}{statistics.mean(latencies):>9.2f}"
+                      f"{statistics.median(latencies):>9.2f}{p95:>9.2f}{keys:>9}{docs:>9}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offset vs keyset page latency by depth")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL", "mongodb://localhost:27017/"))
+    parser.add_argument("--db-name", default="memory_pagination_benchmark")
+    parser.add_argument("--memories", type=int, default=200000, help="memories seeded for the persona")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 100000])
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    parser.add_argument("--repeats", type=int, default=20, help="timed fetches per depth and strategy")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database")
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Persona statistics write benchmark.
+
+Measures memory-chunk write latency (insert plus persona index maintenance) as
+a persona's memory grows, comparing the previous full re-aggregation of the
+persona's chunks with the incremental $inc/$max counters in persona_stats.
+
+Each strategy writes to its own persona, seeded to the same size, in a
+throwaway database that is dropped afterwards.
+
+Usage:
+    python benchmark_persona_stats.py --uri mongodb://localhost:27017/ --sizes 1000 10000 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime
+from uuid import uuid4
+
+from pymongo import MongoClient, ASCENDING, DESCENDING
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from persona_stats import PersonaStats
+
+CONTENT_TYPES = ("text", "interaction", "context", "reflection", "preference", "fact")
+USER_ID = "benchmark_user"
+
+
+def make_chunk(persona_id: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "memory_id": str(uuid4()),
+        "user_id": USER_ID,
+        "persona_id": persona_id,
+        "content": "benchmark memory " * 8,
+        "content_type": random.choice(CONTENT_TYPES),
+        "metadata": {"tags": [], "importance": random.randint(1, 10), "topic": None},
+        "timestamp": now,
+        "created_at": now,
+        "updated_at": now,
+        "is_active": True
+    }
+
+
+def legacy_update_persona_index(db, persona_id: str, user_id: str):
+    """The per-write re-aggregation that persona_stats replaced."""
+    content_counts = {}
+    for result in db.memory_chunks.aggregate([
+        {"$match": {"persona_id": persona_id, "user_id": user_id, "is_active": True}},
+        {"$group": {"_id": "$content_type", "count": {"$sum": 1}}}
+    ]):
+        content_counts[result["_id"]] = result["count"]
+
+    last_interaction = db.memory_interactions.find_one(
+        {"persona_id": persona_id, "user_id": user_id, "is_active": True},
+        sort=[("timestamp", DESCENDING)]
+    )
+    db.persona_memory_index.update_one(
+        {"persona_id": persona_id, "user_id": user_id},
+        {"$set": {
+            "total_memories": sum(content_counts.values()),
+            "memory_categories": content_counts,
+            "last_interaction": last_interaction["timestamp"] if last_interaction else None,
+            "updated_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+
+def seed(db, persona_id: str, target: int, batch: int = 5000):
+    """Grow the persona's memory to target chunks."""
+    have = db.memory_chunks.count_documents({"persona_id": persona_id})
+    while have < target:
+        count = min(batch, target - have)
+        db.memory_chunks.insert_many([make_chunk(persona_id) for _ in range(count)], ordered=False)
+        have += count
+
+
+def time_writes(db, persona_id: str, writes: int, index_update) -> list:
+    latencies = []
+    for _ in range(writes):
+        document = make_chunk(persona_id)
+        started = time.perf_counter()
+        db.memory_chunks.insert_one(document)
+        index_update(document)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main(args):
+    client = MongoClient(args.uri)
+    db = client[args.db_name]
+    db.memory_chunks.create_index([("user_id", ASCENDING), ("persona_id", ASCENDING), ("timestamp", DESCENDING)])
+    db.memory_chunks.create_index([("persona_id", ASCENDING), ("is_active", ASCENDING), ("timestamp", DESCENDING)])
+    db.memory_interactions.create_index([("user_id", ASCENDING), ("persona_id", ASCENDING), ("timestamp", DESCENDING)])
+    db.persona_memory_index.create_index([("persona_id", ASCENDING), ("user_id", ASCENDING)], unique=True)
+    stats = PersonaStats(db.persona_memory_index, db.memory_chunks, db.memory_interactions)
+
+    strategies = {
+        "aggregate": ("persona_legacy", lambda doc: legacy_update_persona_index(db, doc["persona_id"], doc["user_id"])),
+        "increment": ("persona_incremental", stats.memory_added),
+    }
+
+    try:
+        print(f"{'chunks':>8} {'strategy':<10}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        for size in args.sizes:
+            for name, (persona_id, index_update) in strategies.items():
+                seed(db, persona_id, size)
+                if name == "increment":
+                    # Seeded chunks bypassed the counters; bring them in line first
+                    stats.reconcile(persona_id=persona_id)
+                latencies = time_writes(db, persona_id, args.writes, index_update)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                print(f"{size:>8} {name:<10}{statistics.mean(latencies):>9.2f}"
+                      f"{statistics.median(latencies):>9.2f}{p95:>9.2f}")
+
+        started = time.perf_counter()
+        result = stats.reconcile(persona_id="persona_incremental")
+        print(f"reconcile after {args.writes * len(args.sizes)} incremental writes: "
+              f"{result} in {time.perf_counter() - started:.2f}s")
+    finally:
+        if not args.keep:
+            client.drop_database(args.db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persona index maintenance cost per memory write")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL", "mongodb://localhost:27017/"))
+    parser.add_argument("--db-name", default="memory_stats_benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--writes", type=int, default=200, help="timed writes per size and strategy")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database")
+    main(parser.parse_args())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Rate limiter micro-benchmark.
+
+Measures the per-check cost of the API key rate limiter with keys running at a
+steady request rate (10k requests/hour by default), comparing the previous
+deque-of-timestamps limiter, which re-counted the window on every check, with
+the bucketed sliding-window counters in rate_limit. Both see the same
+synthetic clock, so the windows fill as they would in an hour of traffic
+without having to wait for it. The windows are filled first, and the memory
+this retains per key is reported; then the checks are timed.
+
+Usage:
+    python benchmark_rate_limiter.py --rate 10000 --keys 1 100 --checks 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+from collections import defaultdict, deque
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limit import RateLimitPolicy, SlidingWindowRateLimiter
+
+
+class LegacyDequeLimiter:
+    """auth.RateLimiter before rate_limit replaced it, with the clock passed in."""
+
+    def __init__(self, limit: int, window: int, burst: int):
+        self.limit, self.window, self.burst = limit, window, burst
+        self.requests = defaultdict(deque)
+        self.burst_requests = defaultdict(deque)
+
+    def is_allowed(self, identifier: str, now: float) -> bool:
+        requests, burst_requests = self.requests[identifier], self.burst_requests[identifier]
+        while requests and requests[0] <= now - self.window:
+            requests.popleft()
+        while burst_requests and burst_requests[0] <= now - 60:
+            burst_requests.popleft()
+        if sum(1 for t in burst_requests if t > now - 60) >= self.burst:
+            return False
+        if sum(1 for t in requests if t > now - self.window) >= self.limit:
+            return False
+        requests.append(now)
+        burst_requests.append(now)
+        return True
+
+    def fill(self, identifier: str, now: float):
+        """Record a request without checking, to fill the window quickly."""
+        self.requests[identifier].append(now)
+        self.burst_requests[identifier].append(now)
+
+
+class SyntheticClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run(check, fill, clock: SyntheticClock, keys: int, rate: float, warmup: int, checks: int):
+    """Fill the windows at rate requests/hour per key, then time checks (ns each)."""
+    step = 3600.0 / rate / keys
+    names = [f"key{i}" for i in range(keys)]
+    tracemalloc.start()
+    for i in range(warmup):
+        clock.now += step
+        fill(names[i % keys])
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    timings = []
+    allowed = 0
+    for i in range(checks):
+        clock.now += step
+        name = names[i % keys]
+        started = time.perf_counter_ns()
+        allowed += bool(check(name))
+        timings.append(time.perf_counter_ns() - started)
+    return timings, allowed, retained
+
+
+def measure(label: str, make, args, keys: int):
+    clock = SyntheticClock()
+    limiter, check, fill = make(clock)
+    warmup = int(args.rate * keys * args.window / 3600)
+    timings, allowed, retained = run(check, fill, clock, keys, args.rate, warmup, args.checks)
+    timings.sort()
+    print(f"{label:<10}{keys:>6}{statistics.mean(timings):>11.0f}{timings[len(timings) // 2]:>10}"
+          f"{timings[int(len(timings) * 0.99)]:>10}{retained / keys / 1024:>12.1f}{allowed / args.checks:>10.2f}")
+    del limiter
+
+
+def main(args):
+    print(f"{args.rate:.0f} requests/hour per key, limit {args.limit}/{args.window}s, burst {args.burst}/60s")
+    print(f"{'limiter':<10}{'keys':>6}{'mean ns':>11}{'p50 ns':>10}{'p99 ns':>10}{'KiB/key':>12}{'allowed':>10}")
+    for keys in args.keys:
+        def legacy(clock):
+            limiter = LegacyDequeLimiter(args.limit, args.window, args.burst)
+            return limiter, lambda key: limiter.is_allowed(key, clock.now), lambda key: limiter.fill(key, clock.now)
+
+        def sliding(clock):
+            limiter = SlidingWindowRateLimiter([
+                RateLimitPolicy("burst", args.burst, 60),
+                RateLimitPolicy("hourly", args.limit, args.window)
+            ], clock=clock)
+            return limiter, lambda key: limiter.hit(key).allowed, limiter.hit
+
+        measure("deque", legacy, args, keys)
+        measure("sliding", sliding, args, keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-check cost of the API key rate limiter")
+    parser.add_argument("--rate", type=float, default=10000, help="requests per hour per key")
+    parser.add_argument("--limit", type=int, default=20000, help="hourly limit (above the rate, so checks pass)")
+    parser.add_argument("--window", type=int, default=3600)
+    parser.add_argument("--burst", type=int, default=1000)
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--checks", type=int, default=20000, help="timed checks per run")
+    main(parser.parse_args())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Semantic recall benchmark.
+
+Builds a PersonaVectorIndex over a synthetic corpus of memory embeddings and
+measures recall@k against exact search, plus per-query latency, for a range
+of HNSW efSearch values. Exact (flat) search latency is reported alongside
+as the baseline. The "pool" row is the way search_memories uses the index:
+it fetches MEMORY_SEARCH_CANDIDATES neighbours at the default efSearch and
+ranks them on exact similarity, so what matters is how much of the true top
+k lands in that pool.
+
+The corpus is clustered unit vectors, like sentence embeddings of memories
+about a limited set of topics; queries are perturbed copies of corpus
+vectors, standing in for paraphrases. No model or database is needed.
+
+Usage:
+    python benchmark_semantic_recall.py --chunks 1000000 --dim 384 --queries 500 --ef 32 64 128 256
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import semantic_index
+from semantic_index import PersonaVectorIndex
+
+
+def normalise(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_corpus(rng, chunks: int, dim: int, clusters: int, spread: float, batch: int = 100000) -> np.ndarray:
+    centres = normalise(rng.standard_normal((clusters, dim)).astype(np.float32))
+    corpus = np.empty((chunks, dim), dtype=np.float32)
+    for start in range(0, chunks, batch):
+        end = min(start + batch, chunks)
+        labels = rng.integers(0, clusters, end - start)
+        noise = rng.standard_normal((end - start, dim)).astype(np.float32) * spread / np.sqrt(dim)
+        corpus[start:end] = normalise(centres[labels] + noise)
+    return corpus
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, batch: int = 200000) -> np.ndarray:
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(corpus), batch):
+        scores = queries @ corpus[start:start + batch].T
+        top = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+        merged_scores = np.hstack([best_scores, np.take_along_axis(scores, top, axis=1)])
+        merged_ids = np.hstack([best_ids, top + start])
+        keep = np.argsort(-merged_scores, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+        best_ids = np.take_along_axis(merged_ids, keep, axis=1)
+    return best_ids
+
+
+def run_queries(index: PersonaVectorIndex, queries: np.ndarray, truth: list, k: int, fetch: int = 0, **search_kwargs):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        hits = index.search(query, fetch or k, **search_kwargs)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(expected & {memory_id for memory_id, _ in hits}) / k)
+    return latencies, recalls
+
+
+def report(label: str, build_seconds: float, latencies: list, recalls: list):
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{label:<14}{build_seconds:>9.1f}{statistics.mean(recalls):>11.4f}"
+          f"{statistics.median(latencies):>9.2f}{p95:>9.2f}{max(latencies):>9.2f}")
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    args.clusters = args.clusters or max(args.chunks // 500, 1)
+    print(f"corpus: {args.chunks} chunks x {args.dim} dims, {args.clusters} clusters, "
+          f"faiss={'yes' if semantic_index.FAISS_AVAILABLE else 'no (numpy exact search)'}")
+    corpus = make_corpus(rng, args.chunks, args.dim, args.clusters, args.spread)
+    memory_ids = [f"m{i}" for i in range(args.chunks)]
+    user_ids = ["benchmark_user"] * args.chunks
+
+    sources = rng.integers(0, args.chunks, args.queries)
+    noise = rng.standard_normal((args.queries, args.dim)).astype(np.float32) * args.query_noise / np.sqrt(args.dim)
+    queries = normalise(corpus[sources] + noise)
+    truth = [{memory_ids[i] for i in row} for row in exact_top_k(corpus, queries, args.k)]
+
+    print(f"{'index':<14}{'build s':>9}{f'recall@{args.k}':>11}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+
+    # build() is always exact; the HNSW row adds the upgrade the embedding worker runs
+    flat = PersonaVectorIndex("benchmark_persona")
+    started = time.perf_counter()
+    flat.build(memory_ids, user_ids, corpus)
+    build_seconds = time.perf_counter() - started
+    latencies, recalls = run_queries(flat, queries[:args.flat_queries], truth[:args.flat_queries], args.k)
+    report("exact", build_seconds, latencies, recalls)
+    del flat
+
+    if not semantic_index.FAISS_AVAILABLE:
+        return
+    semantic_index.MEMORY_ANN_MIN_VECTORS = 0
+    hnsw = PersonaVectorIndex("benchmark_persona")
+    started = time.perf_counter()
+    hnsw.build(memory_ids, user_ids, corpus)
+    hnsw.upgrade_to_ann()
+    build_seconds = time.perf_counter() - started
+    for ef in args.ef:
+        latencies, recalls = run_queries(hnsw, queries, truth, args.k, ef_search=ef)
+        report(f"hnsw ef={ef}", build_seconds, latencies, recalls)
+    pool = semantic_index.MEMORY_SEARCH_CANDIDATES
+    latencies, recalls = run_queries(hnsw, queries, truth, args.k, fetch=pool)
+    report(f"hnsw pool={pool}", build_seconds, latencies, recalls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k and latency of the per-persona semantic index")
+    parser.add_argument("--chunks", type=int, default=1000000, help="synthetic memory chunks in the persona")
+    parser.add_argument("--dim", type=int, default=384, help="embedding dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--clusters", type=int, default=0, help="topics the corpus is drawn around (default chunks/500)")
+    parser.add_argument("--spread", type=float, default=2.5, help="within-topic noise")
+    parser.add_argument("--query-noise", type=float, default=0.3, help="paraphrase noise added to queries")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--flat-queries", type=int, default=100, help="queries timed against exact search")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128, 256], help="HNSW efSearch values")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
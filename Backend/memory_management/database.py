@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from uuid import uuid4
 import pymongo
-from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT, ReturnDocument
 from pymongo.collection import Collection
 from pymongo.database import Database
 from pymongo.errors import DuplicateKeyError, PyMongoError
@@ -19,8 +19,13 @@ from pymongo.errors import DuplicateKeyError, PyMongoError
 from .models import (
     MemoryCreateRequest, InteractionCreateRequest, MemoryUpdateRequest,
     MemoryChunkResponse, InteractionResponse, PersonaMemorySummary,
-    ContentType, ImportanceLevel
+    ContentType, ImportanceLevel, CountMode, SearchMode
 )
+from .persona_stats import PersonaStats, PersonaStatsReconciler, STATS_PROJECTION
+from .pagination import (
+    MEMORY_SORT, INTERACTION_SORT, PageCountCache, encode_cursor, decode_cursor, keyset_filter
+)
+from .semantic_index import SemanticIndex, hybrid_score, MEMORY_SEARCH_CANDIDATES
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -35,6 +40,7 @@ MEMORY_RETENTION_DAYS = int(os.getenv("MEMORY_RETENTION_DAYS", "365"))
 MEMORY_CHUNKS_COLLECTION = "memory_chunks"
 MEMORY_INTERACTIONS_COLLECTION = "memory_interactions"
 PERSONA_MEMORY_INDEX_COLLECTION = "persona_memory_index"
+MEMORY_EMBEDDINGS_COLLECTION = "memory_embeddings"
 
 
 class MemoryDatabase:
@@ -47,8 +53,13 @@ class MemoryDatabase:
         self._memory_chunks: Optional[Collection] = None
         self._memory_interactions: Optional[Collection] = None
         self._persona_index: Optional[Collection] = None
+        self._embeddings: Optional[Collection] = None
         self._initialize_connection()
         self._ensure_indexes()
+        self.persona_stats = PersonaStats(self._persona_index, self._memory_chunks, self._memory_interactions)
+        self.stats_reconciler = PersonaStatsReconciler(self.persona_stats)
+        self.page_counts = PageCountCache()
+        self.semantic_index = SemanticIndex(self._memory_chunks, self._embeddings)
     
     def _initialize_connection(self):
         """Initialize MongoDB connection."""
@@ -64,6 +75,7 @@ class MemoryDatabase:
             self._memory_chunks = self._db[MEMORY_CHUNKS_COLLECTION]
             self._memory_interactions = self._db[MEMORY_INTERACTIONS_COLLECTION]
             self._persona_index = self._db[PERSONA_MEMORY_INDEX_COLLECTION]
+            self._embeddings = self._db[MEMORY_EMBEDDINGS_COLLECTION]
             
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
@@ -90,6 +102,20 @@ class MemoryDatabase:
                 ("metadata.importance", DESCENDING)
             ], name="content_type_importance")
             
+            # Keyset pagination: equality fields, then the full MEMORY_SORT key
+            self._memory_chunks.create_index([
+                ("persona_id", ASCENDING),
+                ("is_active", ASCENDING),
+                *MEMORY_SORT
+            ], name="persona_active_importance_keyset")
+            
+            self._memory_chunks.create_index([
+                ("persona_id", ASCENDING),
+                ("user_id", ASCENDING),
+                ("is_active", ASCENDING),
+                *MEMORY_SORT
+            ], name="persona_user_active_importance_keyset")
+            
             self._memory_chunks.create_index([
                 ("metadata.tags", ASCENDING)
             ], name="metadata_tags")
@@ -117,12 +143,44 @@ class MemoryDatabase:
                 ("timestamp", DESCENDING)
             ], name="persona_timestamp")
             
+            # Keyset pagination of recent interactions (INTERACTION_SORT)
+            self._memory_interactions.create_index([
+                ("is_active", ASCENDING),
+                *INTERACTION_SORT
+            ], name="active_timestamp_keyset")
+            
+            self._memory_interactions.create_index([
+                ("persona_id", ASCENDING),
+                ("is_active", ASCENDING),
+                *INTERACTION_SORT
+            ], name="persona_active_timestamp_keyset")
+            
+            self._memory_interactions.create_index([
+                ("user_id", ASCENDING),
+                ("is_active", ASCENDING),
+                *INTERACTION_SORT
+            ], name="user_active_timestamp_keyset")
+            
             # Persona index
             self._persona_index.create_index([
                 ("persona_id", ASCENDING),
                 ("user_id", ASCENDING)
             ], unique=True, name="persona_user_unique")
             
+            # Memory embeddings, loaded per persona and expiring with their chunks
+            self._embeddings.create_index([
+                ("memory_id", ASCENDING)
+            ], unique=True, name="memory_id_unique")
+            
+            self._embeddings.create_index([
+                ("persona_id", ASCENDING),
+                ("model", ASCENDING)
+            ], name="persona_model")
+            
+            self._embeddings.create_index([
+                ("created_at", ASCENDING)
+            ], expireAfterSeconds=MEMORY_RETENTION_DAYS * 24 * 3600, name="ttl_cleanup")
+            
             logger.info("Database indexes created successfully")
             
         except Exception as e:
@@ -171,7 +229,8 @@ class MemoryDatabase:
             logger.info(f"Created memory chunk: {memory_id} for persona: {request.persona_id}")
             
             # Update persona index
-            self._update_persona_index(request.persona_id, request.user_id)
+            self.persona_stats.memory_added(document)
+            self.semantic_index.enqueue(memory_id)
             
             return memory_id
             
@@ -225,7 +284,7 @@ class MemoryDatabase:
             logger.info(f"Created interaction: {interaction_id} for persona: {request.persona_id}")
             
             # Update persona index
-            self._update_persona_index(request.persona_id, request.user_id)
+            self.persona_stats.interaction_added(request.persona_id, request.user_id, request.timestamp)
             
             return interaction_id
             
@@ -240,11 +299,17 @@ class MemoryDatabase:
         limit: int = 50, 
         offset: int = 0,
         content_types: Optional[List[ContentType]] = None,
-        min_importance: Optional[ImportanceLevel] = None
-    ) -> Tuple[List[Dict[str, Any]], int]:
+        min_importance: Optional[ImportanceLevel] = None,
+        cursor: Optional[str] = None,
+        count_mode: CountMode = CountMode.ESTIMATED
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
         """
         Retrieve memories for a specific persona.
         
+        Pages are read by keyset when a cursor is given; offset is then ignored.
+        Offset paging is kept for existing clients and still returns a cursor
+        they can continue from.
+        
         Args:
             persona_id: Persona identifier
             user_id: Optional user filter
@@ -252,9 +317,11 @@ class MemoryDatabase:
             offset: Number of results to skip
             content_types: Filter by content types
             min_importance: Minimum importance level
+            cursor: Continuation token from a previous page
+            count_mode: How to compute the total count
             
         Returns:
-            Tuple of (memories list, total count)
+            Tuple of (memories list, total count or None, next page cursor or None)
         """
         query = {
             "persona_id": persona_id,
@@ -270,45 +337,110 @@ class MemoryDatabase:
         if min_importance:
             query["metadata.importance"] = {"$gte": min_importance.value}
         
+        page_query = query
+        if cursor:
+            page_query = {"$and": [query, keyset_filter(MEMORY_SORT, decode_cursor(cursor, MEMORY_SORT))]}
+            offset = 0
+        
         try:
-            # Get total count
-            total_count = self._memory_chunks.count_documents(query)
+            # One extra row tells whether another page follows
+            find = self._memory_chunks.find(page_query).sort(MEMORY_SORT)
+            if offset:
+                find = find.skip(offset)
+            memories = list(find.limit(limit + 1))
             
-            # Get paginated results
-            cursor = self._memory_chunks.find(query).sort([
-                ("metadata.importance", DESCENDING),
-                ("timestamp", DESCENDING)
-            ]).skip(offset).limit(limit)
-            
-            memories = list(cursor)
+            next_cursor = None
+            if len(memories) > limit:
+                memories = memories[:limit]
+                next_cursor = encode_cursor(MEMORY_SORT, memories[-1])
             
             # Convert ObjectId to string
             for memory in memories:
                 memory["_id"] = str(memory["_id"])
             
+            total_count = self._count_memories(query, persona_id, user_id, content_types, min_importance, count_mode)
+            
             logger.info(f"Retrieved {len(memories)} memories for persona: {persona_id}")
-            return memories, total_count
+            return memories, total_count, next_cursor
             
         except PyMongoError as e:
             logger.error(f"Failed to retrieve memories for persona {persona_id}: {e}")
             raise
     
+    def _count_memories(
+        self,
+        query: Dict[str, Any],
+        persona_id: str,
+        user_id: Optional[str],
+        content_types: Optional[List[ContentType]],
+        min_importance: Optional[ImportanceLevel],
+        count_mode: CountMode
+    ) -> Optional[int]:
+        """Total for a persona memory listing according to count_mode."""
+        if count_mode == CountMode.NONE:
+            return None
+        if count_mode == CountMode.ESTIMATED:
+            estimate = self._estimate_memory_count(persona_id, user_id, content_types, min_importance)
+            if estimate is not None:
+                return estimate
+        return self.page_counts.count(self._memory_chunks, query)
+    
+    def _estimate_memory_count(
+        self,
+        persona_id: str,
+        user_id: Optional[str],
+        content_types: Optional[List[ContentType]],
+        min_importance: Optional[ImportanceLevel]
+    ) -> Optional[int]:
+        """
+        Memory count read from the persona statistics counters, or None when
+        they can't answer the filter (both filters set, or index documents
+        written before the importance counters existed).
+        """
+        if content_types and min_importance:
+            return None
+        
+        query = {"persona_id": persona_id}
+        if user_id:
+            query["user_id"] = user_id
+        
+        total = 0
+        for stats in self._persona_index.find(query, {"_id": 0, "total_memories": 1,
+                                                      "memory_categories": 1, "importance_distribution": 1}):
+            if content_types:
+                categories = stats.get("memory_categories", {})
+                total += sum(categories.get(ct.value, 0) for ct in content_types)
+            elif min_importance:
+                if "importance_distribution" not in stats:
+                    return None
+                total += sum(count for importance, count in stats["importance_distribution"].items()
+                             if importance.isdigit() and int(importance) >= min_importance.value)
+            else:
+                total += stats.get("total_memories", 0)
+        # Counters may briefly go negative while a write races a reconciliation
+        return max(total, 0)
+    
     def get_recent_interactions(
         self, 
         limit: int = 20, 
         user_id: Optional[str] = None,
-        persona_id: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+        persona_id: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
         Retrieve recent interactions for chain-of-thought processing.
         
+        Pages run backwards in time: the returned cursor fetches the
+        interactions just older than this page.
+        
         Args:
             limit: Maximum number of interactions
             user_id: Optional user filter
             persona_id: Optional persona filter
+            cursor: Continuation token from a previous page
             
         Returns:
-            List of recent interactions
+            Tuple of (interactions in chronological order, cursor for older interactions or None)
         """
         query = {"is_active": True}
         
@@ -318,12 +450,16 @@ class MemoryDatabase:
         if persona_id:
             query["persona_id"] = persona_id
         
+        if cursor:
+            query = {"$and": [query, keyset_filter(INTERACTION_SORT, decode_cursor(cursor, INTERACTION_SORT))]}
+        
         try:
-            cursor = self._memory_interactions.find(query).sort([
-                ("timestamp", DESCENDING)
-            ]).limit(limit)
+            interactions = list(self._memory_interactions.find(query).sort(INTERACTION_SORT).limit(limit + 1))
             
-            interactions = list(cursor)
+            next_cursor = None
+            if len(interactions) > limit:
+                interactions = interactions[:limit]
+                next_cursor = encode_cursor(INTERACTION_SORT, interactions[-1])
             
             # Convert ObjectId to string and reverse for chronological order
             for interaction in interactions:
@@ -332,7 +468,7 @@ class MemoryDatabase:
             interactions.reverse()  # Most recent last for chain-of-thought
             
             logger.info(f"Retrieved {len(interactions)} recent interactions")
-            return interactions
+            return interactions, next_cursor
             
         except PyMongoError as e:
             logger.error(f"Failed to retrieve recent interactions: {e}")
@@ -377,6 +513,11 @@ class MemoryDatabase:
             summary = self._persona_index.find_one(query)
             if summary:
                 summary["_id"] = str(summary["_id"])
+                summary.setdefault("total_memories", 0)
+                # Counters decremented to zero are kept in the document; don't report them
+                summary["memory_categories"] = {
+                    k: v for k, v in summary.get("memory_categories", {}).items() if v
+                }
 
                 # Get recent topics
                 recent_memories = self._memory_chunks.find(
@@ -387,15 +528,19 @@ class MemoryDatabase:
                 topics = list(set(mem.get("metadata", {}).get("topic") for mem in recent_memories if mem.get("metadata", {}).get("topic")))
                 summary["recent_topics"] = topics[:5]
 
-                # Get importance distribution
-                importance_pipeline = [
-                    {"$match": {**query, "is_active": True}},
-                    {"$group": {"_id": "$metadata.importance", "count": {"$sum": 1}}}
-                ]
+                # Importance distribution is kept as counters; aggregate only
+                # for index documents written before the counters existed
+                if "importance_distribution" in summary:
+                    importance_dist = {k: v for k, v in summary["importance_distribution"].items() if v}
+                else:
+                    importance_pipeline = [
+                        {"$match": {**query, "is_active": True}},
+                        {"$group": {"_id": "$metadata.importance", "count": {"$sum": 1}}}
+                    ]
 
-                importance_dist = {}
-                for result in self._memory_chunks.aggregate(importance_pipeline):
-                    importance_dist[str(result["_id"])] = result["count"]
+                    importance_dist = {}
+                    for result in self._memory_chunks.aggregate(importance_pipeline):
+                        importance_dist[str(result["_id"])] = result["count"]
 
                 summary["importance_distribution"] = importance_dist
 
@@ -411,42 +556,49 @@ class MemoryDatabase:
         persona_id: Optional[str] = None,
         user_id: Optional[str] = None,
         content_types: Optional[List[ContentType]] = None,
-        limit: int = 20
+        limit: int = 20,
+        mode: SearchMode = SearchMode.HYBRID
     ) -> List[Dict[str, Any]]:
         """
         Search memories using text query.
 
+        Text mode ranks by the text index score alone. Hybrid mode also draws
+        candidates from the persona's vector index (when a persona is given and
+        embeddings are available) and ranks all candidates with hybrid_score.
+
         Args:
             query: Search query
             persona_id: Optional persona filter
             user_id: Optional user filter
             content_types: Optional content type filter
             limit: Maximum results
+            mode: Ranking mode
 
         Returns:
-            List of matching memories
+            List of matching memories, best first, each with its "score"
         """
         try:
-            search_query = {
-                "$text": {"$search": query},
-                "is_active": True
-            }
+            filters = {"is_active": True}
 
             if persona_id:
-                search_query["persona_id"] = persona_id
+                filters["persona_id"] = persona_id
 
             if user_id:
-                search_query["user_id"] = user_id
+                filters["user_id"] = user_id
 
             if content_types:
-                search_query["content_type"] = {"$in": [ct.value for ct in content_types]}
+                filters["content_type"] = {"$in": [ct.value for ct in content_types]}
 
+            candidates = limit if mode == SearchMode.TEXT else max(limit, MEMORY_SEARCH_CANDIDATES)
             cursor = self._memory_chunks.find(
-                search_query,
+                {**filters, "$text": {"$search": query}},
                 {"score": {"$meta": "textScore"}}
-            ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+            ).sort([("score", {"$meta": "textScore"})]).limit(candidates)
 
             results = list(cursor)
+            if mode == SearchMode.HYBRID:
+                results = self._hybrid_rank(query, results, filters, persona_id, user_id, candidates)[:limit]
+
             for result in results:
                 result["_id"] = str(result["_id"])
 
@@ -456,6 +608,46 @@ class MemoryDatabase:
             logger.error(f"Failed to search memories: {e}")
             raise
 
+    def _hybrid_rank(
+        self,
+        query: str,
+        text_matches: List[Dict[str, Any]],
+        filters: Dict[str, Any],
+        persona_id: Optional[str],
+        user_id: Optional[str],
+        candidates: int
+    ) -> List[Dict[str, Any]]:
+        """Merge text and vector candidates and order them by hybrid_score."""
+        by_id = {memory["memory_id"]: memory for memory in text_matches}
+        # textScore is unbounded; scale it against the best match
+        top_text = max((memory["score"] for memory in text_matches), default=0.0) or 1.0
+        text_scores = {memory_id: memory["score"] / top_text for memory_id, memory in by_id.items()}
+
+        similarities: Dict[str, float] = {}
+        query_vector = self.semantic_index.embed_query(query)
+        if query_vector is not None:
+            if persona_id:
+                similarities = dict(self.semantic_index.nearest(persona_id, query_vector, candidates, user_id))
+                # Vector hits ignore the content type filter and can trail deletes; fetch through the filters
+                new_ids = [memory_id for memory_id in similarities if memory_id not in by_id]
+                if new_ids:
+                    for memory in self._memory_chunks.find({**filters, "memory_id": {"$in": new_ids}}):
+                        by_id[memory["memory_id"]] = memory
+            unscored = [memory_id for memory_id in by_id if memory_id not in similarities]
+            if unscored:
+                similarities.update(self.semantic_index.similarities(query_vector, unscored, persona_id))
+
+        now = datetime.utcnow()
+        for memory_id, memory in by_id.items():
+            memory["score"] = hybrid_score(
+                text_scores.get(memory_id, 0.0),
+                similarities.get(memory_id),
+                memory.get("metadata", {}).get("importance"),
+                memory.get("timestamp"),
+                now
+            )
+        return sorted(by_id.values(), key=lambda memory: memory["score"], reverse=True)
+
     def update_memory_chunk(self, memory_id: str, request: MemoryUpdateRequest) -> bool:
         """
         Update an existing memory chunk.
@@ -490,12 +682,28 @@ class MemoryDatabase:
             if request.is_active is not None:
                 update_doc["$set"]["is_active"] = request.is_active
 
-            result = self._memory_chunks.update_one(
+            # The pre-image tells the persona counters what to move
+            before = self._memory_chunks.find_one_and_update(
                 {"memory_id": memory_id, "is_active": True},
-                update_doc
+                update_doc,
+                projection=STATS_PROJECTION,
+                return_document=ReturnDocument.BEFORE
             )
-
-            return result.modified_count > 0
+            if before is None:
+                return False
+
+            after = {
+                **before,
+                "content_type": update_doc["$set"].get("content_type", before.get("content_type")),
+                "metadata": {"importance": update_doc["$set"].get("metadata", before.get("metadata", {})).get("importance")},
+                "is_active": update_doc["$set"].get("is_active", True)
+            }
+            self.persona_stats.memory_changed(before, after)
+            if not after["is_active"]:
+                self.semantic_index.remove(memory_id, before["persona_id"])
+            elif request.content is not None:
+                self.semantic_index.enqueue(memory_id)
+            return True
 
         except PyMongoError as e:
             logger.error(f"Failed to update memory {memory_id}: {e}")
@@ -514,67 +722,36 @@ class MemoryDatabase:
         """
         try:
             if hard_delete:
-                result = self._memory_chunks.delete_one({"memory_id": memory_id})
-                return result.deleted_count > 0
+                removed = self._memory_chunks.find_one_and_delete(
+                    {"memory_id": memory_id}, projection=STATS_PROJECTION
+                )
             else:
-                result = self._memory_chunks.update_one(
+                removed = self._memory_chunks.find_one_and_update(
                     {"memory_id": memory_id, "is_active": True},
-                    {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+                    {"$set": {"is_active": False, "updated_at": datetime.utcnow()}},
+                    projection=STATS_PROJECTION,
+                    return_document=ReturnDocument.BEFORE
                 )
-                return result.modified_count > 0
+
+            if removed is None:
+                return False
+            if removed.get("is_active"):
+                self.persona_stats.memory_removed(removed)
+            self.semantic_index.remove(memory_id, removed["persona_id"])
+            return True
 
         except PyMongoError as e:
             logger.error(f"Failed to delete memory {memory_id}: {e}")
             raise
 
-    def _update_persona_index(self, persona_id: str, user_id: str):
-        """Update the persona memory index with latest statistics."""
-        try:
-            # Count memories by content type
-            pipeline = [
-                {"$match": {"persona_id": persona_id, "user_id": user_id, "is_active": True}},
-                {"$group": {
-                    "_id": "$content_type",
-                    "count": {"$sum": 1}
-                }}
-            ]
-
-            content_counts = {}
-            for result in self._memory_chunks.aggregate(pipeline):
-                content_counts[result["_id"]] = result["count"]
-
-            # Get last interaction timestamp
-            last_interaction = self._memory_interactions.find_one(
-                {"persona_id": persona_id, "user_id": user_id, "is_active": True},
-                sort=[("timestamp", DESCENDING)]
-            )
-
-            last_interaction_time = last_interaction["timestamp"] if last_interaction else None
-
-            # Update or create persona index
-            update_doc = {
-                "$set": {
-                    "persona_id": persona_id,
-                    "user_id": user_id,
-                    "total_memories": sum(content_counts.values()),
-                    "memory_categories": content_counts,
-                    "last_interaction": last_interaction_time,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-
-            self._persona_index.update_one(
-                {"persona_id": persona_id, "user_id": user_id},
-                update_doc,
-                upsert=True
-            )
-
-        except Exception as e:
-            logger.error(f"Failed to update persona index: {e}")
-            # Don't raise as this is not critical for main functionality
+    def reconcile_persona_stats(self, persona_id: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, int]:
+        """Recompute persona index counters from the source collections, repairing drift."""
+        return self.persona_stats.reconcile(persona_id, user_id)
     
     def close_connection(self):
         """Close database connection."""
+        self.stats_reconciler.stop()
+        self.semantic_index.stop()
         if self._client:
             self._client.close()
             logger.info("Database connection closed")
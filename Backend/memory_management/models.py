@@ -36,6 +36,20 @@ class ImportanceLevel(int, Enum):
     ESSENTIAL = 10
 
 
+class CountMode(str, Enum):
+    """How a paginated listing computes its total."""
+    ESTIMATED = "estimated"  # persona statistics counters, exact count when they can't answer
+    EXACT = "exact"          # count_documents, cached briefly
+    NONE = "none"            # no total
+
+
+class SearchMode(str, Enum):
+    """Memory search ranking."""
+    TEXT = "text"      # text index relevance only
+    HYBRID = "hybrid"  # text relevance, semantic similarity, importance and recency
+
+
+
 class MemoryMetadata(BaseModel):
     """Metadata associated with memory chunks."""
     tags: List[str] = Field(default_factory=list, description="Categorization tags")
@@ -160,11 +174,12 @@ class InteractionResponse(BaseModel):
 class MemoryListResponse(BaseModel):
     """Response model for paginated memory lists."""
     memories: List[MemoryChunkResponse] = Field(..., description="List of memory chunks")
-    total_count: int = Field(..., ge=0, description="Total number of memories")
-    page: int = Field(..., ge=1, description="Current page number")
+    total_count: Optional[int] = Field(None, ge=0, description="Total number of memories (omitted when count=none)")
+    page: Optional[int] = Field(None, ge=1, description="Current page number (offset pagination only)")
     page_size: int = Field(..., ge=1, le=500, description="Number of items per page")
     has_next: bool = Field(..., description="Whether there are more pages")
     has_previous: bool = Field(..., description="Whether there are previous pages")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
 
 
 class InteractionListResponse(BaseModel):
@@ -175,6 +190,7 @@ class InteractionListResponse(BaseModel):
     page_size: int = Field(..., ge=1, le=500, description="Number of items per page")
     has_next: bool = Field(..., description="Whether there are more pages")
     has_previous: bool = Field(..., description="Whether there are previous pages")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next (older) page")
 
 
 class PersonaMemorySummary(BaseModel):
@@ -0,0 +1,133 @@
+"""
+Keyset pagination for the Memory Management System.
+
+Listings page with opaque continuation tokens instead of skip/offset. A token
+carries the sort key of the last document returned (ending in _id, so every
+key is unique) and the next page is read with a range predicate on that key.
+With a compound index ending in the same sort key each page is an index seek,
+so page 1000 costs what page 1 does.
+
+Totals are optional. PageCountCache memoises count_documents results for a
+short TTL so repeated requests for the same listing don't each rescan it.
+"""
+
+import os
+import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING
+from pymongo.collection import Collection
+
+PAGE_COUNT_CACHE_SECONDS = int(os.getenv("MEMORY_COUNT_CACHE_SECONDS", "30"))
+PAGE_COUNT_CACHE_SIZE = int(os.getenv("MEMORY_COUNT_CACHE_SIZE", "1024"))
+
+# Listing orders; the trailing _id breaks ties between equal timestamps
+MEMORY_SORT = [("metadata.importance", DESCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]
+INTERACTION_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _field_value(document: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        document = document.get(part) if isinstance(document, dict) else None
+    return document
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(sort: Sequence[Tuple[str, int]], document: Dict[str, Any]) -> str:
+    """Continuation token positioned after document in the given sort order."""
+    values = [_encode_value(_field_value(document, field)) for field, _ in sort]
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Sequence[Tuple[str, int]]) -> List[Any]:
+    """Sort key values carried by a token from encode_cursor with the same sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(value) for value in json.loads(raw)]
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if len(values) != len(sort):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def keyset_filter(sort: Sequence[Tuple[str, int]], values: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Predicate matching the documents that come strictly after values in sort
+    order. The leading field is also bounded on its own so the index scan
+    starts at the cursor rather than at the front of the range.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        branch = {prefix: value for (prefix, _), value in zip(sort[:i], values[:i])}
+        branch[field] = {"$lt" if direction == DESCENDING else "$gt": values[i]}
+        branches.append(branch)
+
+    lead_field, lead_direction = sort[0]
+    return {
+        lead_field: {"$lte" if lead_direction == DESCENDING else "$gte": values[0]},
+        "$or": branches
+    }
+
+
+class PageCountCache:
+    """count_documents results per (collection, query), kept for ttl seconds."""
+
+    def __init__(self, ttl: int = PAGE_COUNT_CACHE_SECONDS, max_entries: int = PAGE_COUNT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, collection: Collection, query: Dict[str, Any]) -> int:
+        key = f"{collection.name}:{json.dumps(query, sort_keys=True, default=str)}"
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        total = collection.count_documents(query)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,217 @@
+"""
+Incremental persona statistics for the Memory Management System.
+
+Keeps the persona_memory_index documents current with atomic counter updates
+applied alongside each write: $inc on the per-content-type and per-importance
+counters and $max on the last interaction time. A write therefore costs the
+same whether a persona holds ten memories or a hundred thousand.
+
+Counters can drift when memories expire through the TTL index, when a counter
+update fails after its write succeeded, or when a write races a
+reconciliation. PersonaStatsReconciler recomputes them from the source
+collections in the background and repairs any persona that is off. Index
+documents written before the importance counters existed are recounted the
+first time a write reaches them, so a partial distribution is never served.
+"""
+
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+PERSONA_STATS_RECONCILE_SECONDS = int(os.getenv("PERSONA_STATS_RECONCILE_SECONDS", "3600"))
+
+# Fields of a memory chunk that the counters depend on
+STATS_PROJECTION = {"persona_id": 1, "user_id": 1, "content_type": 1, "metadata.importance": 1, "is_active": 1}
+
+
+def _counted_fields(memory: Dict[str, Any]) -> Tuple[str, str]:
+    """(content type, importance) counter keys of a memory document."""
+    return str(memory.get("content_type")), str(memory.get("metadata", {}).get("importance"))
+
+
+class PersonaStats:
+    """Counter maintenance and reconciliation for the persona memory index."""
+
+    def __init__(self, persona_index: Collection, memory_chunks: Collection, memory_interactions: Collection):
+        self._persona_index = persona_index
+        self._memory_chunks = memory_chunks
+        self._memory_interactions = memory_interactions
+
+    def _apply(self, persona_id: str, user_id: str, increments: Dict[str, int]):
+        """Apply counter increments to one persona's index document, creating it if needed."""
+        increments = {field: delta for field, delta in increments.items() if delta}
+        if not increments:
+            return
+        try:
+            before = self._persona_index.find_one_and_update(
+                {"persona_id": persona_id, "user_id": user_id},
+                {"$inc": increments, "$set": {"updated_at": datetime.utcnow()}},
+                projection={"_id": 0, "importance_distribution": 1},
+                upsert=True
+            )
+            if before is not None and "importance_distribution" not in before:
+                # Written before the importance counters existed: the $inc
+                # just started them from zero, so count this persona in full
+                # rather than leave a partial distribution until the next pass
+                self.reconcile(persona_id, user_id)
+        except PyMongoError as e:
+            # Reconciliation repairs the counters; don't fail the write itself
+            logger.error(f"Failed to update persona stats for {persona_id}: {e}")
+
+    def memory_added(self, memory: Dict[str, Any]):
+        """Count a newly created (active) memory chunk."""
+        self._memory_delta(memory, 1)
+
+    def memory_removed(self, memory: Dict[str, Any]):
+        """Uncount an active memory chunk that was soft or hard deleted."""
+        self._memory_delta(memory, -1)
+
+    def _memory_delta(self, memory: Dict[str, Any], delta: int):
+        content_type, importance = _counted_fields(memory)
+        self._apply(memory["persona_id"], memory["user_id"], {
+            "total_memories": delta,
+            f"memory_categories.{content_type}": delta,
+            f"importance_distribution.{importance}": delta
+        })
+
+    def memory_changed(self, before: Dict[str, Any], after: Dict[str, Any]):
+        """Move a memory between counters after its type, importance or active flag changed."""
+        increments: Dict[str, int] = {}
+        for memory, sign in ((before, -1), (after, 1)):
+            if not memory.get("is_active", True):
+                continue
+            content_type, importance = _counted_fields(memory)
+            for field in ("total_memories", f"memory_categories.{content_type}",
+                          f"importance_distribution.{importance}"):
+                increments[field] = increments.get(field, 0) + sign
+        self._apply(before["persona_id"], before["user_id"], increments)
+
+    def interaction_added(self, persona_id: str, user_id: str, timestamp: datetime):
+        """Advance the persona's last interaction time."""
+        try:
+            self._persona_index.update_one(
+                {"persona_id": persona_id, "user_id": user_id},
+                {"$max": {"last_interaction": timestamp}, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.error(f"Failed to update last interaction for {persona_id}: {e}")
+
+    def reconcile(self, persona_id: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Recompute every persona's statistics from the source collections and
+        rewrite the ones that drifted.
+
+        Args:
+            persona_id: Optional persona filter
+            user_id: Optional user filter
+
+        Returns:
+            Number of personas checked and repaired
+        """
+        scope: Dict[str, Any] = {}
+        if persona_id:
+            scope["persona_id"] = persona_id
+        if user_id:
+            scope["user_id"] = user_id
+
+        expected: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        def stats_for(key: Tuple[str, str]) -> Dict[str, Any]:
+            if key not in expected:
+                expected[key] = {"total_memories": 0, "memory_categories": {},
+                                 "importance_distribution": {}, "last_interaction": None}
+            return expected[key]
+
+        memory_pipeline = [
+            {"$match": {**scope, "is_active": True}},
+            {"$group": {
+                "_id": {"persona_id": "$persona_id", "user_id": "$user_id",
+                        "content_type": "$content_type", "importance": "$metadata.importance"},
+                "count": {"$sum": 1}
+            }}
+        ]
+        for row in self._memory_chunks.aggregate(memory_pipeline, allowDiskUse=True):
+            group = row["_id"]
+            stats = stats_for((group["persona_id"], group["user_id"]))
+            content_type, importance = str(group.get("content_type")), str(group.get("importance"))
+            stats["total_memories"] += row["count"]
+            stats["memory_categories"][content_type] = stats["memory_categories"].get(content_type, 0) + row["count"]
+            stats["importance_distribution"][importance] = stats["importance_distribution"].get(importance, 0) + row["count"]
+
+        interaction_pipeline = [
+            {"$match": {**scope, "is_active": True}},
+            {"$group": {"_id": {"persona_id": "$persona_id", "user_id": "$user_id"},
+                        "last_interaction": {"$max": "$timestamp"}}}
+        ]
+        for row in self._memory_interactions.aggregate(interaction_pipeline, allowDiskUse=True):
+            stats_for((row["_id"]["persona_id"], row["_id"]["user_id"]))["last_interaction"] = row["last_interaction"]
+
+        current = {
+            (doc["persona_id"], doc["user_id"]): doc
+            for doc in self._persona_index.find(scope, {"_id": 0, "updated_at": 0})
+        }
+        # Personas that no longer have any memories still need zeroing
+        for key in current:
+            stats_for(key)
+
+        operations = []
+        for (pid, uid), stats in expected.items():
+            doc = current.get((pid, uid), {})
+            # Drop zero counters left behind by decrements before comparing
+            counted = {
+                "total_memories": doc.get("total_memories", 0),
+                "memory_categories": {k: v for k, v in doc.get("memory_categories", {}).items() if v},
+                "importance_distribution": {k: v for k, v in doc.get("importance_distribution", {}).items() if v},
+                "last_interaction": doc.get("last_interaction")
+            }
+            if counted == stats:
+                continue
+            operations.append(UpdateOne(
+                {"persona_id": pid, "user_id": uid},
+                {"$set": {**stats, "updated_at": datetime.utcnow()}},
+                upsert=True
+            ))
+
+        if operations:
+            self._persona_index.bulk_write(operations, ordered=False)
+        result = {"personas": len(expected), "repaired": len(operations)}
+        logger.info(f"Persona stats reconciled: {result}")
+        return result
+
+
+class PersonaStatsReconciler:
+    """Runs PersonaStats.reconcile on a daemon thread every interval seconds."""
+
+    def __init__(self, stats: PersonaStats, interval: int = PERSONA_STATS_RECONCILE_SECONDS):
+        self.stats = stats
+        self.interval = interval
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="persona-stats-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_result = {**self.stats.reconcile(), "finished_at": datetime.utcnow().isoformat()}
+            except Exception as e:
+                logger.error(f"Persona stats reconciliation failed: {e}")
@@ -0,0 +1,182 @@
+"""
+Constant-time in-memory rate limiting for the Memory Management API.
+
+Each policy ("at most N requests in any W seconds") is a sliding window of
+bucketed counters: the window is split into MEMORY_RATE_LIMIT_BUCKETS slots
+with a running total, so a check only expires the slots the clock has moved
+past and compares the total with the limit. Cost per check does not depend on
+how many requests are in the window, and a key's state is a fixed number of
+integers rather than one timestamp per request.
+
+The oldest slot is kept until it lies entirely outside the window, so counts
+can only err high: the limiter never admits more than the limit in any window
+and at worst refuses for one slot width (window / buckets) too long.
+
+Keys idle for longer than the longest window have empty windows and are
+dropped without losing anything; MEMORY_RATE_LIMIT_MAX_KEYS bounds the number
+of tracked keys on top of that. All state is guarded by one lock held for a
+few microseconds and never across an await, so the limiter can be called from
+threads and from the event loop alike.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+MEMORY_RATE_LIMIT_BUCKETS = int(os.getenv("MEMORY_RATE_LIMIT_BUCKETS", "60"))
+MEMORY_RATE_LIMIT_MAX_KEYS = int(os.getenv("MEMORY_RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """At most `limit` requests in any `window` seconds."""
+    name: str
+    limit: int
+    window: float
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Outcome of a check; `policy` is the refusing policy that clears last, if any."""
+    allowed: bool
+    policy: Optional[str]
+    retry_after: float
+
+
+class _WindowCounter:
+    """Request counts for one key and policy in a ring of time slots."""
+
+    __slots__ = ("slot_seconds", "counts", "total", "slot")
+
+    def __init__(self, policy: RateLimitPolicy, buckets: int, now: float):
+        self.slot_seconds = policy.window / buckets
+        # One slot more than the window needs, for the partially expired oldest slot
+        self.counts = [0] * (buckets + 1)
+        self.total = 0
+        self.slot = int(now // self.slot_seconds)
+
+    def advance(self, now: float):
+        """Expire the slots that left the window since the last call."""
+        slot = int(now // self.slot_seconds)
+        elapsed = slot - self.slot
+        if elapsed <= 0:
+            return
+        size = len(self.counts)
+        if elapsed >= size:
+            self.counts = [0] * size
+            self.total = 0
+        else:
+            for step in range(self.slot + 1, slot + 1):
+                index = step % size
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+        self.slot = slot
+
+    def add(self):
+        self.counts[self.slot % len(self.counts)] += 1
+        self.total += 1
+
+    def retry_after(self, limit: int, now: float) -> float:
+        """Seconds until enough slots expire for the total to drop below limit."""
+        size = len(self.counts)
+        excess = self.total - limit + 1
+        for age in range(size - 1, -1, -1):
+            step = self.slot - age
+            excess -= self.counts[step % size]
+            if excess <= 0:
+                # Slot `step` leaves the ring when the clock reaches slot step + size
+                return max(0.0, (step + size) * self.slot_seconds - now)
+        return 0.0
+
+
+class _KeyState:
+    __slots__ = ("counters", "last_seen")
+
+    def __init__(self, counters: List[_WindowCounter], now: float):
+        self.counters = counters
+        self.last_seen = now
+
+
+class SlidingWindowRateLimiter:
+    """Per-key rate limiter enforcing several sliding-window policies together."""
+
+    def __init__(self, policies: Sequence[RateLimitPolicy], buckets: int = MEMORY_RATE_LIMIT_BUCKETS,
+                 max_keys: int = MEMORY_RATE_LIMIT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.policies = list(policies)
+        self.buckets = max(1, buckets)
+        self.max_keys = max_keys
+        self.clock = clock
+        # A key whose windows have all passed holds no information
+        self.idle_seconds = max(policy.window for policy in self.policies)
+        self._keys: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"allowed": 0, "limited": 0, "evicted_idle": 0, "evicted_full": 0}
+
+    def _state(self, key: str, now: float) -> _KeyState:
+        """The key's counters advanced to now, created on first use (lock held)."""
+        state = self._keys.get(key)
+        if state is None:
+            state = _KeyState([_WindowCounter(p, self.buckets, now) for p in self.policies], now)
+            self._keys[key] = state
+        else:
+            self._keys.move_to_end(key)
+            for counter in state.counters:
+                counter.advance(now)
+        state.last_seen = now
+        self._evict(now)
+        return state
+
+    def _evict(self, now: float):
+        """Drop idle keys from the least recently used end (lock held)."""
+        idle_before = now - self.idle_seconds
+        while self._keys:
+            oldest = next(iter(self._keys.values()))
+            if oldest.last_seen < idle_before:
+                self._keys.popitem(last=False)
+                self.stats["evicted_idle"] += 1
+            elif len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+                self.stats["evicted_full"] += 1
+            else:
+                break
+
+    def hit(self, key: str) -> RateLimitDecision:
+        """Record a request for key if every policy allows it."""
+        now = self.clock()
+        with self._lock:
+            state = self._state(key, now)
+            # Every refusing policy has to clear before a retry can succeed,
+            # so report the one that clears last
+            refused: Optional[RateLimitDecision] = None
+            for policy, counter in zip(self.policies, state.counters):
+                if counter.total >= policy.limit:
+                    retry_after = counter.retry_after(policy.limit, now)
+                    if refused is None or retry_after > refused.retry_after:
+                        refused = RateLimitDecision(False, policy.name, retry_after)
+            if refused is not None:
+                self.stats["limited"] += 1
+                return refused
+            for counter in state.counters:
+                counter.add()
+            self.stats["allowed"] += 1
+            return RateLimitDecision(True, None, 0.0)
+
+    def remaining(self, key: str) -> Dict[str, int]:
+        """Requests left under each policy, by policy name."""
+        now = self.clock()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                return {policy.name: policy.limit for policy in self.policies}
+            result = {}
+            for policy, counter in zip(self.policies, state.counters):
+                counter.advance(now)
+                result[policy.name] = max(0, policy.limit - counter.total)
+            return result
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "tracked_keys": len(self._keys), "max_keys": self.max_keys}
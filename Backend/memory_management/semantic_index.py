@@ -0,0 +1,582 @@
+"""
+Semantic recall for the Memory Management System.
+
+Memory chunks are embedded off the request path: writes enqueue the chunk id
+and an embedding worker thread reads the current content in batches, embeds
+it and stores the vectors in the memory_embeddings collection.
+
+Searches load a persona's vectors into an in-process index on first use and
+keep the most recently used personas resident, bounded by persona count and
+total vectors. Indexes are loaded for exact inner product search; the
+embedding worker then moves large personas onto a FAISS HNSW graph, built
+beside the exact index and swapped in when done, so searches never wait for
+a graph build. Without FAISS every persona stays exact.
+
+hybrid_score blends the text-index relevance, cosine similarity to the query,
+importance and recency; MemoryDatabase.search_memories draws candidates from
+both the text index and the vector index so paraphrases that share no words
+with the query are still recalled.
+
+numpy, sentence-transformers and faiss-cpu are optional. Without an embedding
+model search falls back to text relevance plus importance and recency.
+"""
+
+import os
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import Binary
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SentenceTransformer = None
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MEMORY_EMBEDDING_MODEL = os.getenv("MEMORY_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+MEMORY_EMBEDDING_BATCH = int(os.getenv("MEMORY_EMBEDDING_BATCH", "64"))
+MEMORY_EMBEDDING_QUEUE_SIZE = int(os.getenv("MEMORY_EMBEDDING_QUEUE_SIZE", "10000"))
+
+# Resident persona indexes, evicted least recently used first
+MEMORY_INDEX_MAX_PERSONAS = int(os.getenv("MEMORY_INDEX_MAX_PERSONAS", "32"))
+MEMORY_INDEX_MAX_VECTORS = int(os.getenv("MEMORY_INDEX_MAX_VECTORS", "2000000"))
+
+# Personas with fewer vectors than this are searched exactly
+MEMORY_ANN_MIN_VECTORS = int(os.getenv("MEMORY_ANN_MIN_VECTORS", "5000"))
+MEMORY_HNSW_M = int(os.getenv("MEMORY_HNSW_M", "32"))
+MEMORY_HNSW_EF_CONSTRUCTION = int(os.getenv("MEMORY_HNSW_EF_CONSTRUCTION", "80"))
+MEMORY_HNSW_EF_SEARCH = int(os.getenv("MEMORY_HNSW_EF_SEARCH", "64"))
+
+# Hybrid ranking
+MEMORY_SEARCH_CANDIDATES = int(os.getenv("MEMORY_SEARCH_CANDIDATES", "100"))
+MEMORY_SEARCH_TEXT_WEIGHT = float(os.getenv("MEMORY_SEARCH_TEXT_WEIGHT", "0.35"))
+MEMORY_SEARCH_VECTOR_WEIGHT = float(os.getenv("MEMORY_SEARCH_VECTOR_WEIGHT", "0.45"))
+MEMORY_SEARCH_IMPORTANCE_WEIGHT = float(os.getenv("MEMORY_SEARCH_IMPORTANCE_WEIGHT", "0.1"))
+MEMORY_SEARCH_RECENCY_WEIGHT = float(os.getenv("MEMORY_SEARCH_RECENCY_WEIGHT", "0.1"))
+MEMORY_RECENCY_HALF_LIFE_DAYS = float(os.getenv("MEMORY_RECENCY_HALF_LIFE_DAYS", "30"))
+
+
+def hybrid_score(text_score: float, similarity: Optional[float], importance: Optional[int],
+                 timestamp: Optional[datetime], now: Optional[datetime] = None) -> float:
+    """
+    Blend of normalised text relevance (0-1), cosine similarity, importance
+    (1-10) and recency (halving every MEMORY_RECENCY_HALF_LIFE_DAYS).
+    """
+    now = now or datetime.utcnow()
+    recency = 0.0
+    if timestamp is not None:
+        age_days = max((now - timestamp).total_seconds(), 0.0) / 86400
+        recency = 0.5 ** (age_days / MEMORY_RECENCY_HALF_LIFE_DAYS)
+    return (MEMORY_SEARCH_TEXT_WEIGHT * text_score
+            + MEMORY_SEARCH_VECTOR_WEIGHT * max(similarity or 0.0, 0.0)
+            + MEMORY_SEARCH_IMPORTANCE_WEIGHT * (importance or 0) / 10
+            + MEMORY_SEARCH_RECENCY_WEIGHT * recency)
+
+
+def _to_binary(vector: "np.ndarray") -> Binary:
+    return Binary(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+
+
+def _from_binary(data: bytes) -> "np.ndarray":
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class Embedder:
+    """Sentence embedding model, loaded on first use, producing unit-length float32 vectors."""
+
+    def __init__(self, model_name: str = MEMORY_EMBEDDING_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return NUMPY_AVAILABLE and SENTENCE_TRANSFORMERS_AVAILABLE and not self._failed
+
+    def load(self):
+        """Load (downloading if needed) the model now rather than on first encode."""
+        with self._lock:
+            if self._model is None:
+                try:
+                    self._model = SentenceTransformer(self.model_name)
+                except Exception:
+                    # Don't retry the download on every write
+                    self._failed = True
+                    raise
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        self.load()
+        vectors = self._model.encode(texts, batch_size=MEMORY_EMBEDDING_BATCH,
+                                     normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class _FlatIndex:
+    """Exact inner product search with numpy; the subset of the FAISS index API used here."""
+
+    def __init__(self, dim: int):
+        self.d = dim
+        self.ntotal = 0
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+
+    def add(self, vectors: "np.ndarray"):
+        needed = self.ntotal + len(vectors)
+        if needed > len(self._matrix):
+            grown = np.empty((max(needed, 2 * len(self._matrix), 64), self.d), dtype=np.float32)
+            grown[:self.ntotal] = self._matrix[:self.ntotal]
+            self._matrix = grown
+        self._matrix[self.ntotal:needed] = vectors
+        self.ntotal = needed
+
+    def search(self, queries: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        scores = queries @ self._matrix[:self.ntotal].T
+        k = min(k, self.ntotal)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+    def reconstruct(self, position: int) -> "np.ndarray":
+        return self._matrix[position].copy()
+
+    def reconstruct_n(self, start: int, count: int) -> "np.ndarray":
+        return self._matrix[start:start + count].copy()
+
+
+def _new_backend(dim: int, ann: bool = False):
+    if FAISS_AVAILABLE and ann:
+        index = faiss.IndexHNSWFlat(dim, MEMORY_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = MEMORY_HNSW_EF_CONSTRUCTION
+        return index
+    if FAISS_AVAILABLE:
+        return faiss.IndexFlatIP(dim)
+    return _FlatIndex(dim)
+
+
+class PersonaVectorIndex:
+    """
+    Vector index over one persona's memories. Vectors are append-only in the
+    backend; replaced and removed memories are tombstoned until compact()
+    rebuilds the index, which the embedding worker does once tombstones pass
+    a quarter of it. build() and compact() always produce an exact index;
+    upgrade_to_ann() moves a large one onto HNSW without holding the lock
+    for the graph build.
+    """
+
+    def __init__(self, persona_id: str):
+        self.persona_id = persona_id
+        self.lock = threading.RLock()
+        self._backend = None
+        self._memory_ids: List[str] = []
+        self._user_ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._deleted: set = set()
+
+    @property
+    def size(self) -> int:
+        return len(self._positions)
+
+    def build(self, memory_ids: List[str], user_ids: List[str], vectors: "np.ndarray"):
+        """Replace the contents of the index with an exact one."""
+        with self.lock:
+            self._backend = _new_backend(vectors.shape[1]) if len(memory_ids) else None
+            self._memory_ids, self._user_ids = [], []
+            self._positions, self._deleted = {}, set()
+            if len(memory_ids):
+                self._append(memory_ids, user_ids, vectors)
+
+    def _append(self, memory_ids: List[str], user_ids: List[str], vectors: "np.ndarray"):
+        self._backend.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        for memory_id, user_id in zip(memory_ids, user_ids):
+            self._positions[memory_id] = len(self._memory_ids)
+            self._memory_ids.append(memory_id)
+            self._user_ids.append(user_id)
+
+    def add(self, memory_ids: List[str], user_ids: List[str], vectors: "np.ndarray"):
+        """Insert or replace memories' vectors."""
+        with self.lock:
+            for memory_id in memory_ids:
+                self._tombstone(memory_id)
+            if self._backend is None:
+                self._backend = _new_backend(vectors.shape[1])
+            self._append(memory_ids, user_ids, vectors)
+
+    def remove(self, memory_id: str):
+        with self.lock:
+            self._tombstone(memory_id)
+
+    def _tombstone(self, memory_id: str):
+        position = self._positions.pop(memory_id, None)
+        if position is not None:
+            self._deleted.add(position)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return len(self._deleted) * 4 > len(self._memory_ids)
+
+    def compact(self):
+        """Rebuild the index from its live vectors, dropping tombstones."""
+        with self.lock:
+            live = sorted(self._positions.values())
+            if not live:
+                self.build([], [], np.empty((0, 0), dtype=np.float32))
+                return
+            vectors = np.vstack([self._backend.reconstruct(p) for p in live])
+            self.build([self._memory_ids[p] for p in live], [self._user_ids[p] for p in live], vectors)
+
+    @property
+    def wants_ann(self) -> bool:
+        """Large enough for HNSW but still searched exactly."""
+        return (FAISS_AVAILABLE and self.size >= MEMORY_ANN_MIN_VECTORS
+                and not isinstance(self._backend, faiss.IndexHNSWFlat))
+
+    def upgrade_to_ann(self) -> bool:
+        """
+        Replace the exact backend with an HNSW graph. The graph is built from
+        a snapshot outside the lock, so searches carry on exactly meanwhile;
+        vectors added and memories removed during the build are applied
+        before the swap.
+        """
+        with self.lock:
+            if not self.wants_ann:
+                return False
+            backend = self._backend
+            snapshot_total = len(self._memory_ids)
+            live = sorted(self._positions.values())
+            vectors = backend.reconstruct_n(0, snapshot_total)[live]
+        graph = _new_backend(vectors.shape[1], ann=True)
+        graph.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        del vectors
+
+        with self.lock:
+            if self._backend is not backend:
+                # Compacted or rebuilt during the build; the next pass retries
+                return False
+            later = [p for p in range(snapshot_total, len(self._memory_ids)) if p not in self._deleted]
+            if later:
+                graph.add(np.ascontiguousarray(
+                    backend.reconstruct_n(snapshot_total, len(self._memory_ids) - snapshot_total)
+                    [[p - snapshot_total for p in later]], dtype=np.float32))
+            old_positions = live + later
+            self._backend = graph
+            self._memory_ids = [self._memory_ids[p] for p in old_positions]
+            self._user_ids = [self._user_ids[p] for p in old_positions]
+            self._deleted = {new for new, old in enumerate(old_positions) if old in self._deleted}
+            self._positions = {memory_id: new for new, memory_id in enumerate(self._memory_ids)
+                               if new not in self._deleted}
+        return True
+
+    def vector(self, memory_id: str) -> Optional["np.ndarray"]:
+        with self.lock:
+            position = self._positions.get(memory_id)
+            return None if position is None else self._backend.reconstruct(position)
+
+    def search(self, query: "np.ndarray", k: int, user_id: Optional[str] = None,
+               ef_search: int = MEMORY_HNSW_EF_SEARCH) -> List[Tuple[str, float]]:
+        """Up to k (memory_id, similarity) pairs, most similar first."""
+        with self.lock:
+            if self._backend is None or not self._positions:
+                return []
+            total = self._backend.ntotal
+            fetch = min(2 * k, total)
+            query = np.ascontiguousarray(query.reshape(1, -1), dtype=np.float32)
+            while True:
+                if FAISS_AVAILABLE and isinstance(self._backend, faiss.IndexHNSWFlat):
+                    self._backend.hnsw.efSearch = max(ef_search, fetch)
+                scores, positions = self._backend.search(query, fetch)
+                hits = []
+                for score, position in zip(scores[0], positions[0]):
+                    if position < 0 or position in self._deleted:
+                        continue
+                    if user_id and self._user_ids[position] != user_id:
+                        continue
+                    hits.append((self._memory_ids[position], float(score)))
+                # Tombstones or the user filter took too many; widen rather than return short
+                if len(hits) >= k or fetch >= total:
+                    return hits[:k]
+                fetch = min(fetch * 4, total)
+
+
+class SemanticIndex:
+    """Write-time embedding and per-persona vector indexes for memory chunks."""
+
+    def __init__(self, memory_chunks: Collection, embeddings: Collection, embedder: Optional[Embedder] = None,
+                 max_personas: int = MEMORY_INDEX_MAX_PERSONAS, max_vectors: int = MEMORY_INDEX_MAX_VECTORS):
+        self._memory_chunks = memory_chunks
+        self._embeddings = embeddings
+        self.embedder = embedder or Embedder()
+        self.max_personas = max_personas
+        self.max_vectors = max_vectors
+        self._indexes: "OrderedDict[str, PersonaVectorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=MEMORY_EMBEDDING_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counters = {"embedded": 0, "dropped": 0, "failed": 0, "loads": 0, "evictions": 0, "ann_builds": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.embedder.available
+
+    # Write path
+
+    def enqueue(self, memory_id: str):
+        """Schedule a memory chunk for (re-)embedding; never blocks the caller."""
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait(memory_id)
+        except queue.Full:
+            # Picked up again by the backfill when the persona is next loaded
+            self.counters["dropped"] += 1
+
+    def remove(self, memory_id: str, persona_id: str):
+        """Forget a deleted or deactivated memory chunk."""
+        try:
+            self._embeddings.delete_one({"memory_id": memory_id})
+        except PyMongoError as e:
+            logger.error(f"Failed to delete embedding for {memory_id}: {e}")
+        with self._lock:
+            index = self._indexes.get(persona_id)
+        if index is not None:
+            index.remove(memory_id)
+
+    def start(self):
+        if self._thread is not None or not self.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-embedding-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        try:
+            # Download/load the model here, not in the first search or write
+            self.embedder.load()
+        except Exception as e:
+            logger.error(f"Failed to load embedding model {self.embedder.model_name}: {e}")
+            return
+        while not self._stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=1.0)]
+            except queue.Empty:
+                self._compact_resident()
+                self._upgrade_resident()
+                continue
+            while len(batch) < MEMORY_EMBEDDING_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.embed_memories(batch)
+            except Exception as e:
+                self.counters["failed"] += len(batch)
+                logger.error(f"Failed to embed {len(batch)} memories: {e}")
+            self._compact_resident()
+            self._upgrade_resident()
+
+    def _compact_resident(self):
+        # Rebuilds happen here rather than in delete requests; an HNSW rebuild
+        # of a large persona takes a while
+        with self._lock:
+            indexes = [index for index in self._indexes.values() if index.needs_compaction]
+        for index in indexes:
+            index.compact()
+
+    def _upgrade_resident(self):
+        # Large personas are loaded exact; their HNSW graphs are built here
+        with self._lock:
+            indexes = [index for index in self._indexes.values() if index.wants_ann]
+        for index in indexes:
+            started = datetime.utcnow()
+            if index.upgrade_to_ann():
+                self.counters["ann_builds"] += 1
+                logger.info(f"Built HNSW index for persona {index.persona_id}: {index.size} vectors "
+                            f"in {(datetime.utcnow() - started).total_seconds():.1f}s")
+
+    def embed_memories(self, memory_ids: List[str]) -> int:
+        """Embed the current content of active memories and store the vectors."""
+        # Read content now rather than at enqueue time so updates and deletes
+        # that raced the queue are honoured
+        memories = list(self._memory_chunks.find(
+            {"memory_id": {"$in": list(dict.fromkeys(memory_ids))}, "is_active": True},
+            {"memory_id": 1, "persona_id": 1, "user_id": 1, "content": 1, "created_at": 1}
+        ))
+        if not memories:
+            return 0
+
+        vectors = self.embedder.encode([memory["content"] for memory in memories])
+        now = datetime.utcnow()
+        self._embeddings.bulk_write([
+            UpdateOne({"memory_id": memory["memory_id"]}, {"$set": {
+                "persona_id": memory["persona_id"],
+                "user_id": memory["user_id"],
+                "model": self.embedder.model_name,
+                "vector": _to_binary(vector),
+                "created_at": memory.get("created_at", now),
+                "updated_at": now
+            }}, upsert=True)
+            for memory, vector in zip(memories, vectors)
+        ], ordered=False)
+        self.counters["embedded"] += len(memories)
+
+        by_persona: Dict[str, List[int]] = {}
+        for position, memory in enumerate(memories):
+            by_persona.setdefault(memory["persona_id"], []).append(position)
+        for persona_id, positions in by_persona.items():
+            with self._lock:
+                index = self._indexes.get(persona_id)
+            if index is not None:
+                index.add([memories[p]["memory_id"] for p in positions],
+                          [memories[p]["user_id"] for p in positions], vectors[positions])
+        return len(memories)
+
+    def backfill(self, persona_id: Optional[str] = None) -> int:
+        """
+        Synchronously embed active memories that have no vector yet, e.g.
+        after enabling semantic search on an existing database.
+        """
+        scope = {"is_active": True}
+        if persona_id:
+            scope["persona_id"] = persona_id
+        embedded = 0
+        batch: List[str] = []
+        cursor = self._memory_chunks.find(scope, {"memory_id": 1}).batch_size(1000)
+        for memory in cursor:
+            batch.append(memory["memory_id"])
+            if len(batch) >= 1000:
+                embedded += self._embed_missing(batch)
+                batch = []
+        if batch:
+            embedded += self._embed_missing(batch)
+        return embedded
+
+    def _embed_missing(self, memory_ids: List[str]) -> int:
+        have = {doc["memory_id"] for doc in self._embeddings.find(
+            {"memory_id": {"$in": memory_ids}, "model": self.embedder.model_name}, {"memory_id": 1})}
+        missing = [memory_id for memory_id in memory_ids if memory_id not in have]
+        return sum(self.embed_memories(missing[i:i + MEMORY_EMBEDDING_BATCH])
+                   for i in range(0, len(missing), MEMORY_EMBEDDING_BATCH))
+
+    # Read path
+
+    def _resident(self, persona_id: str) -> PersonaVectorIndex:
+        """The persona's index, loading it (and evicting others) if it isn't resident."""
+        with self._lock:
+            index = self._indexes.get(persona_id)
+            if index is not None:
+                self._indexes.move_to_end(persona_id)
+                return index
+            index = PersonaVectorIndex(persona_id)
+            # Registered before loading so the worker's additions land in it;
+            # holding its lock makes searches and additions wait for the load
+            index.lock.acquire()
+            self._indexes[persona_id] = index
+        try:
+            self._load(index)
+        finally:
+            index.lock.release()
+        self._evict()
+        return index
+
+    def _load(self, index: PersonaVectorIndex):
+        persona_id = index.persona_id
+        memory_ids, user_ids, vectors = [], [], []
+        for doc in self._embeddings.find({"persona_id": persona_id, "model": self.embedder.model_name},
+                                         {"memory_id": 1, "user_id": 1, "vector": 1}):
+            memory_ids.append(doc["memory_id"])
+            user_ids.append(doc["user_id"])
+            vectors.append(_from_binary(doc["vector"]))
+        if vectors:
+            index.build(memory_ids, user_ids, np.vstack(vectors))
+        self.counters["loads"] += 1
+        logger.info(f"Loaded semantic index for persona {persona_id}: {len(memory_ids)} vectors")
+
+        # Chunks written before embeddings existed, or dropped from a full queue
+        embedded = set(memory_ids)
+        for memory in self._memory_chunks.find({"persona_id": persona_id, "is_active": True}, {"memory_id": 1}):
+            if memory["memory_id"] not in embedded:
+                self.enqueue(memory["memory_id"])
+
+    def _evict(self):
+        with self._lock:
+            while len(self._indexes) > 1 and (
+                    len(self._indexes) > self.max_personas
+                    or sum(index.size for index in self._indexes.values()) > self.max_vectors):
+                persona_id, _ = self._indexes.popitem(last=False)
+                self.counters["evictions"] += 1
+                logger.info(f"Evicted semantic index for persona {persona_id}")
+
+    def embed_query(self, query: str) -> Optional["np.ndarray"]:
+        if not self.enabled:
+            return None
+        try:
+            return self.embedder.encode([query])[0]
+        except Exception as e:
+            logger.error(f"Failed to embed search query: {e}")
+            return None
+
+    def nearest(self, persona_id: str, query_vector: "np.ndarray", k: int,
+                user_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """The persona's k memories most similar to the query vector."""
+        return self._resident(persona_id).search(query_vector, k, user_id=user_id)
+
+    def similarities(self, query_vector: "np.ndarray", memory_ids: Iterable[str],
+                     persona_id: Optional[str] = None) -> Dict[str, float]:
+        """Cosine similarity of the query to each embedded memory among memory_ids."""
+        similarities, missing = {}, []
+        with self._lock:
+            index = self._indexes.get(persona_id) if persona_id else None
+        for memory_id in memory_ids:
+            vector = index.vector(memory_id) if index is not None else None
+            if vector is None:
+                missing.append(memory_id)
+            else:
+                similarities[memory_id] = float(vector @ query_vector)
+        if missing:
+            for doc in self._embeddings.find({"memory_id": {"$in": missing}, "model": self.embedder.model_name},
+                                             {"memory_id": 1, "vector": 1}):
+                similarities[doc["memory_id"]] = float(_from_binary(doc["vector"]) @ query_vector)
+        return similarities
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = {persona_id: index.size for persona_id, index in self._indexes.items()}
+        return {
+            "enabled": self.enabled,
+            "model": self.embedder.model_name,
+            "ann_backend": "faiss" if FAISS_AVAILABLE else "numpy",
+            "queue_depth": self._queue.qsize(),
+            "resident_personas": len(resident),
+            "resident_vectors": sum(resident.values()),
+            **self.counters
+        }
@@ -0,0 +1,134 @@
+"""
+Tests for keyset pagination cursors
+
+The keyset walks run against mongomock and are compared with the skip/limit
+listing they replace, on data with many equal timestamps and importances so
+ties are broken only by _id.
+"""
+
+import base64
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from memory_management.pagination import (
+    INTERACTION_SORT, MEMORY_SORT, InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+)
+
+
+def b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class TestCursorEncoding:
+
+    @pytest.mark.parametrize("timestamp", [
+        datetime(2024, 2, 29, 23, 59, 59, 123456),
+        datetime(2024, 1, 1, 8, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    ])
+    def test_round_trip(self, timestamp):
+        """datetime and ObjectId sort values come back with their types and exact values"""
+        document = {"_id": ObjectId(), "timestamp": timestamp, "metadata": {"importance": 7}}
+        values = decode_cursor(encode_cursor(MEMORY_SORT, document), MEMORY_SORT)
+
+        assert values == [7, timestamp, document["_id"]]
+        assert isinstance(values[1], datetime) and isinstance(values[2], ObjectId)
+        assert values[1].tzinfo == timestamp.tzinfo
+
+    def test_token_is_url_safe(self):
+        document = {"_id": ObjectId(), "timestamp": datetime(2024, 1, 1)}
+        token = encode_cursor(INTERACTION_SORT, document)
+        assert "=" not in token and "+" not in token and "/" not in token
+
+    @pytest.mark.parametrize("token", [
+        "",
+        "not a cursor!",
+        b64(b"not json"),
+        b64(b"5"),
+        b64(b'{"timestamp": 1}'),
+        b64(json.dumps([{"$date": "yesterday"}, {"$oid": "abc"}]).encode()),
+        b64(json.dumps([{"$where": "1"}, {"$oid": str(ObjectId())}]).encode()),
+    ])
+    def test_malformed_tokens(self, token):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, INTERACTION_SORT)
+
+    def test_wrong_length_token(self):
+        """A token made for one sort order is refused by another"""
+        document = {"_id": ObjectId(), "timestamp": datetime(2024, 1, 1), "metadata": {"importance": 3}}
+        with pytest.raises(InvalidCursor):
+            decode_cursor(encode_cursor(INTERACTION_SORT, document), MEMORY_SORT)
+        with pytest.raises(InvalidCursor):
+            decode_cursor(encode_cursor(MEMORY_SORT, document), INTERACTION_SORT)
+
+
+@pytest.fixture
+def collection():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.memories
+    rng = random.Random(42)
+    base = datetime(2024, 1, 1)
+    # Few distinct timestamps and importances: most sort keys tie until _id
+    collection.insert_many([
+        {
+            "_id": ObjectId(),
+            "persona_id": rng.choice(["guru", "tutor"]),
+            "timestamp": base + timedelta(minutes=rng.randrange(6)),
+            "metadata": {"importance": rng.randrange(1, 4)},
+        }
+        for _ in range(120)
+    ])
+    return collection
+
+
+def walk_keyset(collection, query, sort, page_size):
+    pages, cursor = [], None
+    # A cursor that fails to move past its page would loop forever
+    for _ in range(collection.count_documents(query) + 1):
+        page_query = query
+        if cursor:
+            page_query = {"$and": [query, keyset_filter(sort, decode_cursor(cursor, sort))]}
+        page = list(collection.find(page_query).sort(sort).limit(page_size))
+        if not page:
+            return pages
+        pages.append([document["_id"] for document in page])
+        cursor = encode_cursor(sort, page[-1])
+    pytest.fail("keyset walk did not terminate")
+
+
+def walk_offset(collection, query, sort, page_size):
+    ids = [document["_id"] for document in collection.find(query).sort(sort)]
+    return [ids[start:start + page_size] for start in range(0, len(ids), page_size)]
+
+
+class TestKeysetWalk:
+
+    @pytest.mark.parametrize("sort", [MEMORY_SORT, INTERACTION_SORT], ids=["memories", "interactions"])
+    @pytest.mark.parametrize("page_size", [1, 7, 50, 500])
+    def test_matches_offset_listing(self, collection, sort, page_size):
+        """Every document appears once, in the same order and pages as skip/limit"""
+        keyset = walk_keyset(collection, {}, sort, page_size)
+
+        assert keyset == walk_offset(collection, {}, sort, page_size)
+        assert sum(len(page) for page in keyset) == collection.count_documents({})
+
+    def test_matches_offset_listing_with_filter(self, collection):
+        query = {"persona_id": "guru"}
+        assert walk_keyset(collection, query, MEMORY_SORT, 9) == walk_offset(collection, query, MEMORY_SORT, 9)
+
+    def test_page_boundary_inside_a_tie(self, collection):
+        """Documents sharing the last returned timestamp are not skipped or repeated"""
+        newest = collection.find_one(sort=INTERACTION_SORT)
+        tied = collection.count_documents({"timestamp": newest["timestamp"]})
+        assert tied > 2
+
+        first = list(collection.find().sort(INTERACTION_SORT).limit(1))
+        after = keyset_filter(INTERACTION_SORT, decode_cursor(encode_cursor(INTERACTION_SORT, first[0]), INTERACTION_SORT))
+        rest = list(collection.find(after).sort(INTERACTION_SORT))
+
+        assert first[0]["_id"] not in [document["_id"] for document in rest]
+        assert sum(1 for document in rest if document["timestamp"] == newest["timestamp"]) == tied - 1
+        assert len(rest) == collection.count_documents({}) - 1
@@ -0,0 +1,149 @@
+"""
+Tests for the in-memory sliding window rate limiter
+
+Time is driven by a fake clock passed to SlidingWindowRateLimiter, so every
+expectation is exact. Windows and bucket counts are chosen so slot widths are
+powers of two and the float arithmetic stays exact too.
+"""
+
+import random
+
+import pytest
+
+from memory_management.rate_limit import RateLimitPolicy, SlidingWindowRateLimiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestSlidingWindowRateLimiter:
+
+    @pytest.mark.parametrize("limit, window, buckets", [(5, 4, 8), (3, 1, 4), (10, 8, 1)])
+    def test_never_over_admits(self, clock, limit, window, buckets):
+        """No window of `window` seconds, wherever it starts, holds more than limit admissions"""
+        limiter = SlidingWindowRateLimiter([RateLimitPolicy("p", limit, window)], buckets=buckets, clock=clock)
+        rng = random.Random(limit * 1000 + buckets)
+        admitted = []
+        for _ in range(3000):
+            clock.now += rng.choice((0.0, 0.01, 0.05, 0.125, 0.3, 1.0))
+            if limiter.hit("client").allowed:
+                admitted.append(clock.now)
+
+        assert admitted
+        for i, start in enumerate(admitted):
+            in_window = sum(1 for t in admitted[i:] if t < start + window)
+            assert in_window <= limit
+
+    def test_admits_limit_then_refuses(self, clock):
+        limiter = SlidingWindowRateLimiter([RateLimitPolicy("p", 3, 8)], buckets=8, clock=clock)
+        decisions = [limiter.hit("client") for _ in range(4)]
+
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        assert decisions[-1].policy == "p"
+        assert limiter.remaining("client") == {"p": 0}
+        assert limiter.info()["allowed"] == 3 and limiter.info()["limited"] == 1
+
+    def test_retry_after_is_exact(self, clock):
+        """A retry exactly retry_after seconds later succeeds and one just before does not"""
+        limiter = SlidingWindowRateLimiter([RateLimitPolicy("p", 3, 8)], buckets=8, clock=clock)
+        clock.now = 0.5
+        for _ in range(3):
+            assert limiter.hit("client").allowed
+
+        clock.now = 2.25
+        refused = limiter.hit("client")
+        # The slot holding the three hits ([0, 1)) leaves the ring at t=9
+        assert not refused.allowed
+        assert refused.retry_after == 6.75
+
+        clock.now = 2.25 + refused.retry_after - 0.01
+        assert not limiter.hit("client").allowed
+        clock.now = 2.25 + refused.retry_after
+        assert limiter.hit("client").allowed
+
+    def test_retry_after_waits_for_enough_slots(self, clock):
+        """Only as many old slots as needed to free one request have to expire"""
+        limiter = SlidingWindowRateLimiter([RateLimitPolicy("p", 3, 8)], buckets=8, clock=clock)
+        for t in (0.5, 1.5, 2.5):
+            clock.now = t
+            assert limiter.hit("client").allowed
+
+        clock.now = 4.0
+        refused = limiter.hit("client")
+        assert refused.retry_after == 5.0
+
+        clock.now = 9.0
+        assert limiter.hit("client").allowed
+        assert not limiter.hit("client").allowed
+
+    def test_keys_are_independent(self, clock):
+        limiter = SlidingWindowRateLimiter([RateLimitPolicy("p", 1, 8)], buckets=8, clock=clock)
+        assert limiter.hit("a").allowed
+        assert not limiter.hit("a").allowed
+        assert limiter.hit("b").allowed
+
+    def test_idle_keys_are_evicted(self, clock):
+        """A key idle for longer than the longest window is dropped without losing anything"""
+        limiter = SlidingWindowRateLimiter(
+            [RateLimitPolicy("burst", 1, 1), RateLimitPolicy("sustained", 2, 8)], buckets=8, clock=clock
+        )
+        limiter.hit("idle")
+        clock.now = 5.0
+        limiter.hit("active")
+        assert limiter.info()["tracked_keys"] == 2
+
+        clock.now = 8.5
+        limiter.hit("active")
+        info = limiter.info()
+        assert info["tracked_keys"] == 1
+        assert info["evicted_idle"] == 1
+        assert limiter.remaining("idle") == {"burst": 1, "sustained": 2}
+
+    def test_max_keys_evicts_least_recently_used(self, clock):
+        limiter = SlidingWindowRateLimiter([RateLimitPolicy("p", 5, 8)], buckets=8, max_keys=2, clock=clock)
+        limiter.hit("a")
+        limiter.hit("b")
+        limiter.hit("a")
+        limiter.hit("c")
+
+        info = limiter.info()
+        assert info["tracked_keys"] == 2
+        assert info["evicted_full"] == 1
+        # b was the least recently used; a kept its count
+        assert limiter.remaining("b") == {"p": 5}
+        assert limiter.remaining("a") == {"p": 3}
+        assert limiter.remaining("c") == {"p": 4}
+
+    def test_multi_policy_refusal(self, clock):
+        """Every policy must allow a request; the refusal reports the policy that clears last"""
+        limiter = SlidingWindowRateLimiter(
+            [RateLimitPolicy("burst", 2, 1), RateLimitPolicy("sustained", 4, 64)], buckets=4, clock=clock
+        )
+        assert limiter.hit("client").allowed
+        assert limiter.hit("client").allowed
+        refused = limiter.hit("client")
+        assert (refused.allowed, refused.policy, refused.retry_after) == (False, "burst", 1.25)
+        # A refused request is not counted against the policy that allowed it
+        assert limiter.remaining("client") == {"burst": 0, "sustained": 2}
+
+        clock.now = 2.0
+        assert limiter.hit("client").allowed
+        assert limiter.hit("client").allowed
+        refused = limiter.hit("client")
+        # Both refuse: burst clears at t=3.25, sustained only when slot [0, 16) expires at t=80
+        assert (refused.allowed, refused.policy, refused.retry_after) == (False, "sustained", 78.0)
+
+        clock.now = 3.25
+        assert limiter.hit("client").policy == "sustained"
+        clock.now = 80.0
+        assert limiter.hit("client").allowed
@@ -0,0 +1,182 @@
+"""
+Request audit log for the Gurukul Platform middleware
+Request records go onto a bounded in-process queue and a background task
+writes them to a capped Redis Stream in pipelined batches, so a request never
+waits on Redis for its audit entry. When Redis is slow or down the queue
+fills and further records are dropped and counted rather than held.
+
+Recent requests can be read back with read_recent_requests() or from the
+command line:
+    python -m middleware.audit_log --redis-url redis://localhost:6379 --count 20 --client-ip 203.0.113.7
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AUDIT_STREAM = os.getenv("SECURITY_AUDIT_STREAM", "security:request_log")
+AUDIT_STREAM_MAXLEN = int(os.getenv("SECURITY_AUDIT_STREAM_MAXLEN", "100000"))
+AUDIT_QUEUE_SIZE = int(os.getenv("SECURITY_AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("SECURITY_AUDIT_BATCH_SIZE", "500"))
+AUDIT_MAX_BACKOFF_SECONDS = 30
+
+
+class RequestAuditLog:
+    """Bounded queue of request records drained into a Redis Stream by one background task"""
+
+    def __init__(self, redis_client, stream: str = AUDIT_STREAM, maxlen: int = AUDIT_STREAM_MAXLEN,
+                 queue_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE):
+        self.redis_client = redis_client
+        self.stream = stream
+        self.maxlen = maxlen
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        # Created on first use, inside the serving event loop
+        self._queue: Optional["asyncio.Queue[Dict[str, Any]]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._failures = 0
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def record(self, entry: Dict[str, Any]):
+        """Queue an entry for writing; never blocks (call from the event loop)"""
+        if self._closed:
+            self.stats["dropped"] += 1
+            return
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # First use, or the old loop is gone (e.g. a test client per request)
+            if self._queue is not None:
+                self.stats["dropped"] += self._queue.qsize()
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._loop = loop
+            self._task = None
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return
+        self.stats["enqueued"] += 1
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Whatever queued up during the last write goes out in this one
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for entry in batch:
+                fields = {key: "" if value is None else value for key, value in entry.items()}
+                pipe.xadd(self.stream, fields, maxlen=self.maxlen, approximate=True)
+            await pipe.execute()
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+            self._failures = 0
+        except Exception as e:
+            self.stats["failed"] += len(batch)
+            self._failures += 1
+            backoff = min(2 ** (self._failures - 1), AUDIT_MAX_BACKOFF_SECONDS)
+            logger.error(f"Audit log write failed, dropped {len(batch)} entries, retrying in {backoff}s: {e}")
+            # Back off while Redis recovers; new records are dropped once the queue is full
+            await asyncio.sleep(backoff)
+
+    async def close(self, timeout: float = 5.0):
+        """Write what is queued (up to timeout), then stop the writer"""
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Audit log closed with {self._queue.qsize()} entries unwritten")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def info(self) -> Dict[str, Any]:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return {**self.stats, "queued": queued, "stream": self.stream, "maxlen": self.maxlen}
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def read_recent_requests(redis_client, count: int = 100, stream: str = AUDIT_STREAM,
+                         since_seconds: Optional[float] = None, client_ip: Optional[str] = None,
+                         path_prefix: Optional[str] = None, min_status: Optional[int] = None,
+                         max_scan: int = 10000) -> List[Dict[str, Any]]:
+    """
+    Most recent audit entries first, optionally filtered, from a synchronous client.
+    Scans back at most max_scan entries (or since_seconds) looking for matches.
+    """
+    low = f"{int((time.time() - since_seconds) * 1000)}-0" if since_seconds else "-"
+    high = "+"
+    page = min(max(count, 100), max_scan)
+    results: List[Dict[str, Any]] = []
+    scanned = 0
+    while len(results) < count and scanned < max_scan:
+        entries = redis_client.xrevrange(stream, max=high, min=low, count=page)
+        if not entries:
+            break
+        for entry_id, fields in entries:
+            scanned += 1
+            entry = {_decode(key): _decode(value) for key, value in fields.items()}
+            if client_ip and entry.get("client_ip") != client_ip:
+                continue
+            if path_prefix and not entry.get("path", "").startswith(path_prefix):
+                continue
+            if min_status and int(entry.get("status_code") or 0) < min_status:
+                continue
+            entry["id"] = _decode(entry_id)
+            results.append(entry)
+            if len(results) >= count:
+                break
+        # Continue strictly before the oldest entry seen
+        high = f"({_decode(entries[-1][0])}"
+    return results
+
+
+def main():
+    import redis
+
+    parser = argparse.ArgumentParser(description="Show recent requests from the security audit stream")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--stream", default=AUDIT_STREAM)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--since", type=float, help="only the last N seconds")
+    parser.add_argument("--client-ip")
+    parser.add_argument("--path-prefix")
+    parser.add_argument("--min-status", type=int, help="e.g. 400 for errors only")
+    args = parser.parse_args()
+
+    client = redis.from_url(args.redis_url)
+    for entry in read_recent_requests(client, args.count, args.stream, args.since,
+                                      args.client_ip, args.path_prefix, args.min_status):
+        print(json.dumps(entry))
+
+
+if __name__ == "__main__":
+    main()
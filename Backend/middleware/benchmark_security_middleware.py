@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Security middleware overhead benchmark.
+
+Calls ASGI apps directly (no server, no sockets) with a typical browser
+request and times each call, comparing a no-op app on its own with the same
+app wrapped in the previous BaseHTTPMiddleware-based SecurityMiddleware and in
+the current pure ASGI one. The legacy middleware is reproduced here without
+Redis, so both wrapped rows measure validation and header work only. With
+--redis-url the current middleware is also timed with its Redis rate limiter
+and request logging enabled.
+
+Usage:
+    python benchmark_security_middleware.py --requests 20000
+    python benchmark_security_middleware.py --redis-url redis://localhost:6379/15
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from middleware.rate_limit import RateLimitPolicy
+from middleware.security import SecurityMiddleware, SECURITY_HEADERS
+
+BODY = b'{"status":"ok"}'
+
+REQUEST_HEADERS = [
+    (b"host", b"api.gurukul.example"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"),
+    (b"accept", b"application/json, text/plain, */*"),
+    (b"accept-language", b"en-GB,en;q=0.9"),
+    (b"accept-encoding", b"gzip, deflate, br"),
+    (b"origin", b"https://app.gurukul.example"),
+    (b"referer", b"https://app.gurukul.example/dashboard?tab=progress"),
+    (b"authorization", b"Bearer eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + b"x" * 180),
+    (b"cookie", b"session=" + b"y" * 120),
+    (b"x-forwarded-for", b"203.0.113.7, 10.0.0.2"),
+]
+
+
+async def noop_app(scope, receive, send):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(BODY)).encode())]
+    })
+    await send({"type": "http.response.body", "body": BODY})
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    """The dispatch-based middleware this module replaced, without Redis."""
+
+    suspicious_patterns = ["<script", "javascript:", "data:text/html", "eval(", "document.cookie", "window.location"]
+
+    async def dispatch(self, request, call_next):
+        content_length = request.headers.get("content-length")
+        if content_length and int(content_length) > 10 * 1024 * 1024:
+            return JSONResponse(status_code=400, content={"error": "Invalid request format"})
+        url_str = str(request.url).lower()
+        for pattern in self.suspicious_patterns:
+            if pattern in url_str:
+                return JSONResponse(status_code=400, content={"error": "Invalid request format"})
+        for header_name, header_value in request.headers.items():
+            header_str = f"{header_name}:{header_value}".lower()
+            for pattern in self.suspicious_patterns:
+                if pattern in header_str:
+                    return JSONResponse(status_code=400, content={"error": "Invalid request format"})
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS:
+            response.headers[name.decode()] = value.decode()
+        return response
+
+
+def make_scope():
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "https", "path": "/api/v1/progress",
+        "raw_path": b"/api/v1/progress", "query_string": b"user_id=u123&range=30d",
+        "root_path": "", "headers": REQUEST_HEADERS,
+        "client": ("10.0.0.2", 52314), "server": ("10.0.0.10", 8000),
+    }
+
+
+async def time_app(app, requests: int, warmup: int = 500):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(warmup):
+        await app(make_scope(), receive, send)
+    timings = []
+    for _ in range(requests):
+        scope = make_scope()
+        started = time.perf_counter_ns()
+        await app(scope, receive, send)
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+    return timings
+
+
+def report(label: str, timings, baseline_mean: float):
+    mean = statistics.mean(timings)
+    print(f"{label:<18}{mean / 1000:>10.1f}{timings[len(timings) // 2] / 1000:>10.1f}"
+          f"{timings[int(len(timings) * 0.99)] / 1000:>10.1f}{(mean - baseline_mean) / 1000:>14.1f}")
+
+
+async def main(args):
+    print(f"{'app':<18}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'overhead us':>14}")
+    baseline = await time_app(noop_app, args.requests)
+    baseline_mean = statistics.mean(baseline)
+    report("no-op", baseline, baseline_mean)
+    report("legacy middleware", await time_app(LegacySecurityMiddleware(noop_app), args.requests), baseline_mean)
+    report("asgi middleware", await time_app(SecurityMiddleware(noop_app), args.requests), baseline_mean)
+
+    if args.redis_url:
+        import redis.asyncio as aioredis
+        client = aioredis.Redis.from_url(args.redis_url)
+        middleware = SecurityMiddleware(noop_app, redis_client=client)
+        # Keep the benchmark client under its limit
+        middleware.rate_limits["api"] = [RateLimitPolicy(requests=10 ** 9, window=3600)]
+        report("asgi + redis", await time_app(middleware, args.requests), baseline_mean)
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request overhead of the security middleware")
+    parser.add_argument("--requests", type=int, default=20000, help="timed requests per app")
+    parser.add_argument("--redis-url", help="also time the Redis-backed rate limiter and request log")
+    asyncio.run(main(parser.parse_args()))
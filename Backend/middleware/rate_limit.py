@@ -0,0 +1,68 @@
+"""
+Redis rate limiting for the Gurukul Platform middleware
+GCRA (sliding window) limits checked and recorded atomically in one Lua
+script, shared with the Financial Crew limiter through redis_gcra
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from redis_gcra import GcraLimiter, GcraPolicy
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """At most `requests` requests in any `window` seconds"""
+    requests: int
+    window: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.requests}r{self.window}s"
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a check, for the policy that denied it or came closest to denying it"""
+    limited: bool
+    limit: int
+    remaining: int
+    reset_after: int   # seconds until the policy is fully replenished
+    retry_after: int   # seconds until the request would be allowed (0 unless limited)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_after),
+        }
+        if self.limited:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RedisRateLimiter:
+    """Checks keys against one or more policies with a single EVALSHA per check (redis.asyncio client)"""
+
+    def __init__(self, redis_client, prefix: str = "rate_limit"):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self._gcra = GcraLimiter(redis_client, prefix)
+
+    @staticmethod
+    def _policies(policies: Sequence[RateLimitPolicy]) -> List[GcraPolicy]:
+        return [(policy.name, policy.requests, policy.window) for policy in policies]
+
+    async def check(self, key: str, policies: Sequence[RateLimitPolicy], cost: int = 1,
+                    record: bool = True) -> RateLimitResult:
+        """Check key against every policy, recording the request if all allow it"""
+        reply = await self._gcra.acheck(key, self._policies(policies), cost=cost, record=record)
+        return RateLimitResult(
+            limited=reply.limited,
+            limit=policies[reply.index].requests,
+            remaining=reply.remaining,
+            reset_after=reply.reset_after,
+            retry_after=reply.retry_after,
+        )
+
+    async def reset(self, key: str, policies: Sequence[RateLimitPolicy]) -> bool:
+        return bool(await self.redis_client.delete(*self._gcra.keys(key, self._policies(policies))))
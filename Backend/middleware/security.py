@@ -1,209 +1,264 @@
 """
 Security middleware for Gurukul Platform
 Comprehensive security enhancements for production deployment
+
+SecurityMiddleware is a plain ASGI middleware rather than a BaseHTTPMiddleware:
+responses, including streaming ones, pass straight through to the server with
+only their start message touched, and no extra task or memory stream is set
+up per request. Redis is used through the asyncio client of the shared
+redis_connection pool so rate limiting never blocks the event loop.
 """
 
-import os
+import re
 import time
-import hashlib
 import logging
-from typing import Dict, List, Optional, Callable
-from fastapi import Request, Response, HTTPException, status
-from fastapi.middleware.base import BaseHTTPMiddleware
+from typing import List, Optional, Tuple
+from urllib.parse import unquote_plus
+from fastapi import status
 from fastapi.responses import JSONResponse
-import redis
-from datetime import datetime, timedelta
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import redis.asyncio as aioredis
+from datetime import datetime
+
+from redis_connection import get_redis_connection
+
+from .audit_log import RequestAuditLog
+from .rate_limit import RateLimitPolicy, RateLimitResult, RedisRateLimiter
 
 logger = logging.getLogger(__name__)
 
-class SecurityMiddleware(BaseHTTPMiddleware):
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB limit
+
+# Markers of script injection, matched in one pass over lowercased text
+# (lower() plus a case-sensitive search is several times faster than IGNORECASE)
+SUSPICIOUS_PATTERNS = [
+    "<script", "javascript:", "data:text/html",
+    "eval(", "document.cookie", "window.location"
+]
+SUSPICIOUS_RE = re.compile("|".join(re.escape(p) for p in SUSPICIOUS_PATTERNS))
+
+# Headers that are echoed into pages, logs or redirects and so worth scanning;
+# credentials and cookies are opaque tokens and are left alone
+SCANNED_HEADERS = frozenset({
+    b"host", b"origin", b"referer", b"user-agent", b"content-type",
+    b"x-forwarded-for", b"x-forwarded-host", b"x-real-ip"
+})
+
+SECURITY_HEADERS: List[Tuple[bytes, bytes]] = [
+    (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Content-Security-Policy": (
+            "default-src 'self'; "
+            "script-src 'self' 'unsafe-inline'; "
+            "style-src 'self' 'unsafe-inline'; "
+            "img-src 'self' data: https:; "
+            "font-src 'self'; "
+            "connect-src 'self' https://*.supabase.co wss://*.supabase.co"
+        ),
+        "Permissions-Policy": (
+            "geolocation=(), microphone=(), camera=(), "
+            "payment=(), usb=(), magnetometer=(), gyroscope=()"
+        ),
+        "Cache-Control": "no-store, no-cache, must-revalidate, proxy-revalidate",
+        "Pragma": "no-cache",
+        "Expires": "0"
+    }.items()
+]
+SECURITY_HEADER_NAMES = frozenset(name for name, _ in SECURITY_HEADERS)
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+class SecurityMiddleware:
     """Comprehensive security middleware"""
     
-    def __init__(self, app, redis_client: Optional[redis.Redis] = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, redis_client: Optional[aioredis.Redis] = None,
+                 audit_log: Optional[RequestAuditLog] = None):
+        self.app = app
         self.redis_client = redis_client
+        self.rate_limiter = RedisRateLimiter(redis_client) if redis_client else None
+        if audit_log is None and redis_client:
+            audit_log = RequestAuditLog(redis_client)
+        self.audit_log = audit_log
+        # Every policy in a list is enforced together on the client's key
         self.rate_limits = {
-            "default": {"requests": 100, "window": 60},  # 100 requests per minute
-            "auth": {"requests": 5, "window": 60},       # 5 auth attempts per minute
-            "api": {"requests": 1000, "window": 3600},   # 1000 API calls per hour
+            "default": [RateLimitPolicy(requests=100, window=60)],  # 100 requests per minute
+            "auth": [RateLimitPolicy(requests=5, window=60)],       # 5 auth attempts per minute
+            "api": [RateLimitPolicy(requests=1000, window=3600)],   # 1000 API calls per hour
         }
         
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Main security middleware dispatcher"""
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Main security middleware entry point"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Security headers
         start_time = time.time()
+        headers = scope["headers"]
+        client_ip = self._get_client_ip(scope)
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        response_headers: List[Tuple[bytes, bytes]] = []
+        response_started = False
+        extra_headers: List[Tuple[bytes, bytes]] = []
+        
+        async def send_with_headers(message: Message):
+            nonlocal status_code, response_headers, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                # Security headers replace any the app set itself
+                response_headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in SECURITY_HEADER_NAMES
+                ]
+                response_headers.extend(SECURITY_HEADERS)
+                response_headers.extend(extra_headers)
+                message["headers"] = response_headers
+            await send(message)
         
         try:
             # Rate limiting
-            if not await self._check_rate_limit(request):
-                return JSONResponse(
+            rate_limit = await self._check_rate_limit(scope["path"], client_ip)
+            if rate_limit:
+                extra_headers = [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in rate_limit.headers().items()
+                ]
+            if rate_limit and rate_limit.limited:
+                response = JSONResponse(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={"error": "Rate limit exceeded", "retry_after": 60}
+                    content={"error": "Rate limit exceeded", "retry_after": rate_limit.retry_after},
+                    headers=rate_limit.headers()
                 )
+                await response(scope, receive, send)
+                return
             
             # Input validation
-            if not await self._validate_request(request):
-                return JSONResponse(
+            if not self._validate_request(scope, headers):
+                response = JSONResponse(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     content={"error": "Invalid request format"}
                 )
+                await response(scope, receive, send)
+                return
             
             # Process request
-            response = await call_next(request)
-            
-            # Add security headers
-            response = self._add_security_headers(response)
-            
-            # Log request
-            await self._log_request(request, response, time.time() - start_time)
-            
-            return response
+            await self.app(scope, receive, send_with_headers)
             
         except Exception as e:
             logger.error(f"Security middleware error: {e}")
-            return JSONResponse(
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"error": "Internal server error"}
             )
+            await response(scope, receive, send)
+            return
+        
+        # Log request
+        self._log_request(scope, client_ip, status_code, response_headers, time.time() - start_time)
     
-    async def _check_rate_limit(self, request: Request) -> bool:
-        """Check rate limiting"""
-        if not self.redis_client:
-            return True  # Skip if Redis not available
+    async def _check_rate_limit(self, path: str, client_ip: str) -> Optional[RateLimitResult]:
+        """Check and record the request against its rate limits (None if not checked)"""
+        if not self.rate_limiter:
+            return None  # Skip if Redis not available
         
         try:
-            client_ip = self._get_client_ip(request)
-            endpoint = request.url.path
-            
             # Determine rate limit type
             limit_type = "default"
-            if "/auth" in endpoint:
+            if "/auth" in path:
                 limit_type = "auth"
-            elif "/api" in endpoint:
+            elif "/api" in path:
                 limit_type = "api"
             
-            limits = self.rate_limits[limit_type]
-            key = f"rate_limit:{client_ip}:{limit_type}"
-            
-            # Check current count
-            current = self.redis_client.get(key)
-            if current is None:
-                # First request
-                self.redis_client.setex(key, limits["window"], 1)
-                return True
-            
-            current_count = int(current)
-            if current_count >= limits["requests"]:
-                return False
-            
-            # Increment counter
-            self.redis_client.incr(key)
-            return True
+            # Atomic check-and-record in one round-trip
+            return await self.rate_limiter.check(f"{client_ip}:{limit_type}", self.rate_limits[limit_type])
             
         except Exception as e:
             logger.error(f"Rate limiting error: {e}")
-            return True  # Allow request if rate limiting fails
+            return None  # Allow request if rate limiting fails
     
-    async def _validate_request(self, request: Request) -> bool:
+    def _validate_request(self, scope: Scope, headers: List[Tuple[bytes, bytes]]) -> bool:
         """Validate request format and content"""
         try:
-            # Check content length
-            content_length = request.headers.get("content-length")
-            if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
-                return False
-            
-            # Check for suspicious patterns
-            suspicious_patterns = [
-                "<script", "javascript:", "data:text/html",
-                "eval(", "document.cookie", "window.location"
-            ]
-            
-            # Check URL for suspicious content
-            url_str = str(request.url).lower()
-            for pattern in suspicious_patterns:
-                if pattern in url_str:
-                    logger.warning(f"Suspicious pattern detected in URL: {pattern}")
-                    return False
-            
-            # Check headers for suspicious content
-            for header_name, header_value in request.headers.items():
-                header_str = f"{header_name}:{header_value}".lower()
-                for pattern in suspicious_patterns:
-                    if pattern in header_str:
-                        logger.warning(f"Suspicious pattern detected in header: {pattern}")
+            for name, value in headers:
+                # Check content length
+                if name == b"content-length":
+                    if int(value) > MAX_CONTENT_LENGTH:
+                        return False
+                # Check relevant headers for suspicious content
+                elif name in SCANNED_HEADERS:
+                    match = SUSPICIOUS_RE.search(value.decode("latin-1").lower())
+                    if match:
+                        logger.warning(f"Suspicious pattern detected in header {name.decode('latin-1')}: {match.group(0)}")
                         return False
             
+            # Check path and query string (decoded, so encoding doesn't hide a pattern)
+            match = SUSPICIOUS_RE.search(scope["path"].lower())
+            query_string = scope.get("query_string", b"")
+            if not match and query_string:
+                match = SUSPICIOUS_RE.search(unquote_plus(query_string.decode("latin-1")).lower())
+            if match:
+                logger.warning(f"Suspicious pattern detected in URL: {match.group(0)}")
+                return False
+            
             return True
             
         except Exception as e:
             logger.error(f"Request validation error: {e}")
             return True  # Allow request if validation fails
     
-    def _add_security_headers(self, response: Response) -> Response:
-        """Add comprehensive security headers"""
-        security_headers = {
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-            "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
-            "Referrer-Policy": "strict-origin-when-cross-origin",
-            "Content-Security-Policy": (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline'; "
-                "style-src 'self' 'unsafe-inline'; "
-                "img-src 'self' data: https:; "
-                "font-src 'self'; "
-                "connect-src 'self' https://*.supabase.co wss://*.supabase.co"
-            ),
-            "Permissions-Policy": (
-                "geolocation=(), microphone=(), camera=(), "
-                "payment=(), usb=(), magnetometer=(), gyroscope=()"
-            ),
-            "Cache-Control": "no-store, no-cache, must-revalidate, proxy-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
-        }
-        
-        for header, value in security_headers.items():
-            response.headers[header] = value
-        
-        return response
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == name:
+                return value.decode("latin-1")
+        return None
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_client_ip(self, scope: Scope) -> str:
         """Get client IP address"""
         # Check for forwarded headers (for reverse proxies)
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = self._header(scope, b"x-forwarded-for")
         if forwarded_for:
             return forwarded_for.split(",")[0].strip()
         
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = self._header(scope, b"x-real-ip")
         if real_ip:
             return real_ip
         
-        return request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        return client[0] if client else "unknown"
     
-    async def _log_request(self, request: Request, response: Response, duration: float):
+    def _log_request(self, scope: Scope, client_ip: str, status_code: int,
+                     response_headers: List[Tuple[bytes, bytes]], duration: float):
         """Log request for security monitoring"""
         try:
+            content_length = "0"
+            for name, value in response_headers:
+                if name == b"content-length":
+                    content_length = value.decode("latin-1")
             log_data = {
                 "timestamp": datetime.utcnow().isoformat(),
-                "method": request.method,
-                "path": request.url.path,
-                "client_ip": self._get_client_ip(request),
-                "user_agent": request.headers.get("User-Agent", ""),
-                "status_code": response.status_code,
+                "method": scope["method"],
+                "path": scope["path"],
+                "client_ip": client_ip,
+                "user_agent": self._header(scope, b"user-agent") or "",
+                "status_code": status_code,
                 "duration": round(duration, 3),
-                "content_length": response.headers.get("content-length", "0")
+                "content_length": content_length
             }
             
             # Log to structured logger
             logger.info("Request processed", extra=log_data)
             
-            # Store in Redis for monitoring (if available)
-            if self.redis_client:
-                key = f"request_log:{int(time.time())}"
-                self.redis_client.setex(key, 3600, str(log_data))  # Keep for 1 hour
+            # Queue for the Redis audit stream (if available); written in the background
+            if self.audit_log:
+                self.audit_log.record(log_data)
                 
         except Exception as e:
             logger.error(f"Request logging error: {e}")
@@ -232,9 +287,7 @@ class InputSanitizer:
     @staticmethod
     def validate_email(email: str) -> bool:
         """Validate email format"""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(EMAIL_RE.match(email))
     
     @staticmethod
     def validate_api_key(api_key: str) -> bool:
@@ -251,18 +304,28 @@ def setup_security_middleware(app, redis_url: Optional[str] = None):
     """Setup security middleware for FastAPI app"""
     redis_client = None
     
+    audit_log = None
+    
     if redis_url:
         try:
-            import redis
-            redis_client = redis.from_url(redis_url)
-            redis_client.ping()  # Test connection
+            connection = get_redis_connection(redis_url)
+            # Test connection before committing to Redis-backed limits
+            connection.ping()
+            redis_client = connection.async_client
+            audit_log = RequestAuditLog(redis_client)
+            
+            @app.on_event("shutdown")
+            async def close_security_redis():
+                await audit_log.close()
+                await connection.aclose()
+            
             logger.info("✅ Redis connected for security middleware")
         except Exception as e:
             logger.warning(f"⚠️ Redis connection failed: {e}")
             redis_client = None
     
     # Add security middleware
-    app.add_middleware(SecurityMiddleware, redis_client=redis_client)
+    app.add_middleware(SecurityMiddleware, redis_client=redis_client, audit_log=audit_log)
     logger.info("✅ Security middleware configured")
     
     return app
@@ -3,15 +3,18 @@ Advanced Forecasting API Integration
 Integrates Prophet and ARIMA models with the existing Gurukul orchestration system
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime, timedelta
+import os
 import json
+import time
 import asyncio
 from contextlib import asynccontextmanager
 
@@ -20,11 +23,34 @@ from .enhanced_prophet_model import EnhancedProphetModel
 from .enhanced_arima_model import EnhancedARIMAModel
 from .model_performance_evaluator import ModelPerformanceEvaluator
 from .smart_model_selector import SmartModelSelector
+from .forecast_model_cache import ForecastModelCache, series_fingerprint
+from .model_tournament import CANDIDATE_MODELS
+from .forecast_jobs import ForecastJobRunner, ForecastQueueFull, SlotReservation, fit_model, update_model
+# Imported by module name, like the model classes that record into it
+from fit_counter import count_fits
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BATCH_MAX_SERIES = int(os.getenv("FORECAST_BATCH_MAX_SERIES", "500"))
+# Series of one batch in flight at once; enough to keep the job pool busy
+BATCH_CONCURRENCY = int(os.getenv("FORECAST_BATCH_CONCURRENCY", "8"))
+# A series that grew by at most this many points since its cached fit is
+# updated incrementally instead of refitted
+INCREMENTAL_MAX_NEW_POINTS = int(os.getenv("FORECAST_INCREMENTAL_MAX_NEW_POINTS", "7"))
+
+
+def forecast_records(forecast_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """forecast_data rows built column-wise instead of row by row"""
+    records = pd.DataFrame({
+        "date": pd.to_datetime(forecast_df['ds']).dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        "predicted_value": forecast_df['yhat'].astype(float)
+    })
+    for column, name in (('yhat_lower', 'lower_bound'), ('yhat_upper', 'upper_bound')):
+        records[name] = forecast_df[column].astype(float) if column in forecast_df.columns else None
+    return records.to_dict('records')
+
 # Pydantic models for API
 class ForecastRequest(BaseModel):
     """Request model for forecasting"""
@@ -45,6 +71,22 @@ class ForecastResponse(BaseModel):
     recommendations: List[str]
     timestamp: str
     language: str
+    model_fits: Dict[str, int] = Field(default_factory=dict, description="Model fits made for this request, by kind")
+
+class BatchSeries(BaseModel):
+    """One series of a batch forecast"""
+    series_id: str = Field(..., description="Caller's identifier, echoed on the result line")
+    data: List[Dict[str, Union[str, float]]] = Field(..., description="Time series data with 'date' and 'value' fields")
+    metric_type: Optional[str] = Field(None, description="Overrides the batch metric_type")
+    model_preference: Optional[str] = Field(None, description="Overrides the batch model_preference")
+
+class BatchForecastRequest(BaseModel):
+    """Request model for forecasting many series at once"""
+    series: List[BatchSeries] = Field(..., min_length=1, max_length=BATCH_MAX_SERIES)
+    metric_type: str = Field("general", description="Type of metric: 'probability', 'load', or 'general'")
+    forecast_periods: int = Field(30, ge=1, le=365, description="Number of periods to forecast")
+    model_preference: Optional[str] = Field(None, description="Preferred model: 'prophet', 'arima', or 'auto'")
+    user_id: Optional[str] = Field(None, description="User ID for tracking")
 
 class ModelComparisonRequest(BaseModel):
     """Request model for model comparison"""
@@ -69,7 +111,43 @@ class AdvancedForecastingAPI:
         """Initialize the forecasting API"""
         self.performance_evaluator = ModelPerformanceEvaluator()
         self.active_models = {}
-        self.forecast_cache = {}
+        self.forecast_cache = ForecastModelCache(prophet_model_class=EnhancedProphetModel)
+        self.fit_stats = {"requests": 0, "fits": {}}
+        self.jobs = ForecastJobRunner()
+    
+    def _model_hyperparameters(self, model_choice: str, metric_type: str) -> Dict[str, Any]:
+        """Settings that change the fitted model, as part of its cache key"""
+        if model_choice == "prophet":
+            return EnhancedProphetModel(metric_type).config
+        if model_choice == "arima":
+            arima = EnhancedARIMAModel(metric_type)
+            return {**arima.param_ranges, "search_mode": arima.search_mode}
+        if model_choice in CANDIDATE_MODELS:
+            return CANDIDATE_MODELS[model_choice](metric_type).export_model_config()
+        return {name: self._model_hyperparameters(name, metric_type) for name in CANDIDATE_MODELS}
+    
+    async def _fit_cached(self, model_name: str, df: pd.DataFrame, metric_type: str):
+        """Fit a model on df in the job pool, reusing an identical earlier fit"""
+        key = series_fingerprint(df, metric_type, model_name, self._model_hyperparameters(model_name, metric_type))
+        cached = self.forecast_cache.get(key)
+        if cached is not None:
+            return cached["model"]
+        
+        model = await self.jobs.run(f"fit_{model_name}", fit_model, model_name, df, metric_type)
+        self.forecast_cache.put(key, {"model": model, "model_used": model_name})
+        return model
+        
+    def _previous_fit(self, df: pd.DataFrame, metric_type: str, model_choice: str) -> Optional[Dict[str, Any]]:
+        """Cached fit of this series as it was a few points ago, if there is one"""
+        hyperparameters = self._model_hyperparameters(model_choice, metric_type)
+        for new_points in range(1, INCREMENTAL_MAX_NEW_POINTS + 1):
+            if len(df) - new_points < 10:
+                break
+            key = series_fingerprint(df.iloc[:-new_points], metric_type, model_choice, hyperparameters)
+            entry = self.forecast_cache.get(key, count_miss=False)
+            if entry is not None:
+                return entry
+        return None
         
     def prepare_data_from_request(self, request_data: List[Dict[str, Union[str, float]]]) -> pd.DataFrame:
         """
@@ -120,8 +198,30 @@ class AdvancedForecastingAPI:
             request: Forecast request
             
         Returns:
-            Forecast response
+            Forecast response, including the number of model fits it took
+        
+        Raises ForecastQueueFull when every worker is busy and the queue is full
         """
+        async with self.jobs.slot():
+            return await self._counted_forecast(request)
+    
+    async def _counted_forecast(self, request: ForecastRequest) -> ForecastResponse:
+        """Generate a forecast inside a worker slot, recording its model fits"""
+        with count_fits() as fit_counts:
+            response = await self._generate_forecast(request)
+        
+        self._record_fit_stats(fit_counts)
+        response.model_fits = fit_counts
+        return response
+    
+    def _record_fit_stats(self, fit_counts: Dict[str, int]):
+        """Add one forecast's fits to the /forecast/metrics totals"""
+        self.fit_stats["requests"] += 1
+        for kind, count in fit_counts.items():
+            self.fit_stats["fits"][kind] = self.fit_stats["fits"].get(kind, 0) + count
+    
+    async def _generate_forecast(self, request: ForecastRequest) -> ForecastResponse:
+        """Forecast one series and wrap it in the API response"""
         try:
             logger.info(f"Generating forecast for {request.metric_type} metric, {request.forecast_periods} periods")
             
@@ -135,76 +235,21 @@ class AdvancedForecastingAPI:
                     detail=f"Insufficient data points: {len(df)}. Need at least 10 points."
                 )
             
-            # Select model
-            if request.model_preference == "auto" or request.model_preference is None:
-                selector = SmartModelSelector(request.metric_type)
-                selection_result = selector.select_best_model(df)
-                
-                if selection_result['selected_model'] == 'prophet':
-                    model = selection_result['model_object']
-                elif selection_result['selected_model'] == 'arima':
-                    model = selection_result['model_object']
-                else:
-                    # Fallback to simple forecast
-                    return await self._generate_simple_forecast(request, df)
-                
-                model_used = selection_result['selected_model']
-                
-            elif request.model_preference == "prophet":
-                model = EnhancedProphetModel(request.metric_type)
-                model.fit(df)
-                model_used = "prophet"
-                
-            elif request.model_preference == "arima":
-                model = EnhancedARIMAModel(request.metric_type)
-                model.fit(df)
-                model_used = "arima"
-                
-            else:
+            model_choice = request.model_preference or "auto"
+            if model_choice not in ("auto", "prophet", "arima"):
                 raise HTTPException(status_code=400, detail="Invalid model preference")
             
-            # Generate forecast
-            forecast_df = model.predict(periods=request.forecast_periods)
-            
-            # Calculate performance metrics if possible
-            accuracy_metrics = {}
-            if len(df) > 20:
-                try:
-                    train_data, test_data = self.performance_evaluator.train_test_split(df, test_size=0.2)
-                    temp_model = type(model)(request.metric_type)
-                    temp_model.fit(train_data)
-                    temp_predictions = temp_model.predict(periods=len(test_data))
-                    
-                    if hasattr(temp_predictions, 'values'):
-                        pred_values = temp_predictions['yhat'].values if 'yhat' in temp_predictions.columns else temp_predictions.values
-                    else:
-                        pred_values = temp_predictions
-                    
-                    accuracy_metrics = self.performance_evaluator.calculate_accuracy_metrics(
-                        test_data['y'].values, pred_values
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not calculate accuracy metrics: {e}")
-                    accuracy_metrics = {"note": "Accuracy metrics not available"}
+            result = await self._forecast_series(df, request.metric_type, model_choice, request.forecast_periods)
+            if result is None:
+                # Fallback to simple forecast
+                return await self._generate_simple_forecast(request, df)
+            model_used, forecast_df, accuracy_metrics = result
             
             # Prepare forecast data for response
-            forecast_data = []
-            for _, row in forecast_df.iterrows():
-                forecast_data.append({
-                    "date": row['ds'].isoformat(),
-                    "predicted_value": float(row['yhat']),
-                    "lower_bound": float(row['yhat_lower']) if 'yhat_lower' in row else None,
-                    "upper_bound": float(row['yhat_upper']) if 'yhat_upper' in row else None
-                })
+            forecast_data = forecast_records(forecast_df)
             
             # Generate summary
-            summary = {
-                "forecast_start": forecast_df['ds'].min().isoformat(),
-                "forecast_end": forecast_df['ds'].max().isoformat(),
-                "mean_prediction": float(forecast_df['yhat'].mean()),
-                "trend": "increasing" if forecast_df['yhat'].iloc[-1] > forecast_df['yhat'].iloc[0] else "decreasing",
-                "confidence_interval_width": float(forecast_df['yhat_upper'].mean() - forecast_df['yhat_lower'].mean()) if 'yhat_upper' in forecast_df.columns else None
-            }
+            summary = self._forecast_summary(forecast_df)
             
             # Generate recommendations
             recommendations = self._generate_recommendations(df, forecast_df, accuracy_metrics, request.metric_type)
@@ -231,43 +276,122 @@ class AdvancedForecastingAPI:
             logger.error(f"Forecast generation failed: {e}")
             raise HTTPException(status_code=500, detail=f"Forecast generation failed: {str(e)}")
     
-    async def _generate_simple_forecast(self, request: ForecastRequest, df: pd.DataFrame) -> ForecastResponse:
-        """Generate simple linear forecast as fallback"""
-        try:
-            # Simple linear trend forecast
-            x = np.arange(len(df))
-            y = df['y'].values
+    async def _forecast_series(self, df: pd.DataFrame, metric_type: str, model_choice: str,
+                               periods: int) -> Optional[Tuple[str, pd.DataFrame, Dict[str, Any]]]:
+        """
+        Select or reuse a model for one prepared series, forecast, and score it
+        on a holdout split
+        
+        Returns:
+            (model_used, forecast_df, accuracy_metrics), or None when auto
+            selection found no usable model
+        """
+        # Reuse the fitted model (and its accuracy metrics) for an unchanged series
+        cache_key = series_fingerprint(
+            df, metric_type, model_choice,
+            self._model_hyperparameters(model_choice, metric_type)
+        )
+        cached = self.forecast_cache.get(cache_key)
+        previous = self._previous_fit(df, metric_type, model_choice) if cached is None else None
+        
+        holdout_metrics = None
+        if cached is not None:
+            model = cached["model"]
+            model_used = cached["model_used"]
+            holdout_metrics = cached.get("accuracy_metrics")
+            logger.info(f"Reusing cached {model_used} model for {metric_type} metric")
+        elif previous is not None:
+            # The series only grew by a few points: update yesterday's fit
+            # instead of selecting and training from scratch
+            model_used = previous["model_used"]
+            model = await self.jobs.run(f"update_{model_used}", update_model, previous["model"], df)
+            if getattr(model, "update_stats", {}).get("mode") != "full":
+                # Holdout metrics from the last full fit still describe the model
+                holdout_metrics = previous.get("accuracy_metrics")
+            logger.info(f"Updated cached {model_used} model for {metric_type} metric: {getattr(model, 'update_stats', {})}")
+        # Select model
+        elif model_choice == "auto":
+            # The tournament trains in its own pool and quick-selection fits in
+            # the job pool; the thread only waits on them
+            selector = SmartModelSelector(
+                metric_type,
+                fit_model=lambda name, frame: self.jobs.run_blocking(
+                    f"fit_{name}", fit_model, name, frame, metric_type
+                )
+            )
+            selection_result = await self.jobs.run_in_thread("selection", selector.select_best_model, df)
             
-            # Fit linear regression
-            coeffs = np.polyfit(x, y, 1)
+            if selection_result.get('model_object') is None:
+                return None
             
-            # Generate future predictions
-            future_x = np.arange(len(df), len(df) + request.forecast_periods)
-            future_y = np.polyval(coeffs, future_x)
+            model = selection_result['model_object']
+            model_used = selection_result['selected_model']
             
-            # Create future dates
-            last_date = df['ds'].max()
-            future_dates = pd.date_range(
-                start=last_date + timedelta(days=1),
-                periods=request.forecast_periods,
-                freq='D'
-            )
+            # The selector already scored each candidate on the same 80/20 split
+            selection_eval = selection_result.get('evaluation_results', {}).get(model_used, {})
+            if 'accuracy_metrics' in selection_eval:
+                holdout_metrics = selection_eval['accuracy_metrics']
+        else:
+            model = await self._fit_cached(model_choice, df, metric_type)
+            model_used = model_choice
+        
+        # Calculate performance metrics if possible, unless selection or the cache already did
+        accuracy_metrics = holdout_metrics
+        if accuracy_metrics is None:
+            accuracy_metrics = {}
+            if len(df) > 20:
+                try:
+                    train_data, test_data = self.performance_evaluator.train_test_split(df, test_size=0.2)
+                    temp_model = await self._fit_cached(model_used, train_data, metric_type)
+                    temp_predictions = await self.jobs.run_in_thread("predict", temp_model.predict, len(test_data))
+                    
+                    if hasattr(temp_predictions, 'values'):
+                        pred_values = temp_predictions['yhat'].values if 'yhat' in temp_predictions.columns else temp_predictions.values
+                    else:
+                        pred_values = temp_predictions
+                    
+                    accuracy_metrics = self.performance_evaluator.calculate_accuracy_metrics(
+                        test_data['y'].values, pred_values
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not calculate accuracy metrics: {e}")
+                    accuracy_metrics = {"note": "Accuracy metrics not available"}
+        
+        if cached is None or "accuracy_metrics" not in cached:
+            self.forecast_cache.put(cache_key, {
+                "model": model,
+                "model_used": model_used,
+                "accuracy_metrics": accuracy_metrics
+            })
+        
+        # Generate forecast
+        forecast_df = await self.jobs.run_in_thread("predict", model.predict, periods)
+        return model_used, forecast_df, accuracy_metrics
+    
+    def _forecast_summary(self, forecast_df: pd.DataFrame) -> Dict[str, Any]:
+        """Headline numbers of a forecast frame"""
+        return {
+            "forecast_start": forecast_df['ds'].min().isoformat(),
+            "forecast_end": forecast_df['ds'].max().isoformat(),
+            "mean_prediction": float(forecast_df['yhat'].mean()),
+            "trend": "increasing" if forecast_df['yhat'].iloc[-1] > forecast_df['yhat'].iloc[0] else "decreasing",
+            "confidence_interval_width": float(forecast_df['yhat_upper'].mean() - forecast_df['yhat_lower'].mean()) if 'yhat_upper' in forecast_df.columns else None
+        }
+    
+    async def _generate_simple_forecast(self, request: ForecastRequest, df: pd.DataFrame) -> ForecastResponse:
+        """Generate simple linear forecast as fallback"""
+        try:
+            forecast_df, slope = self._linear_trend_forecast(df, request.forecast_periods)
+            future_dates, future_y = forecast_df['ds'], forecast_df['yhat'].values
             
             # Prepare forecast data
-            forecast_data = []
-            for i, (date, value) in enumerate(zip(future_dates, future_y)):
-                forecast_data.append({
-                    "date": date.isoformat(),
-                    "predicted_value": float(value),
-                    "lower_bound": None,
-                    "upper_bound": None
-                })
+            forecast_data = forecast_records(forecast_df)
             
             summary = {
-                "forecast_start": future_dates[0].isoformat(),
-                "forecast_end": future_dates[-1].isoformat(),
+                "forecast_start": future_dates.iloc[0].isoformat(),
+                "forecast_end": future_dates.iloc[-1].isoformat(),
                 "mean_prediction": float(np.mean(future_y)),
-                "trend": "increasing" if coeffs[0] > 0 else "decreasing",
+                "trend": "increasing" if slope > 0 else "decreasing",
                 "confidence_interval_width": None
             }
             
@@ -292,6 +416,17 @@ class AdvancedForecastingAPI:
             logger.error(f"Simple forecast generation failed: {e}")
             raise HTTPException(status_code=500, detail=f"Simple forecast failed: {str(e)}")
     
+    def _linear_trend_forecast(self, df: pd.DataFrame, periods: int) -> Tuple[pd.DataFrame, float]:
+        """Daily linear-trend extrapolation (ds, yhat) and its slope"""
+        # Fit linear regression
+        x = np.arange(len(df))
+        coeffs = np.polyfit(x, df['y'].values, 1)
+        
+        # Generate future predictions
+        future_x = np.arange(len(df), len(df) + periods)
+        future_dates = pd.date_range(start=df['ds'].max() + timedelta(days=1), periods=periods, freq='D')
+        return pd.DataFrame({'ds': future_dates, 'yhat': np.polyval(coeffs, future_x)}), float(coeffs[0])
+    
     def _generate_recommendations(self, historical_data: pd.DataFrame, forecast_data: pd.DataFrame, 
                                 accuracy_metrics: Dict[str, float], metric_type: str) -> List[str]:
         """Generate recommendations based on forecast results"""
@@ -337,6 +472,139 @@ class AdvancedForecastingAPI:
             "language": language
         }
 
+    def prepare_batch_from_request(self, series: List[BatchSeries]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        prepare_data_from_request for a whole batch: every series is cleaned
+        in one long frame, then split by series_id. Duplicate series_id values
+        reject the batch (400); a series whose data cannot be parsed only gets
+        an error of its own
+        
+        Returns:
+            (prepared DataFrame per series_id, in request order, leaving out
+            series with no usable rows; error message per failing series_id)
+        """
+        series_ids = [item.series_id for item in series]
+        if len(set(series_ids)) != len(series_ids):
+            raise HTTPException(status_code=400, detail="series_id values must be unique")
+        
+        errors: Dict[str, str] = {}
+        rows = [point for item in series for point in item.data]
+        df = pd.DataFrame(rows).rename(columns={'date': 'ds', 'value': 'y'})
+        if 'ds' not in df.columns or 'y' not in df.columns:
+            message = "Data preparation failed: Data must contain 'date' and 'value' fields"
+            return {}, {series_id: message for series_id in series_ids}
+        df['series_id'] = np.repeat(series_ids, [len(item.data) for item in series])
+        
+        try:
+            df['ds'] = pd.to_datetime(df['ds'])
+        except Exception:
+            # Some series failed (or disagree on the date format): parse each
+            # on its own, as /forecast would, and drop the ones that fail
+            parsed = []
+            for series_id, group in df.groupby('series_id', sort=False):
+                try:
+                    parsed.append(group.assign(ds=pd.to_datetime(group['ds'])))
+                except Exception as e:
+                    errors[series_id] = f"Data preparation failed: {str(e)}"
+            df = pd.concat(parsed) if parsed else df.iloc[0:0]
+        # Points without a date cannot be placed in the series
+        missing_dates = df.loc[df['ds'].isna(), 'series_id'].unique()
+        for series_id in missing_dates:
+            errors[series_id] = "Data preparation failed: every point needs a 'date'"
+        df = df[~df['series_id'].isin(list(errors))].copy()
+        
+        df['y'] = pd.to_numeric(df['y'], errors='coerce')
+        # Sort by date and remove duplicates within each series
+        df = df.sort_values(['series_id', 'ds']).drop_duplicates(subset=['series_id', 'ds'])
+        # Handle missing values with each series' own median
+        df['y'] = df['y'].fillna(df.groupby('series_id')['y'].transform('median'))
+        
+        groups = {
+            series_id: group[['ds', 'y']].reset_index(drop=True)
+            for series_id, group in df.groupby('series_id', sort=False)
+        }
+        logger.info(f"Prepared batch: {len(groups)} series, {len(df)} records, {len(errors)} failed")
+        return {series_id: groups[series_id] for series_id in series_ids if series_id in groups}, errors
+    
+    async def _batch_series_result(self, item: BatchSeries, df: Optional[pd.DataFrame],
+                                   request: BatchForecastRequest, error: Optional[str] = None) -> Dict[str, Any]:
+        """One NDJSON line of a batch: the forecast for a series, or its error"""
+        metric_type = item.metric_type or request.metric_type
+        model_choice = item.model_preference or request.model_preference or "auto"
+        line = {"series_id": item.series_id, "metric_type": metric_type}
+        
+        if error is not None:
+            return {**line, "status": "error", "error": error}
+        if df is None or len(df) < 10:
+            return {**line, "status": "error", "error": f"Insufficient data points: {0 if df is None else len(df)}. Need at least 10 points."}
+        if model_choice not in ("auto", "prophet", "arima"):
+            return {**line, "status": "error", "error": "Invalid model preference"}
+        
+        try:
+            with count_fits() as fit_counts:
+                result = await self._forecast_series(df, metric_type, model_choice, request.forecast_periods)
+            self._record_fit_stats(fit_counts)
+            
+            if result is None:
+                forecast_df, _ = self._linear_trend_forecast(df, request.forecast_periods)
+                model_used, accuracy_metrics = "simple_linear", {"note": "Simple forecast - accuracy metrics not available"}
+            else:
+                model_used, forecast_df, accuracy_metrics = result
+            
+            return {
+                **line,
+                "status": "success",
+                "model_used": model_used,
+                "accuracy_metrics": accuracy_metrics,
+                "summary": self._forecast_summary(forecast_df),
+                "forecast_data": forecast_records(forecast_df),
+                "model_fits": fit_counts
+            }
+        except Exception as e:
+            logger.warning(f"Batch forecast for series {item.series_id} failed: {e}")
+            return {**line, "status": "error", "error": str(e)}
+    
+    async def stream_batch_forecast(self, request: BatchForecastRequest, frames: Dict[str, pd.DataFrame],
+                                    errors: Dict[str, str], reservation: SlotReservation):
+        """
+        Forecast every series of a batch, yielding one NDJSON line per series
+        as it finishes and a closing summary line
+        
+        frames and errors come from prepare_batch_from_request and reservation
+        from jobs.reserve(), both taken before the response starts so a bad
+        batch or a full queue still gets a 400 or 429. The batch holds that
+        single job-runner slot; its fits still fan out over the job pool,
+        BATCH_CONCURRENCY series at a time
+        """
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def run_one(item: BatchSeries) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._batch_series_result(
+                    item, frames.get(item.series_id), request, errors.get(item.series_id)
+                )
+        
+        counts = {"success": 0, "error": 0}
+        async with self.jobs.slot(reservation=reservation):
+            tasks = [asyncio.create_task(run_one(item)) for item in request.series]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    line = await next_done
+                    counts[line["status"]] += 1
+                    yield json.dumps(line, default=str) + "\n"
+            finally:
+                # Client went away mid-stream: stop the series still queued
+                for task in tasks:
+                    task.cancel()
+        
+        yield json.dumps({"summary": {
+            "series": len(request.series),
+            "succeeded": counts["success"],
+            "failed": counts["error"],
+            "seconds": round(time.perf_counter() - started, 3)
+        }}) + "\n"
+    
     async def compare_models(self, request: ModelComparisonRequest) -> ModelComparisonResponse:
         """
         Compare Prophet vs ARIMA model performance
@@ -347,6 +615,11 @@ class AdvancedForecastingAPI:
         Returns:
             Model comparison response
         """
+        async with self.jobs.slot():
+            return await self._compare_models(request)
+    
+    async def _compare_models(self, request: ModelComparisonRequest) -> ModelComparisonResponse:
+        """Fit Prophet and ARIMA side by side on one split and compare them"""
         try:
             logger.info(f"Comparing models for {request.metric_type} metric")
 
@@ -365,27 +638,24 @@ class AdvancedForecastingAPI:
 
             evaluation_results = {}
 
-            # Test Prophet model
-            try:
-                prophet_model = EnhancedProphetModel(request.metric_type)
-                prophet_model.fit(train_data)
-                prophet_eval = self.performance_evaluator.evaluate_model(
-                    prophet_model, train_data, test_data, 'prophet'
-                )
-                evaluation_results['prophet'] = prophet_eval
-            except Exception as e:
-                logger.warning(f"Prophet evaluation failed: {e}")
+            # Train both models concurrently in the job pool
+            fitted = await asyncio.gather(
+                self._fit_cached("prophet", train_data, request.metric_type),
+                self._fit_cached("arima", train_data, request.metric_type),
+                return_exceptions=True
+            )
 
-            # Test ARIMA model
-            try:
-                arima_model = EnhancedARIMAModel(request.metric_type)
-                arima_model.fit(train_data)
-                arima_eval = self.performance_evaluator.evaluate_model(
-                    arima_model, train_data, test_data, 'arima'
-                )
-                evaluation_results['arima'] = arima_eval
-            except Exception as e:
-                logger.warning(f"ARIMA evaluation failed: {e}")
+            for model_name, model in zip(("prophet", "arima"), fitted):
+                if isinstance(model, Exception):
+                    logger.warning(f"{model_name} evaluation failed: {model}")
+                    continue
+                try:
+                    evaluation_results[model_name] = await self.jobs.run_in_thread(
+                        "evaluate", self.performance_evaluator.evaluate_model,
+                        model, train_data, test_data, model_name
+                    )
+                except Exception as e:
+                    logger.warning(f"{model_name} evaluation failed: {e}")
 
             if not evaluation_results:
                 raise HTTPException(status_code=500, detail="Both models failed to evaluate")
@@ -440,11 +710,73 @@ app.add_middleware(
 # Initialize API instance
 forecasting_api = AdvancedForecastingAPI()
 
+@app.on_event("shutdown")
+async def shutdown_forecast_jobs():
+    forecasting_api.jobs.shutdown()
+
+@app.exception_handler(ForecastQueueFull)
+async def forecast_queue_full_handler(request: Request, exc: ForecastQueueFull):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.post("/forecast", response_model=ForecastResponse)
-async def generate_forecast(request: ForecastRequest):
-    """Generate time series forecast"""
+async def generate_forecast(request: ForecastRequest, wait: bool = True):
+    """Generate time series forecast; wait=false returns a job id to poll instead"""
+    if not wait:
+        job_id = forecasting_api.jobs.submit(
+            "forecast", lambda: forecasting_api._counted_forecast(request)
+        )
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job_id, "status": "queued", "status_url": f"/forecast/jobs/{job_id}"}
+        )
     return await forecasting_api.generate_forecast(request)
 
+class BatchStreamingResponse(StreamingResponse):
+    """Releases the batch's queue reservation even if the stream never starts (client gone)"""
+
+    def __init__(self, content, reservation: SlotReservation, **kwargs):
+        super().__init__(content, **kwargs)
+        self.reservation = reservation
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.reservation.release()
+
+@app.post("/forecast/batch")
+async def batch_forecast(request: BatchForecastRequest):
+    """
+    Forecast many series in one call. Streams NDJSON: one line per series in
+    completion order (each carries its series_id), then a summary line
+    """
+    # Validate and take the queue slot up front while a 400 or 429 is still
+    # possible; once streaming starts the status line has been sent
+    frames, errors = forecasting_api.prepare_batch_from_request(request.series)
+    reservation = forecasting_api.jobs.reserve()
+    return BatchStreamingResponse(
+        forecasting_api.stream_batch_forecast(request, frames, errors, reservation),
+        reservation,
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/forecast/jobs/{job_id}")
+async def get_forecast_job(job_id: str):
+    """Status of a /forecast?wait=false job, with the forecast once completed"""
+    job = forecasting_api.jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    result = job["result"]
+    return {
+        **job,
+        "result": result.model_dump() if hasattr(result, "model_dump") else result
+    }
+
 @app.post("/compare-models", response_model=ModelComparisonResponse)
 async def compare_models(request: ModelComparisonRequest):
     """Compare Prophet vs ARIMA model performance"""
@@ -502,7 +834,11 @@ async def forecast_status():
                 "forecast": "/forecast",
                 "compare_models": "/compare-models",
                 "gurukul_integration": "/gurukul/forecast",
-                "status": "/forecast/status"
+                "status": "/forecast/status",
+                "cache": "/forecast/cache",
+                "metrics": "/forecast/metrics",
+                "batch": "/forecast/batch",
+                "jobs": "/forecast/jobs/{job_id}"
             },
             "version": "1.0.0",
             "timestamp": datetime.now().isoformat()
@@ -515,6 +851,24 @@ async def forecast_status():
             "timestamp": datetime.now().isoformat()
         }
 
+@app.get("/forecast/metrics")
+async def forecast_metrics():
+    """Model fits per forecast request, queue depth and stage durations"""
+    requests = forecasting_api.fit_stats["requests"]
+    fits = forecasting_api.fit_stats["fits"]
+    model_fits = fits.get("prophet", 0) + fits.get("arima", 0)
+    return {
+        "forecast_requests": requests,
+        "fits_by_kind": fits,
+        "model_fits_per_request": round(model_fits / requests, 3) if requests else 0.0,
+        "job_runner": forecasting_api.jobs.metrics()
+    }
+
+@app.get("/forecast/cache")
+async def forecast_cache_status():
+    """Hit/miss metrics of the fitted model cache"""
+    return forecasting_api.forecast_cache.info()
+
 @app.get("/models/status")
 async def models_status():
     """Get status of available models"""
@@ -0,0 +1,202 @@
+"""
+Parallel ARIMA Order Search
+Fans candidate (p, d, q) orders out over a process pool, bounds each fit with
+a timeout and, in stepwise mode, only explores the neighbourhood of the best
+order found so far (the Hyndman-Khandakar auto-ARIMA strategy) instead of
+fitting the full grid
+"""
+
+import os
+import sys
+import math
+import time
+import logging
+import warnings
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from worker_pools import terminate_pool
+
+logger = logging.getLogger(__name__)
+
+Order = Tuple[int, int, int]
+
+ARIMA_SEARCH_WORKERS = int(os.getenv("ARIMA_SEARCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+ARIMA_FIT_TIMEOUT = float(os.getenv("ARIMA_FIT_TIMEOUT", "10"))
+ARIMA_SEARCH_MODE = os.getenv("ARIMA_SEARCH_MODE", "stepwise")  # stepwise | grid | serial
+
+
+def fit_order_aic(values: np.ndarray, order: Order) -> Tuple[Order, float, Optional[str]]:
+    """Fit one candidate and return (order, aic, error); runs in a worker process"""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    warnings.filterwarnings('ignore')
+    try:
+        aic = float(ARIMA(values, order=order).fit().aic)
+        return order, (aic if math.isfinite(aic) else float('inf')), None
+    except Exception as e:
+        return order, float('inf'), str(e)
+
+
+class ParallelOrderSearch:
+    """Evaluates ARIMA orders concurrently and keeps the lowest AIC"""
+
+    def __init__(self, max_workers: int = ARIMA_SEARCH_WORKERS, fit_timeout: float = ARIMA_FIT_TIMEOUT):
+        self.max_workers = max(1, max_workers)
+        self.fit_timeout = fit_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # ---- pool management ----
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _recycle_pool(self):
+        """Replace the pool after a timeout; a stuck statsmodels fit can't be interrupted"""
+        executor, self._executor = self._executor, None
+        terminate_pool(executor)
+
+    def _discard_broken(self, executor: ProcessPoolExecutor):
+        """Drop a pool whose worker died (e.g. OOM-killed) so the next search builds a new one"""
+        if self._executor is executor:
+            logger.warning("ARIMA order search pool broke; starting a new one")
+            self._recycle_pool()
+
+    def shutdown(self):
+        self._recycle_pool()
+
+    # ---- evaluation ----
+
+    def evaluate(self, values: np.ndarray, orders: Iterable[Order]) -> Dict[Order, float]:
+        """
+        AIC for each order; failed or timed-out fits score inf. Raises
+        BrokenProcessPool, after replacing the pool, if a worker died
+        """
+        orders = list(orders)
+        if not orders:
+            return {}
+
+        if self.max_workers == 1:
+            return {order: aic for order, aic, _ in (fit_order_aic(values, o) for o in orders)}
+
+        # Each worker handles ceil(n / workers) fits, so scale the deadline
+        deadline = self.fit_timeout * math.ceil(len(orders) / self.max_workers)
+        executor = self._pool()
+        try:
+            futures = {executor.submit(fit_order_aic, values, order): order for order in orders}
+        except BrokenProcessPool:
+            self._discard_broken(executor)
+            raise
+        done, not_done = wait(futures, timeout=deadline)
+
+        results = {}
+        for future in done:
+            try:
+                order, aic, error = future.result()
+            except BrokenProcessPool:
+                self._discard_broken(executor)
+                raise
+            except Exception as e:
+                order, aic, error = futures[future], float('inf'), str(e)
+            if error:
+                logger.debug(f"Failed to fit ARIMA{order}: {error}")
+            results[order] = aic
+
+        if not_done:
+            logger.warning(f"{len(not_done)} ARIMA fits exceeded {deadline:.1f}s; skipping "
+                           f"{sorted(futures[f] for f in not_done)}")
+            for future in not_done:
+                results[futures[future]] = float('inf')
+            self._recycle_pool()
+        return results
+
+    # ---- search strategies ----
+
+    @staticmethod
+    def _allowed(order: Order, p_range: List[int], q_range: List[int], max_params: int) -> bool:
+        p, d, q = order
+        return p in p_range and q in q_range and p + d + q <= max_params
+
+    def grid(self, values: np.ndarray, d: int, p_range: List[int], q_range: List[int],
+             max_params: int) -> Tuple[Order, float, Dict[str, Any]]:
+        """Every (p, d, q) in the grid, fitted concurrently"""
+        started = time.perf_counter()
+        orders = [(p, d, q) for p, q in itertools.product(p_range, q_range)
+                  if self._allowed((p, d, q), p_range, q_range, max_params)]
+        scores = self.evaluate(values, orders)
+        return self._best(scores, started, rounds=1)
+
+    def stepwise(self, values: np.ndarray, d: int, p_range: List[int], q_range: List[int],
+                 max_params: int, max_rounds: int = 20) -> Tuple[Order, float, Dict[str, Any]]:
+        """
+        Start from a few standard orders, then repeatedly fit the unexplored
+        neighbours of the current best (p and/or q changed by one) until no
+        neighbour improves the AIC
+        """
+        started = time.perf_counter()
+        start = [(2, d, 2), (0, d, 0), (1, d, 0), (0, d, 1)]
+        scores = self.evaluate(values, [o for o in start if self._allowed(o, p_range, q_range, max_params)])
+        best = min(scores, key=scores.get) if scores else None
+
+        rounds = 1
+        while best is not None and rounds < max_rounds:
+            p, _, q = best
+            neighbours = [
+                (p + dp, d, q + dq)
+                for dp, dq in itertools.product((-1, 0, 1), repeat=2)
+                if (dp, dq) != (0, 0)
+            ]
+            candidates = [o for o in neighbours
+                          if o not in scores and self._allowed(o, p_range, q_range, max_params)]
+            if not candidates:
+                break
+            scores.update(self.evaluate(values, candidates))
+            rounds += 1
+            new_best = min(scores, key=scores.get)
+            if scores[new_best] >= scores[best]:
+                break
+            best = new_best
+
+        return self._best(scores, started, rounds)
+
+    @staticmethod
+    def _best(scores: Dict[Order, float], started: float, rounds: int) -> Tuple[Order, float, Dict[str, Any]]:
+        finite = {order: aic for order, aic in scores.items() if math.isfinite(aic)}
+        stats = {
+            "fits": len(scores),
+            "failed": len(scores) - len(finite),
+            "rounds": rounds,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        if not finite:
+            return (1, 1, 1), float('inf'), stats
+        best = min(finite, key=finite.get)
+        return best, finite[best], stats
+
+
+_default_search: Optional[ParallelOrderSearch] = None
+
+
+def get_order_search() -> ParallelOrderSearch:
+    """Process-wide search engine, so the worker pool is shared across requests"""
+    global _default_search
+    if _default_search is None:
+        _default_search = ParallelOrderSearch()
+    return _default_search
+
+
+def init_inline_search_worker():
+    """
+    Pool initializer for processes that already run one fit per worker (the
+    model tournament and forecast job pools): ARIMA order search runs inline
+    there instead of starting a nested pool
+    """
+    global _default_search
+    _default_search = ParallelOrderSearch(max_workers=1)
@@ -0,0 +1,136 @@
+"""
+Baseline Forecasting Models
+Cheap seasonal naive and exponential smoothing forecasters with the same
+fit/predict interface as the Prophet and ARIMA wrappers, so they can compete
+in model selection and catch series where the heavy models add nothing
+"""
+
+import pandas as pd
+import numpy as np
+import logging
+from typing import Dict, Any
+import warnings
+from datetime import timedelta
+
+from fit_counter import record_fit
+
+warnings.filterwarnings('ignore')
+
+logger = logging.getLogger(__name__)
+
+# z-score of the 80% interval, matching the Prophet interval_width
+INTERVAL_Z = 1.2816
+
+
+class _BaselineModel:
+    """Shared data handling for the baseline forecasters"""
+
+    name = "baseline"
+
+    def __init__(self, metric_type: str = "general", season_length: int = 7):
+        self.metric_type = metric_type
+        self.season_length = season_length
+        self.history = None
+        self.residual_std = 0.0
+        self.is_fitted = False
+        self.performance_metrics = {}
+
+    def _prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        df = data[['ds', 'y']].copy()
+        df['ds'] = pd.to_datetime(df['ds'])
+        df = df.sort_values('ds').reset_index(drop=True)
+        df['y'] = df['y'].fillna(df['y'].median())
+        return df
+
+    def _frame(self, values: np.ndarray) -> pd.DataFrame:
+        """Forecast dataframe for the days after the last observation"""
+        periods = len(values)
+        future_dates = pd.date_range(start=self.history['ds'].iloc[-1] + timedelta(days=1), periods=periods, freq='D')
+        # Uncertainty grows with the horizon, as for a random walk
+        width = INTERVAL_Z * self.residual_std * np.sqrt(np.arange(1, periods + 1))
+        values = np.asarray(values, dtype=float)
+        forecast_df = pd.DataFrame({
+            'ds': future_dates,
+            'yhat': values,
+            'yhat_lower': values - width,
+            'yhat_upper': values + width
+        })
+        if self.metric_type == 'probability':
+            forecast_df[['yhat', 'yhat_lower', 'yhat_upper']] = forecast_df[['yhat', 'yhat_lower', 'yhat_upper']].clip(0.0, 1.0)
+        return forecast_df
+
+    def export_model_config(self) -> Dict[str, Any]:
+        return {
+            'model': self.name,
+            'metric_type': self.metric_type,
+            'season_length': self.season_length,
+            'is_fitted': self.is_fitted
+        }
+
+
+class SeasonalNaiveModel(_BaselineModel):
+    """Repeats the last observed season (weekly by default)"""
+
+    name = "seasonal_naive"
+
+    def fit(self, data: pd.DataFrame) -> 'SeasonalNaiveModel':
+        df = self._prepare(data)
+        if len(df) < 2:
+            raise ValueError(f"Insufficient data points: {len(df)}")
+
+        # Fall back to a plain naive forecast when there isn't a full season
+        if len(df) < 2 * self.season_length:
+            self.season_length = 1
+
+        y = df['y'].values
+        seasonal_errors = y[self.season_length:] - y[:-self.season_length]
+        self.residual_std = float(np.std(seasonal_errors)) if len(seasonal_errors) else 0.0
+        self.history = df
+        self.is_fitted = True
+        record_fit(self.name)
+        return self
+
+    def predict(self, periods: int = 30) -> pd.DataFrame:
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before making predictions")
+        last_season = self.history['y'].values[-self.season_length:]
+        values = np.resize(last_season, periods)
+        return self._frame(values)
+
+
+class ExponentialSmoothingModel(_BaselineModel):
+    """Holt-Winters exponential smoothing: additive trend, weekly seasonality when there is enough data"""
+
+    name = "ets"
+
+    def __init__(self, metric_type: str = "general", season_length: int = 7):
+        super().__init__(metric_type, season_length)
+        self.fitted_model = None
+
+    def fit(self, data: pd.DataFrame) -> 'ExponentialSmoothingModel':
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+        df = self._prepare(data)
+        if len(df) < 10:
+            raise ValueError(f"Insufficient data points: {len(df)}. Need at least 10 points.")
+
+        seasonal = 'add' if len(df) >= 2 * self.season_length + 2 else None
+        self.fitted_model = ExponentialSmoothing(
+            df['y'].values,
+            trend='add',
+            damped_trend=True,
+            seasonal=seasonal,
+            seasonal_periods=self.season_length if seasonal else None,
+            initialization_method='estimated'
+        ).fit()
+
+        self.residual_std = float(np.std(self.fitted_model.resid))
+        self.history = df
+        self.is_fitted = True
+        record_fit(self.name)
+        return self
+
+    def predict(self, periods: int = 30) -> pd.DataFrame:
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before making predictions")
+        return self._frame(self.fitted_model.forecast(periods))
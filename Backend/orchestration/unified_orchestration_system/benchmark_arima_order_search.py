@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ARIMA Order Search Benchmark
+Compares wall time and chosen order of the serial exhaustive grid, the
+parallel grid and the parallel stepwise search on series built from the
+bundled Plant/Seed/Tree curriculum CSVs
+
+The CSVs hold curriculum rows rather than measurements, so each one is
+turned into a daily series of learning-outcome text length (one row per
+day), the kind of noisy, weakly autocorrelated signal the API receives.
+
+Usage:
+    python benchmark_arima_order_search.py --points 365 --metric-type general
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+import warnings
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from enhanced_arima_model import EnhancedARIMAModel
+from arima_order_search import get_order_search
+
+warnings.filterwarnings('ignore')
+logging.basicConfig(level=logging.WARNING)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATASETS = ("Plant_8-12.csv", "Seed_1-7.csv", "Tree.csv")
+
+
+def load_series(filename: str, points: int) -> pd.Series:
+    df = pd.read_csv(os.path.join(DATA_DIR, filename))
+    lengths = df["Learning Outcome"].fillna("").astype(str).str.len()
+    return lengths.iloc[:points].astype(float).reset_index(drop=True)
+
+
+def run(series: pd.Series, metric_type: str, mode: str):
+    model = EnhancedARIMAModel(metric_type=metric_type, search_mode=mode)
+    started = time.perf_counter()
+    order = model.grid_search_parameters(series)
+    return order, time.perf_counter() - started, model.search_stats.get("fits")
+
+
+def main(args):
+    # Start the worker pool before timing so its spawn cost isn't counted
+    get_order_search().evaluate(load_series(DATASETS[0], 50).values, [(0, 0, 0)])
+
+    print(f"{'dataset':<16}{'mode':<10}{'order':<12}{'fits':>6}{'seconds':>10}{'speedup':>9}")
+    for filename in DATASETS:
+        series = load_series(filename, args.points)
+        baseline = None
+        for mode in ("serial", "grid", "stepwise"):
+            order, seconds, fits = run(series, args.metric_type, mode)
+            baseline = baseline or seconds
+            print(f"{filename:<16}{mode:<10}{str(order):<12}{fits:>6}{seconds:>10.2f}{baseline / seconds:>8.1f}x")
+
+    get_order_search().shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serial vs parallel ARIMA order search")
+    parser.add_argument("--points", type=int, default=365)
+    parser.add_argument("--metric-type", default="general", choices=["probability", "load", "general"])
+    main(parser.parse_args())
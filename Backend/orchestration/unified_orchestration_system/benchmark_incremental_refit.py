@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Incremental Refit Benchmark
+Replays a series growing by one point per day and compares, for each day,
+a full refit against EnhancedProphetModel/EnhancedARIMAModel.update() carried
+forward from the previous day's model
+
+Series are built from the bundled curriculum CSVs as in
+benchmark_arima_order_search.py: learning-outcome text length, one row per day.
+
+Usage:
+    python benchmark_incremental_refit.py --history 730 --days 10 --models prophet arima
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from enhanced_prophet_model import EnhancedProphetModel
+from enhanced_arima_model import EnhancedARIMAModel
+from arima_order_search import get_order_search
+
+warnings.filterwarnings('ignore')
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATASETS = ("Plant_8-12.csv", "Seed_1-7.csv", "Tree.csv")
+MODELS = {"prophet": EnhancedProphetModel, "arima": EnhancedARIMAModel}
+
+
+def load_frame(filename: str, points: int) -> pd.DataFrame:
+    df = pd.read_csv(os.path.join(DATA_DIR, filename))
+    lengths = df["Learning Outcome"].fillna("").astype(str).str.len().iloc[:points].astype(float)
+    return pd.DataFrame({
+        "ds": pd.date_range("2022-01-01", periods=len(lengths), freq="D"),
+        "y": lengths.values
+    })
+
+
+def replay(model_class, df: pd.DataFrame, history: int, days: int, metric_type: str):
+    """Per-day (full seconds, incremental seconds, update mode, max |yhat diff|)"""
+    model = model_class(metric_type).fit(df.iloc[:history])
+    rows = []
+    for day in range(1, days + 1):
+        window = df.iloc[:history + day]
+
+        started = time.perf_counter()
+        full = model_class(metric_type).fit(window)
+        full_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        model.update(window)
+        incremental_seconds = time.perf_counter() - started
+
+        diff = np.max(np.abs(full.predict(14)["yhat"].values[-14:] - model.predict(14)["yhat"].values[-14:]))
+        rows.append((full_seconds, incremental_seconds, model.update_stats.get("mode"), float(diff)))
+    return rows
+
+
+def main(args):
+    # Start the order-search pool before timing so its spawn cost isn't counted
+    get_order_search().evaluate(load_frame(DATASETS[0], 50)["y"].values, [(0, 0, 0)])
+
+    print(f"{'dataset':<16}{'model':<9}{'full s/day':>11}{'update s/day':>14}{'speedup':>9}"
+          f"{'modes':>26}{'max |dyhat|':>13}")
+    for filename in DATASETS:
+        df = load_frame(filename, args.history + args.days)
+        for name in args.models:
+            rows = replay(MODELS[name], df, args.history, args.days, args.metric_type)
+            full = np.mean([r[0] for r in rows])
+            incremental = np.mean([r[1] for r in rows])
+            modes = {}
+            for r in rows:
+                modes[r[2]] = modes.get(r[2], 0) + 1
+            modes_text = ",".join(f"{mode}={count}" for mode, count in sorted(modes.items()))
+            print(f"{filename:<16}{name:<9}{full:>11.3f}{incremental:>14.3f}{full / incremental:>8.1f}x"
+                  f"{modes_text:>26}{max(r[3] for r in rows):>13.4f}")
+
+    get_order_search().shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full refit vs incremental update per appended day")
+    parser.add_argument("--history", type=int, default=730, help="points fitted before the first day")
+    parser.add_argument("--days", type=int, default=10, help="days replayed, one new point each")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--metric-type", default="general", choices=["probability", "load", "general"])
+    main(parser.parse_args())
@@ -10,31 +10,45 @@ from statsmodels.tsa.stattools import adfuller, kpss
 from statsmodels.tsa.seasonal import seasonal_decompose
 from statsmodels.stats.diagnostic import acorr_ljungbox
 from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
+import os
 import itertools
+from concurrent.futures.process import BrokenProcessPool
 import logging
 from typing import Dict, List, Optional, Tuple, Any
 import warnings
 from datetime import datetime, timedelta
 import json
 
+from arima_order_search import ARIMA_SEARCH_MODE, get_order_search
+from fit_counter import record_fit
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+# update() re-estimates when the one-step errors on new points exceed this
+# multiple of the fitted noise level
+ARIMA_DRIFT_THRESHOLD = float(os.getenv("ARIMA_DRIFT_THRESHOLD", "3.0"))
+# Appending more points than this at once re-estimates instead
+ARIMA_MAX_APPEND = int(os.getenv("ARIMA_MAX_APPEND", "30"))
+
 class EnhancedARIMAModel:
     """
     Enhanced ARIMA model with automatic parameter selection and robust error handling
     """
     
-    def __init__(self, metric_type: str = "general"):
+    def __init__(self, metric_type: str = "general", search_mode: str = ARIMA_SEARCH_MODE):
         """
         Initialize Enhanced ARIMA Model
         
         Args:
             metric_type: Type of metric ('probability', 'load', 'general')
+            search_mode: Order search strategy ('stepwise', 'grid' or 'serial')
         """
         self.metric_type = metric_type
+        self.search_mode = search_mode
+        self.search_stats = {}
         self.model = None
         self.fitted_model = None
         self.best_params = None
@@ -42,6 +56,8 @@ class EnhancedARIMAModel:
         self.is_fitted = False
         self.original_data = None
         self.differenced_data = None
+        self.last_date = None
+        self.update_stats = {}
         
         # Parameter search ranges based on metric type
         self.param_ranges = self._get_param_ranges_for_metric_type(metric_type)
@@ -163,7 +179,11 @@ class EnhancedARIMAModel:
     
     def grid_search_parameters(self, data: pd.Series) -> Tuple[int, int, int]:
         """
-        Grid search for optimal ARIMA parameters
+        Search for optimal ARIMA parameters
+        
+        Uses the parallel order search engine: 'stepwise' explores the
+        neighbourhood of the best order, 'grid' fits the full grid
+        concurrently and 'serial' is the original one-by-one grid search.
         
         Args:
             data: Time series data
@@ -171,23 +191,53 @@ class EnhancedARIMAModel:
         Returns:
             Tuple of optimal (p, d, q) parameters
         """
-        best_aic = float('inf')
-        best_params = (1, 1, 1)  # Default fallback
-        
         # Determine differencing order
         _, optimal_d = self.determine_differencing(data)
         
+        p_range = self.param_ranges['p_range']
+        q_range = self.param_ranges['q_range']
+        max_params = self.param_ranges['max_params']
+        
+        if self.search_mode == 'serial':
+            return self._serial_grid_search(data, optimal_d)
+        
+        logger.info(f"{self.search_mode.capitalize()} searching ARIMA parameters with d={optimal_d}")
+        
+        search = get_order_search()
+        values = np.asarray(data, dtype=float)
+        try:
+            if self.search_mode == 'grid':
+                best_params, best_aic, self.search_stats = search.grid(values, optimal_d, p_range, q_range, max_params)
+            else:
+                best_params, best_aic, self.search_stats = search.stepwise(values, optimal_d, p_range, q_range, max_params)
+        except BrokenProcessPool:
+            # A fit worker died; the search already replaced its pool
+            logger.warning("ARIMA order search pool broke; falling back to serial grid search")
+            return self._serial_grid_search(data, optimal_d)
+        record_fit("arima_order_candidates", self.search_stats['fits'])
+        
+        logger.info(f"Best ARIMA parameters: {best_params} with AIC: {best_aic:.2f} "
+                   f"({self.search_stats['fits']} fits in {self.search_stats['seconds']}s)")
+        return best_params
+    
+    def _serial_grid_search(self, data: pd.Series, optimal_d: int) -> Tuple[int, int, int]:
+        """Exhaustive grid search, fitting each candidate in turn"""
+        best_aic = float('inf')
+        best_params = (1, 1, 1)  # Default fallback
+        
         # Grid search over p and q
         p_range = self.param_ranges['p_range']
         q_range = self.param_ranges['q_range']
         
         logger.info(f"Grid searching ARIMA parameters with d={optimal_d}")
         
+        fits = 0
         for p, q in itertools.product(p_range, q_range):
             # Skip if total parameters exceed limit
             if p + optimal_d + q > self.param_ranges['max_params']:
                 continue
                 
+            fits += 1
             try:
                 model = ARIMA(data, order=(p, optimal_d, q))
                 fitted_model = model.fit()
@@ -202,6 +252,8 @@ class EnhancedARIMAModel:
                 logger.debug(f"Failed to fit ARIMA({p},{optimal_d},{q}): {e}")
                 continue
         
+        self.search_stats = {'fits': fits}
+        record_fit("arima_order_candidates", fits)
         logger.info(f"Best ARIMA parameters: {best_params} with AIC: {best_aic:.2f}")
         return best_params
     
@@ -219,18 +271,7 @@ class EnhancedARIMAModel:
         """
         try:
             # Prepare data
-            df = data.copy()
-            if date_col != 'ds':
-                df = df.rename(columns={date_col: 'ds'})
-            if value_col != 'y':
-                df = df.rename(columns={value_col: 'y'})
-            
-            # Ensure datetime format and sort
-            df['ds'] = pd.to_datetime(df['ds'])
-            df = df.sort_values('ds').reset_index(drop=True)
-            
-            # Handle missing values
-            df['y'] = df['y'].fillna(df['y'].median())
+            df = self._prepare_frame(data, date_col, value_col)
             
             # Validate data
             if len(df) < 10:
@@ -238,6 +279,8 @@ class EnhancedARIMAModel:
             
             # Store original data
             self.original_data = df['y'].copy()
+            self.last_date = df['ds'].iloc[-1]
+            self.update_stats = {'mode': 'full', 'new_points': len(df)}
             
             # Find optimal parameters
             self.best_params = self.grid_search_parameters(self.original_data)
@@ -246,6 +289,7 @@ class EnhancedARIMAModel:
             logger.info(f"Fitting ARIMA{self.best_params} model...")
             self.model = ARIMA(self.original_data, order=self.best_params)
             self.fitted_model = self.model.fit()
+            record_fit("arima")
             
             self.is_fitted = True
             logger.info("ARIMA model fitted successfully")
@@ -260,6 +304,7 @@ class EnhancedARIMAModel:
                 self.best_params = (1, 1, 1)
                 self.model = ARIMA(self.original_data, order=self.best_params)
                 self.fitted_model = self.model.fit()
+                record_fit("arima")
                 self.is_fitted = True
                 logger.info("Fallback ARIMA model fitted successfully")
                 return self
@@ -267,6 +312,77 @@ class EnhancedARIMAModel:
                 logger.error(f"Fallback ARIMA model also failed: {e2}")
                 raise
     
+    def _prepare_frame(self, data: pd.DataFrame, date_col: str = 'ds', value_col: str = 'y') -> pd.DataFrame:
+        """Renamed, date-sorted copy of data with missing values filled"""
+        df = data.copy()
+        if date_col != 'ds':
+            df = df.rename(columns={date_col: 'ds'})
+        if value_col != 'y':
+            df = df.rename(columns={value_col: 'y'})
+        
+        # Ensure datetime format and sort
+        df['ds'] = pd.to_datetime(df['ds'])
+        df = df.sort_values('ds').reset_index(drop=True)
+        
+        # Handle missing values
+        df['y'] = df['y'].fillna(df['y'].median())
+        return df
+    
+    def update(self, data: pd.DataFrame, date_col: str = 'ds', value_col: str = 'y') -> 'EnhancedARIMAModel':
+        """
+        Extend the fitted model with observations newer than its last date
+        
+        The new points are appended to the state-space results with the
+        current parameters (no re-estimation, no order search). Their
+        one-step-ahead errors are then compared with the fitted noise level;
+        if the RMSE ratio exceeds ARIMA_DRIFT_THRESHOLD the series has moved
+        away from the model and it is refitted from scratch.
+        
+        Args:
+            data: Full training data, i.e. the previous history plus new rows
+            date_col: Date column name
+            value_col: Value column name
+            
+        Returns:
+            Self for method chaining
+        """
+        if not self.is_fitted or self.last_date is None:
+            return self.fit(data, date_col, value_col)
+        
+        df = self._prepare_frame(data, date_col, value_col)
+        new_rows = df[df['ds'] > self.last_date]
+        if new_rows.empty:
+            self.update_stats = {'mode': 'unchanged', 'new_points': 0}
+            return self
+        if len(new_rows) > ARIMA_MAX_APPEND:
+            return self.fit(df)
+        
+        start = len(self.original_data)
+        new_values = pd.Series(new_rows['y'].values, index=pd.RangeIndex(start, start + len(new_rows)),
+                               name=self.original_data.name)
+        appended = self.fitted_model.append(new_values, refit=False)
+        
+        # One-step-ahead errors of the new points under the old parameters
+        errors = np.asarray(appended.resid)[-len(new_rows):]
+        sigma = float(np.sqrt(self.fitted_model.params['sigma2']))
+        drift_ratio = float(np.sqrt(np.mean(errors ** 2)) / sigma) if sigma > 0 else float('inf')
+        
+        if drift_ratio > ARIMA_DRIFT_THRESHOLD:
+            logger.info(f"ARIMA drift ratio {drift_ratio:.2f} over {ARIMA_DRIFT_THRESHOLD}, refitting")
+            self.fit(df)
+            self.update_stats['drift_ratio'] = round(drift_ratio, 4)
+            return self
+        
+        self.fitted_model = appended
+        self.model = appended.model
+        self.original_data = pd.concat([self.original_data, new_values])
+        self.last_date = new_rows['ds'].iloc[-1]
+        record_fit("arima_append")
+        
+        self.update_stats = {'mode': 'append', 'new_points': len(new_rows), 'drift_ratio': round(drift_ratio, 4)}
+        logger.info(f"ARIMA{self.best_params} extended with {len(new_rows)} new points")
+        return self
+    
     def predict(self, periods: int = 30) -> pd.DataFrame:
         """
         Generate predictions
@@ -437,6 +553,8 @@ class EnhancedARIMAModel:
             'metric_type': self.metric_type,
             'best_params': self.best_params,
             'param_ranges': self.param_ranges,
+            'search_mode': self.search_mode,
+            'search_stats': self.search_stats,
             'is_fitted': self.is_fitted,
             'performance_metrics': self.performance_metrics,
             'model_version': '1.0',
@@ -0,0 +1,30 @@
+"""
+Model Fit Instrumentation
+Counts Prophet/ARIMA fits made while handling one request. The model classes
+record every fit; a request handler wraps its work in count_fits() to see how
+many fits that request actually paid for
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_fit_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar("forecast_fit_counts", default=None)
+
+
+def record_fit(kind: str, count: int = 1):
+    """Add to the current request's counter; a no-op outside count_fits()"""
+    counts = _fit_counts.get()
+    if counts is not None:
+        counts[kind] = counts.get(kind, 0) + count
+
+
+@contextmanager
+def count_fits() -> Iterator[Dict[str, int]]:
+    """Collect fit counts by kind ('prophet', 'arima', 'arima_order_candidates', 'arima_append')"""
+    counts: Dict[str, int] = {}
+    token = _fit_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _fit_counts.reset(token)
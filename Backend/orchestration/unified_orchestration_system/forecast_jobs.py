@@ -0,0 +1,317 @@
+"""
+Forecast Job Runner
+Keeps Prophet/ARIMA training off the asyncio event loop. Fits run in a
+bounded process pool, forecast requests pass admission control (queue up to a
+limit, then 429), and long forecasts can run as background jobs that clients
+poll. Queue depth and fit durations are exposed as metrics
+"""
+
+import os
+import sys
+import math
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from model_tournament import CANDIDATE_MODELS
+from fit_counter import count_fits, record_fit
+from arima_order_search import init_inline_search_worker
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from worker_pools import LatencyHistogram, terminate_pool
+
+logger = logging.getLogger(__name__)
+
+# Requests that may train at once; each one has at most a fit or two in flight
+FORECAST_JOB_WORKERS = int(os.getenv("FORECAST_JOB_WORKERS", str(min(2, os.cpu_count() or 1))))
+# Admitted requests allowed to wait for a worker before new ones get 429
+FORECAST_JOB_QUEUE_SIZE = int(os.getenv("FORECAST_JOB_QUEUE_SIZE", "8"))
+FORECAST_MAX_TRACKED_JOBS = int(os.getenv("FORECAST_MAX_TRACKED_JOBS", "500"))
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class ForecastQueueFull(Exception):
+    """Every worker is busy and the admission queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Forecast queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SlotReservation:
+    """A place admitted ahead of time (see ForecastJobRunner.reserve), released exactly once"""
+
+    def __init__(self, runner: "ForecastJobRunner"):
+        self._runner = runner
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._runner.release()
+
+
+def fit_model(model_name: str, df: pd.DataFrame, metric_type: str):
+    """Train one candidate model; runs inside a worker process"""
+    model = CANDIDATE_MODELS[model_name](metric_type)
+    model.fit(df)
+    return model
+
+
+def update_model(model, df: pd.DataFrame):
+    """Bring a fitted model up to date with df (history plus new rows); runs inside a worker process"""
+    if hasattr(model, "update"):
+        return model.update(df)
+    return model.fit(df)
+
+
+def _run_counted(func: Callable, args: Tuple) -> Tuple[Any, Dict[str, int], float]:
+    """Worker-side wrapper returning (result, fit counts, seconds)"""
+    started = time.perf_counter()
+    with count_fits() as fits:
+        result = func(*args)
+    return result, fits, time.perf_counter() - started
+
+
+class ForecastJobRunner:
+    """Bounded execution of forecast work with admission control and job tracking"""
+
+    def __init__(self, max_workers: int = FORECAST_JOB_WORKERS, queue_size: int = FORECAST_JOB_QUEUE_SIZE):
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._running: Optional[asyncio.Semaphore] = None
+        self.admitted = 0
+        self.active = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram(LATENCY_BUCKETS)
+        self.request_seconds = LatencyHistogram(LATENCY_BUCKETS)
+        self.stage_seconds: Dict[str, LatencyHistogram] = {}
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks = set()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     initializer=init_inline_search_worker)
+            return self._executor
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool (a worker died, e.g. OOM-killed) so the next call builds a new one"""
+        with self._pool_lock:
+            if self._executor is not executor:
+                return  # another caller already replaced it
+            self._executor = None
+        logger.warning("Forecast worker pool broke; starting a new one")
+        terminate_pool(executor)
+
+    def _submit(self, func: Callable, args: Tuple) -> Tuple[ProcessPoolExecutor, Future]:
+        """Submit to the pool, replacing it once if it was already broken (nothing ran yet)"""
+        executor = self._pool()
+        try:
+            return executor, executor.submit(_run_counted, func, args)
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            executor = self._pool()
+            return executor, executor.submit(_run_counted, func, args)
+
+    def _finish(self, label: str, outcome: Tuple[Any, Dict[str, int], float]) -> Any:
+        result, fits, seconds = outcome
+        for kind, count in fits.items():
+            record_fit(kind, count)
+        self._observe_stage(label, seconds)
+        return result
+
+    # ---- admission ----
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_size
+
+    def _retry_after(self) -> int:
+        """Rough wait for a slot: queued requests times the mean request time, per worker"""
+        queued = max(0, self.admitted - self.max_workers)
+        per_request = self.request_seconds.mean or 1.0
+        return max(1, math.ceil(per_request * (queued + 1) / self.max_workers))
+
+    def ensure_capacity(self):
+        """Raise ForecastQueueFull if admit() would, without reserving a slot"""
+        if self.admitted >= self.capacity:
+            self.rejected += 1
+            raise ForecastQueueFull(self._retry_after())
+
+    def admit(self):
+        """Reserve a request slot, raising ForecastQueueFull when saturated"""
+        self.ensure_capacity()
+        self.admitted += 1
+
+    def release(self):
+        self.admitted -= 1
+
+    def reserve(self) -> SlotReservation:
+        """
+        admit() now, for a slot() entered later - e.g. by a streaming response,
+        whose status line is gone by the time its body runs. Whoever holds the
+        reservation must release it if slot() is never entered
+        """
+        self.admit()
+        return SlotReservation(self)
+
+    @asynccontextmanager
+    async def slot(self, admitted: bool = False, reservation: Optional[SlotReservation] = None):
+        """
+        Hold a worker slot for one request. Requests beyond the worker count
+        wait here in arrival order; admitted=True means admit() was already
+        called (background jobs reserve their place at submission), and a
+        reservation is released in place of calling release()
+        """
+        if not admitted and reservation is None:
+            self.admit()
+        if self._running is None:
+            self._running = asyncio.Semaphore(self.max_workers)
+        try:
+            queued_at = time.perf_counter()
+            async with self._running:
+                started = time.perf_counter()
+                self.queue_wait.observe(started - queued_at)
+                self.active += 1
+                try:
+                    yield
+                finally:
+                    self.active -= 1
+                    self.request_seconds.observe(time.perf_counter() - started)
+        finally:
+            if reservation is not None:
+                reservation.release()
+            else:
+                self.release()
+
+    # ---- execution ----
+
+    def _observe_stage(self, label: str, seconds: float):
+        if label not in self.stage_seconds:
+            self.stage_seconds[label] = LatencyHistogram(LATENCY_BUCKETS)
+        self.stage_seconds[label].observe(seconds)
+
+    async def run(self, label: str, func: Callable, *args) -> Any:
+        """
+        Run a picklable function in the worker pool, replaying its fit counts
+        here. If the worker dies the pool is replaced and only this call fails
+        """
+        executor, future = self._submit(func, args)
+        try:
+            outcome = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            raise
+        return self._finish(label, outcome)
+
+    def run_blocking(self, label: str, func: Callable, *args) -> Any:
+        """
+        run() for code already on a worker thread (see run_in_thread): blocks
+        the thread, not the event loop, until the pool returns. The request
+        holds a slot, so the pool has a worker for it
+        """
+        executor, future = self._submit(func, args)
+        try:
+            outcome = future.result()
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            raise
+        return self._finish(label, outcome)
+
+    async def run_in_thread(self, label: str, func: Callable, *args) -> Any:
+        """
+        Run blocking work that only waits on another pool (model selection) or
+        is light enough not to need a process (predict). The request's fit
+        counter is visible in the thread
+        """
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self._observe_stage(label, time.perf_counter() - started)
+
+    # ---- background jobs ----
+
+    def create_job(self, kind: str) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None
+        }
+        while len(self.jobs) > FORECAST_MAX_TRACKED_JOBS:
+            self.jobs.popitem(last=False)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def _update(self, job_id: str, **fields):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+            job["updated_at"] = time.time()
+
+    def submit(self, kind: str, work: Callable[[], Awaitable[Any]]) -> str:
+        """
+        Admit a background job (ForecastQueueFull if saturated) and start it
+        once a slot frees up; poll get_job for the outcome
+        """
+        self.admit()
+        job_id = self.create_job(kind)
+
+        async def execute():
+            try:
+                async with self.slot(admitted=True):
+                    self._update(job_id, status="running")
+                    result = await work()
+                self._update(job_id, status="completed", result=result)
+            except Exception as e:
+                logger.error(f"Forecast job {job_id} failed: {e}")
+                self._update(job_id, status="failed", error=getattr(e, "detail", None) or str(e))
+
+        task = asyncio.create_task(execute())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    def metrics(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "running": self.active,
+            "queue_depth": self.admitted - self.active,
+            "rejected": self.rejected,
+            "jobs": statuses,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "request_seconds": self.request_seconds.snapshot(),
+            "stage_seconds": {label: h.snapshot() for label, h in self.stage_seconds.items()}
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,174 @@
+"""
+Fitted Forecasting Model Cache
+Keeps fitted Prophet/ARIMA models keyed by a fingerprint of the series and
+everything that shapes the fit, so repeated forecasts on unchanged data skip
+training entirely. Entries live in a bounded in-memory LRU; Prophet models (as
+JSON) and ARIMA models (pickled) can additionally be persisted in an on-disk
+tier that survives restarts, so incremental updates can pick up where the
+last fit left off
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORECAST_MODEL_CACHE_SIZE = int(os.getenv("FORECAST_MODEL_CACHE_SIZE", "64"))
+FORECAST_MODEL_CACHE_DIR = os.getenv("FORECAST_MODEL_CACHE_DIR")  # unset = memory only
+FORECAST_MODEL_DISK_ENTRIES = int(os.getenv("FORECAST_MODEL_DISK_ENTRIES", "256"))
+
+
+def series_fingerprint(df: pd.DataFrame, metric_type: str, model_choice: str,
+                       hyperparameters: Optional[Dict[str, Any]] = None) -> str:
+    """Hash of (dates, values, metric_type, model choice, hyperparameters)"""
+    digest = hashlib.sha256()
+    digest.update(pd.to_datetime(df['ds']).values.astype('datetime64[ns]').astype(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(df['y'].to_numpy(dtype=float)).tobytes())
+    digest.update(json.dumps([metric_type, model_choice, hyperparameters or {}],
+                             sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ForecastModelCache:
+    """
+    Bounded LRU of fitted models with an optional Prophet/ARIMA disk tier.
+
+    Values are dicts holding at least 'model' (the fitted Enhanced*Model) and
+    'model_used'; callers may add anything else worth reusing, such as the
+    accuracy metrics computed for that fit.
+    """
+
+    def __init__(self, max_entries: int = FORECAST_MODEL_CACHE_SIZE,
+                 disk_dir: Optional[str] = FORECAST_MODEL_CACHE_DIR, prophet_model_class: Optional[type] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir if prophet_model_class is not None else None
+        self.prophet_model_class = prophet_model_class
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "disk_writes": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    # ---- memory tier ----
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[Dict[str, Any]]:
+        """Entry for key, or None; count_miss=False for speculative lookups"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                if count_miss:
+                    self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._insert(key, entry)
+            return entry
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self.stats["stores"] += 1
+            self._insert(key, entry)
+        if self.disk_dir and entry.get("model_used") in ("prophet", "arima"):
+            self._save_to_disk(key, entry)
+
+    def _insert(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    # ---- disk tier (Prophet as JSON, stable across versions; ARIMA pickled
+    # the way statsmodels saves results) ----
+
+    def _disk_path(self, key: str, suffix: str = "json") -> str:
+        return os.path.join(self.disk_dir, f"{key}.{suffix}")
+
+    def _save_to_disk(self, key: str, entry: Dict[str, Any]):
+        try:
+            extras = {k: v for k, v in entry.items() if k not in ("model", "model_used")}
+            if entry["model_used"] == "prophet":
+                from prophet.serialize import model_to_json
+
+                model = entry["model"]
+                payload = {
+                    "model_used": "prophet",
+                    "metric_type": model.metric_type,
+                    "prophet_model": model_to_json(model.model),
+                    "extras": extras
+                }
+                path = self._disk_path(key)
+                with open(f"{path}.tmp", "w") as f:
+                    json.dump(payload, f, default=str)
+            else:
+                path = self._disk_path(key, "pkl")
+                with open(f"{path}.tmp", "wb") as f:
+                    pickle.dump({"model": entry["model"], "model_used": "arima", **extras}, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.tmp", path)
+            self.stats["disk_writes"] += 1
+            self._prune_disk()
+        except Exception as e:
+            logger.warning(f"Could not persist {entry.get('model_used')} model {key[:12]}: {e}")
+
+    def _prune_disk(self):
+        """Keep the newest FORECAST_MODEL_DISK_ENTRIES files"""
+        files = [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir)
+                 if name.endswith((".json", ".pkl"))]
+        if len(files) <= FORECAST_MODEL_DISK_ENTRIES:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - FORECAST_MODEL_DISK_ENTRIES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _load_from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        try:
+            if os.path.exists(self._disk_path(key, "pkl")):
+                with open(self._disk_path(key, "pkl"), "rb") as f:
+                    return pickle.load(f)
+            if not os.path.exists(self._disk_path(key)):
+                return None
+
+            from prophet.serialize import model_from_json
+
+            with open(self._disk_path(key)) as f:
+                payload = json.load(f)
+            model = self.prophet_model_class(payload["metric_type"])
+            model.model = model_from_json(payload["prophet_model"])
+            model.is_fitted = True
+            return {"model": model, "model_used": "prophet", **payload.get("extras", {})}
+        except Exception as e:
+            logger.warning(f"Could not load cached model {key[:12]}: {e}")
+            return None
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_tier": bool(self.disk_dir),
+                "hit_rate": round((self.stats["hits"] + self.stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,225 @@
+"""
+Model Tournament
+Trains and scores every candidate model on the same train/test split
+concurrently in worker processes. Each candidate has a time budget counted
+from when it starts in a worker; one that runs over is dropped from the
+comparison instead of stalling the request, while the others keep running
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from enhanced_prophet_model import EnhancedProphetModel
+from enhanced_arima_model import EnhancedARIMAModel
+from baseline_models import SeasonalNaiveModel, ExponentialSmoothingModel
+from model_performance_evaluator import ModelPerformanceEvaluator
+from fit_counter import count_fits, record_fit
+from arima_order_search import init_inline_search_worker
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from worker_pools import terminate_pool
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_MODELS = {
+    'prophet': EnhancedProphetModel,
+    'arima': EnhancedARIMAModel,
+    'seasonal_naive': SeasonalNaiveModel,
+    'ets': ExponentialSmoothingModel,
+}
+
+TOURNAMENT_WORKERS = int(os.getenv("FORECAST_TOURNAMENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+CANDIDATE_TIME_BUDGET = float(os.getenv("FORECAST_CANDIDATE_BUDGET", "30"))
+
+
+def run_candidate(name: str, metric_type: str, train_data: pd.DataFrame,
+                  test_data: pd.DataFrame) -> Tuple[str, Any, Dict[str, Any], Dict[str, int], float]:
+    """Fit and evaluate one candidate; returns (name, model, evaluation, fit counts, seconds)"""
+    started = time.perf_counter()
+    with count_fits() as fits:
+        model = CANDIDATE_MODELS[name](metric_type)
+        model.fit(train_data)
+        evaluation = ModelPerformanceEvaluator().evaluate_model(model, train_data, test_data, name)
+    return name, model, evaluation, fits, time.perf_counter() - started
+
+
+class ModelTournament:
+    """
+    Runs candidate fits concurrently with a per-candidate time budget.
+
+    The pool is shared by concurrent requests, so workers are handed out one
+    candidate at a time and a candidate's budget starts when it is given a
+    worker. A worker still busy with an over-budget candidate stays occupied
+    until it finishes; once every occupied worker is in that state the pool is
+    recycled, which kills only abandoned work.
+    """
+
+    def __init__(self, max_workers: int = TOURNAMENT_WORKERS, time_budget: float = CANDIDATE_TIME_BUDGET):
+        self.max_workers = max(1, max_workers)
+        self.time_budget = time_budget
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Futures occupying a worker of the current pool, and those among
+        # them whose candidate ran over budget and was given up on
+        self._occupied: Set[Future] = set()
+        self._stuck: Set[Future] = set()
+        self._workers_changed = threading.Condition()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_inline_search_worker)
+        return self._executor
+
+    def _recycle_pool(self):
+        """Kill workers still busy with an over-budget candidate"""
+        executor, self._executor = self._executor, None
+        self._occupied.clear()
+        self._stuck.clear()
+        terminate_pool(executor)
+
+    def _recycle_if_stuck(self):
+        """Recycle when every occupied worker holds abandoned work (condition held)"""
+        if self._stuck and self._stuck >= self._occupied:
+            logger.info(f"Recycling tournament pool: {len(self._stuck)} worker(s) stuck on over-budget candidates")
+            self._recycle_pool()
+
+    def _try_submit(self, name: str, *args) -> Optional[Tuple[Future, ProcessPoolExecutor]]:
+        """Start a candidate if a worker is free, else None (condition held)"""
+        if len(self._occupied) >= self.max_workers:
+            self._recycle_if_stuck()
+        if len(self._occupied) >= self.max_workers:
+            return None
+        executor = self._pool()
+        try:
+            future = executor.submit(run_candidate, name, *args)
+        except BrokenProcessPool:
+            # A worker died since the last candidate finished; nothing of
+            # this candidate ran yet, so start it on a fresh pool
+            self._discard_broken(executor)
+            executor = self._pool()
+            future = executor.submit(run_candidate, name, *args)
+        self._occupied.add(future)
+        future.add_done_callback(self._worker_freed)
+        return future, executor
+
+    def _discard_broken(self, executor: ProcessPoolExecutor):
+        """Replace a pool whose worker died (e.g. OOM-killed); all its futures have failed"""
+        with self._workers_changed:
+            if self._executor is executor:
+                logger.warning("Tournament worker pool broke; starting a new one")
+                self._recycle_pool()
+                self._workers_changed.notify_all()
+
+    def _worker_freed(self, future: Future):
+        with self._workers_changed:
+            self._occupied.discard(future)
+            self._stuck.discard(future)
+            self._workers_changed.notify_all()
+
+    def _abandon(self, future: Future):
+        """Give up on an over-budget candidate; its worker stays occupied until it ends"""
+        with self._workers_changed:
+            if future in self._occupied:
+                self._stuck.add(future)
+                self._workers_changed.notify_all()
+
+    def shutdown(self):
+        with self._workers_changed:
+            self._recycle_pool()
+
+    def run(self, candidates: List[str], metric_type: str, train_data: pd.DataFrame,
+            test_data: pd.DataFrame) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """
+        Returns (fitted models, evaluation results, tournament stats) for the
+        candidates that finished within budget and evaluated cleanly
+        """
+        started = time.perf_counter()
+        pending = deque(candidates)
+        # future -> (name, deadline, pool it runs in)
+        running: Dict[Future, Tuple[str, float, ProcessPoolExecutor]] = {}
+        finished: List[Tuple[str, Future]] = []
+        over_budget: List[str] = []
+
+        while pending or running:
+            with self._workers_changed:
+                while pending:
+                    submitted = self._try_submit(pending[0], metric_type, train_data, test_data)
+                    if submitted is None:
+                        break
+                    future, executor = submitted
+                    running[future] = (pending.popleft(), time.perf_counter() + self.time_budget, executor)
+                if not running:
+                    # Other requests' candidates hold every worker
+                    self._workers_changed.wait()
+                    continue
+
+            timeout = max(0.0, min(deadline for _, deadline, _ in running.values()) - time.perf_counter())
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, _, executor = running.pop(future)
+                finished.append((name, future))
+                if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                    # The candidate is reported as failed below
+                    self._discard_broken(executor)
+
+            now = time.perf_counter()
+            for future, (name, deadline, _) in list(running.items()):
+                if deadline <= now:
+                    del running[future]
+                    over_budget.append(name)
+                    self._abandon(future)
+
+        if over_budget:
+            with self._workers_changed:
+                self._recycle_if_stuck()
+
+        models, evaluations, timings, failed = {}, {}, {}, {}
+        for name, future in finished:
+            try:
+                _, model, evaluation, fits, seconds = future.result()
+            except (Exception, CancelledError) as e:
+                # CancelledError: queued when another request replaced a broken pool
+                logger.warning(f"{name} candidate failed: {e}")
+                failed[name] = str(e)
+                continue
+            for kind, count in fits.items():
+                record_fit(kind, count)
+            timings[name] = round(seconds, 3)
+            if 'accuracy_metrics' not in evaluation:
+                failed[name] = evaluation.get('error', 'evaluation failed')
+                continue
+            models[name] = model
+            evaluations[name] = evaluation
+
+        over_budget.sort()
+        if over_budget:
+            logger.warning(f"Dropping candidates over the {self.time_budget}s budget: {over_budget}")
+
+        stats = {
+            'candidates': list(candidates),
+            'completed': sorted(models),
+            'failed': failed,
+            'over_budget': over_budget,
+            'candidate_seconds': timings,
+            'wall_seconds': round(time.perf_counter() - started, 3)
+        }
+        return models, evaluations, stats
+
+
+_default_tournament: Optional[ModelTournament] = None
+
+
+def get_tournament() -> ModelTournament:
+    """Process-wide tournament, so the worker pool is shared across requests"""
+    global _default_tournament
+    if _default_tournament is None:
+        _default_tournament = ModelTournament()
+    return _default_tournament
@@ -30,6 +30,7 @@ from langchain_community.vectorstores import FAISS
 
 # Local imports
 from data_ingestion import UnifiedDataIngestion
+from session_store import SessionStore
 
 # Load environment variables
 load_dotenv()
@@ -45,61 +46,49 @@ class AgentMemoryManager:
     
     def __init__(self, storage_dir: str = "agent_memory"):
         self.storage_dir = Path(storage_dir)
-        self.storage_dir.mkdir(exist_ok=True)
-        self.user_sessions = {}
-        self.interaction_history = {}
+        # Bounded, write-behind; see session_store.py
+        self.sessions = SessionStore(str(self.storage_dir), self._new_session)
+    
+    @staticmethod
+    def _new_session(user_id: str) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'created_at': datetime.now().isoformat(),
+            'last_active': datetime.now().isoformat(),
+            'interaction_count': 0,
+            'preferences': {},
+            'wellness_metrics': {
+                'mood_trend': [],
+                'stress_level': 'moderate',
+                'last_wellness_check': None
+            },
+            'educational_progress': {
+                'quiz_scores': [],
+                'learning_topics': [],
+                'last_activity': None
+            },
+            'spiritual_journey': {
+                'topics_explored': [],
+                'favorite_teachings': [],
+                'last_vedas_query': None
+            }
+        }
         
     def get_user_session(self, user_id: str) -> Dict[str, Any]:
         """Get or create user session data"""
-        if user_id not in self.user_sessions:
-            session_file = self.storage_dir / f"user_{user_id}.json"
-            if session_file.exists():
-                with open(session_file, 'r') as f:
-                    self.user_sessions[user_id] = json.load(f)
-            else:
-                self.user_sessions[user_id] = {
-                    'user_id': user_id,
-                    'created_at': datetime.now().isoformat(),
-                    'last_active': datetime.now().isoformat(),
-                    'interaction_count': 0,
-                    'preferences': {},
-                    'wellness_metrics': {
-                        'mood_trend': [],
-                        'stress_level': 'moderate',
-                        'last_wellness_check': None
-                    },
-                    'educational_progress': {
-                        'quiz_scores': [],
-                        'learning_topics': [],
-                        'last_activity': None
-                    },
-                    'spiritual_journey': {
-                        'topics_explored': [],
-                        'favorite_teachings': [],
-                        'last_vedas_query': None
-                    }
-                }
-        return self.user_sessions[user_id]
+        return self.sessions.get(user_id).session
     
     def update_user_session(self, user_id: str, updates: Dict[str, Any]):
-        """Update user session with new data"""
-        session = self.get_user_session(user_id)
-        session.update(updates)
-        session['last_active'] = datetime.now().isoformat()
-        session['interaction_count'] += 1
-        
-        # Save to file
-        session_file = self.storage_dir / f"user_{user_id}.json"
-        with open(session_file, 'w') as f:
-            json.dump(session, f, indent=2)
-        
-        self.user_sessions[user_id] = session
+        """Update user session with new data; persisted by the next flush"""
+        def apply(state):
+            state.session.update(updates)
+            state.session['last_active'] = datetime.now().isoformat()
+            state.session['interaction_count'] += 1
+
+        self.sessions.update(user_id, apply)
     
     def add_interaction(self, user_id: str, agent_type: str, query: str, response: Dict[str, Any]):
         """Record an interaction for trigger analysis"""
-        if user_id not in self.interaction_history:
-            self.interaction_history[user_id] = []
-        
         interaction = {
             'timestamp': datetime.now().isoformat(),
             'agent_type': agent_type,
@@ -108,11 +97,16 @@ class AgentMemoryManager:
             'user_satisfaction': None  # Can be updated later
         }
         
-        self.interaction_history[user_id].append(interaction)
-        
-        # Keep only last 50 interactions per user
-        if len(self.interaction_history[user_id]) > 50:
-            self.interaction_history[user_id] = self.interaction_history[user_id][-50:]
+        # Ring buffer of the last SESSION_HISTORY_SIZE interactions per user
+        self.sessions.update(user_id, lambda state: state.interactions.append(interaction))
+    
+    def get_interactions(self, user_id: str) -> List[Dict[str, Any]]:
+        """Recent interactions for the user, oldest first"""
+        return list(self.sessions.get(user_id).interactions)
+    
+    def close(self):
+        """Flush pending session writes"""
+        self.sessions.close()
     
     def _summarize_response(self, response: Dict[str, Any]) -> str:
         """Create a brief summary of the response for memory"""
@@ -318,7 +312,7 @@ class OrchestrationTriggers:
             })
 
         # Check for financial wellness queries pattern
-        interactions = self.memory_manager.interaction_history.get(user_id, [])
+        interactions = self.memory_manager.get_interactions(user_id)
         recent_financial_queries = [
             interaction for interaction in interactions[-10:]  # Last 10 interactions
             if 'financial' in interaction.get('query', '').lower() or
@@ -840,6 +834,9 @@ class UnifiedOrchestrationEngine:
         """Initialize the orchestration engine"""
         logger.info("Initializing Unified Orchestration Engine...")
 
+        # Write-behind session persistence
+        self.memory_manager.sessions.start()
+
         # Initialize embedding model
         self.embedding_model = self.data_ingestion.initialize_embedding_model()
 
@@ -1292,6 +1289,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down Unified Orchestration System...")
+    orchestration_engine.memory_manager.close()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -1371,7 +1369,7 @@ async def get_user_session(user_id: str):
     """
     try:
         session = orchestration_engine.memory_manager.get_user_session(user_id)
-        interactions = orchestration_engine.memory_manager.interaction_history.get(user_id, [])
+        interactions = orchestration_engine.memory_manager.get_interactions(user_id)
 
         return {
             "user_session": session,
@@ -1426,6 +1424,7 @@ async def get_system_status():
     Get comprehensive system status including all components
     """
     try:
+        session_store = orchestration_engine.memory_manager.sessions.info()
         return {
             "system": "Unified Orchestration System",
             "version": "1.0.0",
@@ -1437,7 +1436,8 @@ async def get_system_status():
                 },
                 "memory_manager": {
                     "status": "active",
-                    "active_users": len(orchestration_engine.memory_manager.user_sessions)
+                    "active_users": session_store["resident_users"],
+                    "session_store": session_store
                 },
                 "gemini_api": {
                     "status": "active" if orchestration_engine.gemini_manager.is_available() else "fallback_mode",
@@ -0,0 +1,224 @@
+"""
+Agent Session Store
+Write-behind persistence for the per-user sessions and recent interactions
+kept by AgentMemoryManager. Users live in a bounded LRU; updates only mark a
+user dirty, and a flusher thread writes the dirty ones every
+SESSION_FLUSH_SECONDS as compact JSON through a temp file and os.replace, so
+a crash mid-write never leaves a torn session file. Dirty users are written
+before they are evicted and close() flushes whatever is left
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1000"))
+SESSION_FLUSH_SECONDS = float(os.getenv("SESSION_FLUSH_SECONDS", "5"))
+SESSION_HISTORY_SIZE = int(os.getenv("SESSION_HISTORY_SIZE", "50"))
+
+
+class UserState:
+    """A user's session dict and ring buffer of recent interactions"""
+
+    __slots__ = ("session", "interactions", "dirty")
+
+    def __init__(self, session: Dict[str, Any], interactions: List[Dict[str, Any]], history_size: int):
+        self.session = session
+        self.interactions: Deque[Dict[str, Any]] = deque(interactions, maxlen=history_size)
+        self.dirty = False
+
+
+class SessionStore:
+    """
+    Bounded LRU of UserState with periodic write-behind flushes to
+    storage_dir/user_<id>.json. Files hold {"session": ..., "interactions": [...]};
+    files written before interactions were persisted (a bare session) still load
+    """
+
+    def __init__(self, storage_dir: str, new_session: Callable[[str], Dict[str, Any]],
+                 max_users: int = SESSION_CACHE_SIZE, history_size: int = SESSION_HISTORY_SIZE,
+                 flush_interval: float = SESSION_FLUSH_SECONDS):
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(exist_ok=True)
+        self.new_session = new_session
+        self.max_users = max_users
+        self.history_size = history_size
+        self.flush_interval = flush_interval
+        self._users: "OrderedDict[str, UserState]" = OrderedDict()
+        # Payloads taken for writing but not yet on disk; loads read these first
+        self._writing: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "loads": 0, "created": 0, "evictions": 0, "writes": 0, "write_errors": 0}
+
+    def _path(self, user_id: str) -> Path:
+        return self.storage_dir / f"user_{user_id}.json"
+
+    # ---- access ----
+
+    def get(self, user_id: str) -> UserState:
+        """The user's state, loading or creating it on a miss"""
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is not None:
+                self._users.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return state
+            pending = self._writing.get(user_id)
+
+        state = self._load(user_id, pending)
+        with self._lock:
+            # Another request may have loaded the user meanwhile; keep the first
+            existing = self._users.get(user_id)
+            if existing is not None:
+                self._users.move_to_end(user_id)
+                return existing
+            self._users[user_id] = state
+            evicted = self._evict()
+        self._write_all(evicted)
+        return state
+
+    def update(self, user_id: str, mutate: Callable[[UserState], None]) -> UserState:
+        """
+        Apply mutate to the user's resident state and schedule it for the next
+        flush. Runs under the store lock, so the state cannot be evicted or
+        replaced by another request's reload between the change and marking it
+        dirty; if it was evicted after loading, it is loaded again
+        """
+        while True:
+            state = self.get(user_id)
+            with self._lock:
+                if self._users.get(user_id) is state:
+                    mutate(state)
+                    state.dirty = True
+                    self._users.move_to_end(user_id)
+                    return state
+
+    def _load(self, user_id: str, pending: Optional[str]) -> UserState:
+        try:
+            if pending is not None:
+                data = json.loads(pending)
+            else:
+                path = self._path(user_id)
+                if not path.exists():
+                    self.stats["created"] += 1
+                    return UserState(self.new_session(user_id), [], self.history_size)
+                with open(path, "r") as f:
+                    data = json.load(f)
+            self.stats["loads"] += 1
+            if "session" in data and "interactions" in data:
+                return UserState(data["session"], data["interactions"], self.history_size)
+            return UserState(data, [], self.history_size)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load session for user {user_id}, starting a new one: {e}")
+            return UserState(self.new_session(user_id), [], self.history_size)
+
+    def _evict(self) -> Dict[str, str]:
+        """Drop least recently used users over the limit; payloads of the dirty ones (lock held)"""
+        evicted = {}
+        while len(self._users) > self.max_users:
+            user_id, state = self._users.popitem(last=False)
+            self.stats["evictions"] += 1
+            if state.dirty:
+                try:
+                    evicted[user_id] = self._take_payload(user_id, state)
+                except (TypeError, ValueError, RuntimeError) as e:
+                    logger.error(f"Could not serialise evicted session for user {user_id}, changes lost: {e}")
+        return evicted
+
+    # ---- persistence ----
+
+    def _take_payload(self, user_id: str, state: UserState) -> str:
+        """Serialise state for writing and register it as pending (lock held)"""
+        payload = json.dumps({"session": state.session, "interactions": list(state.interactions)},
+                             separators=(",", ":"), default=str)
+        state.dirty = False
+        self._writing[user_id] = payload
+        return payload
+
+    def _write_all(self, payloads: Dict[str, str]):
+        for user_id, payload in payloads.items():
+            self._write(user_id, payload)
+
+    def _write(self, user_id: str, payload: str):
+        path = self._path(user_id)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with self._write_lock:
+            with self._lock:
+                # A newer payload was taken since; it (or the write that already
+                # removed it) supersedes this one
+                if self._writing.get(user_id) is not payload:
+                    return
+            try:
+                with open(tmp_path, "w") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+                self.stats["writes"] += 1
+            except OSError as e:
+                self.stats["write_errors"] += 1
+                logger.error(f"Could not save session for user {user_id}: {e}")
+                with self._lock:
+                    state = self._users.get(user_id)
+                    if state is not None:
+                        state.dirty = True
+            finally:
+                with self._lock:
+                    if self._writing.get(user_id) is payload:
+                        del self._writing[user_id]
+
+    def flush(self) -> int:
+        """Write every dirty user now; returns how many were written"""
+        payloads = {}
+        with self._lock:
+            for user_id, state in self._users.items():
+                if state.dirty:
+                    try:
+                        payloads[user_id] = self._take_payload(user_id, state)
+                    except (TypeError, ValueError, RuntimeError) as e:
+                        # Leave it dirty; most likely mutated mid-serialisation
+                        logger.warning(f"Could not serialise session for user {user_id}: {e}")
+        self._write_all(payloads)
+        return len(payloads)
+
+    # ---- lifecycle ----
+
+    def start(self):
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Session flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher and write everything still dirty"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        written = self.flush()
+        logger.info(f"Session store closed, flushed {written} sessions")
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "resident_users": len(self._users),
+                "dirty_users": sum(1 for state in self._users.values() if state.dirty),
+                "max_users": self.max_users,
+                "flush_interval_seconds": self.flush_interval
+            }
@@ -5,16 +5,15 @@ Implements intelligent model selection with Prophet primary, ARIMA fallback, and
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 import logging
 from datetime import datetime, timedelta
 import json
 import warnings
 
 # Import our custom models
-from enhanced_prophet_model import EnhancedProphetModel
-from enhanced_arima_model import EnhancedARIMAModel
 from model_performance_evaluator import ModelPerformanceEvaluator
+from model_tournament import CANDIDATE_MODELS, get_tournament
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
@@ -26,14 +25,18 @@ class SmartModelSelector:
     Intelligent model selection system with automatic fallback and performance tracking
     """
     
-    def __init__(self, metric_type: str = "general"):
+    def __init__(self, metric_type: str = "general",
+                 fit_model: Optional[Callable[[str, pd.DataFrame], Any]] = None):
         """
         Initialize Smart Model Selector
         
         Args:
             metric_type: Type of metric ('probability', 'load', 'general')
+            fit_model: Trains a candidate by name and returns it (e.g. in a
+                worker pool); defaults to fitting in the calling thread
         """
         self.metric_type = metric_type
+        self.fit_model = fit_model or self._fit_in_process
         self.performance_evaluator = ModelPerformanceEvaluator()
         self.model_history = {}
         self.selected_model = None
@@ -169,14 +172,18 @@ class SmartModelSelector:
             'timestamp': datetime.now().isoformat()
         }
     
+    def _fit_in_process(self, model_name: str, data: pd.DataFrame):
+        model = CANDIDATE_MODELS[model_name](self.metric_type)
+        model.fit(data)
+        return model
+    
     def _quick_selection(self, data: pd.DataFrame, assessment: Dict[str, Any]) -> Dict[str, Any]:
         """Quick selection for moderate data sizes"""
         logger.info("Performing quick model selection...")
         
         # Default to Prophet for moderate data sizes
         try:
-            prophet_model = EnhancedProphetModel(self.metric_type)
-            prophet_model.fit(data)
+            prophet_model = self.fit_model('prophet', data)
             
             self.selected_model = prophet_model
             self.selection_reason = f"Quick selection: Prophet chosen for {len(data)} data points"
@@ -194,8 +201,7 @@ class SmartModelSelector:
             logger.warning(f"Prophet quick selection failed: {e}, falling back to ARIMA")
             
             try:
-                arima_model = EnhancedARIMAModel(self.metric_type)
-                arima_model.fit(data)
+                arima_model = self.fit_model('arima', data)
                 
                 self.selected_model = arima_model
                 self.selection_reason = f"Quick selection: ARIMA fallback after Prophet failure"
@@ -220,40 +226,12 @@ class SmartModelSelector:
         # Split data for evaluation
         train_data, test_data = self.performance_evaluator.train_test_split(data)
         
-        models_to_evaluate = {}
-        evaluation_results = {}
-        
-        # Try Prophet model
-        try:
-            logger.info("Training Prophet model...")
-            prophet_model = EnhancedProphetModel(self.metric_type)
-            prophet_model.fit(train_data)
-            models_to_evaluate['prophet'] = prophet_model
-            
-            # Evaluate Prophet
-            prophet_eval = self.performance_evaluator.evaluate_model(
-                prophet_model, train_data, test_data, 'prophet'
-            )
-            evaluation_results['prophet'] = prophet_eval
-            
-        except Exception as e:
-            logger.warning(f"Prophet model training/evaluation failed: {e}")
-        
-        # Try ARIMA model
-        try:
-            logger.info("Training ARIMA model...")
-            arima_model = EnhancedARIMAModel(self.metric_type)
-            arima_model.fit(train_data)
-            models_to_evaluate['arima'] = arima_model
-            
-            # Evaluate ARIMA
-            arima_eval = self.performance_evaluator.evaluate_model(
-                arima_model, train_data, test_data, 'arima'
-            )
-            evaluation_results['arima'] = arima_eval
-            
-        except Exception as e:
-            logger.warning(f"ARIMA model training/evaluation failed: {e}")
+        # Prophet, ARIMA and the cheap baselines train concurrently; any
+        # candidate over its time budget is left out of the comparison
+        logger.info(f"Running model tournament: {', '.join(CANDIDATE_MODELS)}")
+        models_to_evaluate, evaluation_results, tournament_stats = get_tournament().run(
+            list(CANDIDATE_MODELS), self.metric_type, train_data, test_data
+        )
         
         # Compare models and select best
         if evaluation_results:
@@ -271,13 +249,16 @@ class SmartModelSelector:
                     'data_assessment': assessment,
                     'evaluation_results': evaluation_results,
                     'comparison_results': comparison_results,
+                    'tournament': tournament_stats,
                     'confidence': 'high',
                     'timestamp': datetime.now().isoformat()
                 }
             else:
                 return self._fallback_selection("Best model not available in trained models")
         else:
-            return self._fallback_selection("No models could be successfully trained and evaluated")
+            result = self._fallback_selection("No models could be successfully trained and evaluated")
+            result['tournament'] = tournament_stats
+            return result
     
     def _fallback_selection(self, error_message: str) -> Dict[str, Any]:
         """Fallback selection when all else fails"""
@@ -0,0 +1,457 @@
+"""
+Shared Redis Connection Layer for Gurukul Platform
+==================================================
+
+One place for backend services to get Redis from:
+
+- a process-wide RedisConnection per URL, holding one redis.asyncio
+  connection pool for async code and one blocking pool behind the sync facade
+  (redis-py pools cannot be shared between the two), both bounded by
+  REDIS_MAX_CONNECTIONS;
+- RedisStore / AsyncRedisStore, which store values in a compact binary form:
+  orjson or msgpack when installed (REDIS_CODEC picks one), zstd compression
+  for values of at least REDIS_COMPRESS_MIN_BYTES, and a one-byte header so
+  any reader can decode any writer's values. Plain JSON text written before
+  this layer existed still reads back;
+- pipelined get_many/set_many/delete_many helpers;
+- per-command latency metrics for everything sent through the shared clients.
+
+Usage:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from redis_connection import get_redis_connection
+
+    connection = get_redis_connection()
+    store = connection.store("financial_crew")
+    store.set("simulation:123", state, ex=86400)
+    state = store.get("simulation:123")
+
+    # async code
+    await connection.async_store("financial_crew").get("simulation:123")
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import redis
+import redis.asyncio as aioredis
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_CODEC = os.getenv("REDIS_CODEC", "orjson" if ORJSON_AVAILABLE else "json")
+REDIS_COMPRESS_MIN_BYTES = int(os.getenv("REDIS_COMPRESS_MIN_BYTES", "4096"))
+REDIS_COMPRESS_LEVEL = int(os.getenv("REDIS_COMPRESS_LEVEL", "3"))
+REDIS_METRICS_SAMPLES = int(os.getenv("REDIS_METRICS_SAMPLES", "1024"))
+
+
+def redis_url_from_env() -> str:
+    """REDIS_URL, or a URL built from REDIS_HOST/REDIS_PORT/REDIS_PASSWORD/REDIS_DB"""
+    url = os.getenv("REDIS_URL")
+    if url:
+        return url
+    password = os.getenv("REDIS_PASSWORD", "")
+    auth = f":{password}@" if password else ""
+    return (f"redis://{auth}{os.getenv('REDIS_HOST', 'localhost')}:"
+            f"{os.getenv('REDIS_PORT', '6379')}/{os.getenv('REDIS_DB', '0')}")
+
+
+# ---------------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------------
+
+class JsonCodec:
+    """JSON text; orjson when installed, else the standard library"""
+    name = "orjson" if ORJSON_AVAILABLE else "json"
+    family = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+class StdJsonCodec(JsonCodec):
+    """JSON text from the standard library only"""
+    name = "stdjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack; tuples come back as lists, as with JSON"""
+    name = "msgpack"
+    family = "msgpack"
+
+    def __init__(self):
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("msgpack is not installed")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+CODECS = {"json": JsonCodec, "orjson": JsonCodec, "stdjson": StdJsonCodec, "msgpack": MsgpackCodec}
+
+# First byte of a stored value: which codec family wrote it and whether it is
+# zstd-compressed. All are control bytes, which JSON text never starts with.
+_HEADERS = {("json", False): b"\x01", ("json", True): b"\x02",
+            ("msgpack", False): b"\x03", ("msgpack", True): b"\x04"}
+_FORMATS = {header[0]: fmt for fmt, header in _HEADERS.items()}
+
+
+class ValueSerializer:
+    """Codec plus optional zstd compression, framed by a one-byte header"""
+
+    def __init__(self, codec: str = REDIS_CODEC, compress_min_bytes: int = REDIS_COMPRESS_MIN_BYTES,
+                 compress_level: int = REDIS_COMPRESS_LEVEL):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown Redis codec {codec!r}; expected one of {sorted(CODECS)}")
+        self.codec = CODECS[codec]()
+        # Readers for every family, so values written with another codec still decode
+        self._readers = {"json": JsonCodec()}
+        if MSGPACK_AVAILABLE:
+            self._readers["msgpack"] = MsgpackCodec()
+        self.compress_min_bytes = compress_min_bytes if ZSTD_AVAILABLE else 0
+        self._compress_level = compress_level
+        self._local = threading.local()
+
+    def _zstd(self):
+        # zstd contexts are not thread-safe; keep one pair per thread
+        local = self._local
+        if not hasattr(local, "compressor"):
+            local.compressor = zstandard.ZstdCompressor(level=self._compress_level)
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local.compressor, local.decompressor
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self.codec.dumps(value)
+        compressed = bool(self.compress_min_bytes) and len(payload) >= self.compress_min_bytes
+        if compressed:
+            payload = self._zstd()[0].compress(payload)
+        return _HEADERS[(self.codec.family, compressed)] + payload
+
+    def loads(self, data: Optional[bytes]) -> Any:
+        if not data:
+            return None
+        if isinstance(data, str):
+            data = data.encode()
+        fmt = _FORMATS.get(data[0])
+        if fmt is None:
+            # Unframed: JSON text from before this layer
+            return json.loads(data)
+        family, compressed = fmt
+        payload = data[1:]
+        if compressed:
+            if not ZSTD_AVAILABLE:
+                raise ValueError("Redis value is zstd-compressed but zstandard is not installed")
+            payload = self._zstd()[1].decompress(payload)
+        reader = self._readers.get(family)
+        if reader is None:
+            raise ValueError(f"Redis value was written with {family} but it is not installed")
+        return reader.loads(payload)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+class CommandMetrics:
+    """Call counts, errors and latency percentiles per Redis command"""
+
+    def __init__(self, samples: int = REDIS_METRICS_SAMPLES):
+        self._samples = samples
+        self._commands: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, command: str, seconds: float, error: bool = False):
+        with self._lock:
+            entry = self._commands.get(command)
+            if entry is None:
+                entry = self._commands[command] = {
+                    "calls": 0, "errors": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=self._samples)
+                }
+            entry["calls"] += 1
+            entry["errors"] += error
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["recent"].append(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Per command: calls, errors, mean/p50/p95/p99/max latency in ms (percentiles over recent calls)"""
+        with self._lock:
+            commands = {name: (dict(entry), sorted(entry["recent"])) for name, entry in self._commands.items()}
+        result = {}
+        for name, (entry, recent) in commands.items():
+            def pct(q):
+                return round(recent[min(len(recent) - 1, int(len(recent) * q))] * 1000, 3)
+            result[name] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "mean_ms": round(entry["total"] / entry["calls"] * 1000, 3),
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+                "max_ms": round(entry["max"] * 1000, 3),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+
+
+def _command_name(args: Sequence[Any]) -> str:
+    name = args[0] if args else "?"
+    return (name.decode() if isinstance(name, bytes) else str(name)).upper()
+
+
+class _TimedRedis(redis.Redis):
+    """Blocking client that records every command's latency"""
+
+    metrics: CommandMetrics
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().execute_command(*args, **options)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.metrics.record(_command_name(args), time.perf_counter() - started, error)
+
+
+class _TimedAsyncRedis(aioredis.Redis):
+    """asyncio client that records every command's latency"""
+
+    metrics: CommandMetrics
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        error = False
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.metrics.record(_command_name(args), time.perf_counter() - started, error)
+
+
+# ---------------------------------------------------------------------------
+# Stores
+# ---------------------------------------------------------------------------
+
+class RedisStore:
+    """Serialised values under an optional key namespace, over the blocking client"""
+
+    def __init__(self, client: redis.Redis, serializer: ValueSerializer, metrics: CommandMetrics,
+                 namespace: str = ""):
+        self.client = client
+        self.serializer = serializer
+        self.metrics = metrics
+        self.prefix = f"{namespace}:" if namespace else ""
+
+    def key(self, key: str) -> str:
+        return self.prefix + key
+
+    def get(self, key: str) -> Any:
+        return self.serializer.loads(self.client.get(self.key(key)))
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        return bool(self.client.set(self.key(key), self.serializer.dumps(value), ex=ex))
+
+    def delete(self, *keys: str) -> int:
+        return self.client.delete(*(self.key(key) for key in keys)) if keys else 0
+
+    def execute_pipeline(self, pipe) -> List[Any]:
+        """Execute a pipeline, recording it as one PIPELINE call"""
+        started = time.perf_counter()
+        error = False
+        try:
+            return pipe.execute()
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.metrics.record("PIPELINE", time.perf_counter() - started, error)
+
+    def get_many(self, keys: Iterable[str]) -> List[Any]:
+        keys = [self.key(key) for key in keys]
+        if not keys:
+            return []
+        return [self.serializer.loads(value) for value in self.client.mget(keys)]
+
+    def set_many(self, items: Dict[str, Any], ex: Optional[int] = None) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.key(key), self.serializer.dumps(value), ex=ex)
+        self.execute_pipeline(pipe)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        return self.delete(*keys)
+
+
+class AsyncRedisStore(RedisStore):
+    """RedisStore over the asyncio client"""
+
+    async def get(self, key: str) -> Any:
+        return self.serializer.loads(await self.client.get(self.key(key)))
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        return bool(await self.client.set(self.key(key), self.serializer.dumps(value), ex=ex))
+
+    async def delete(self, *keys: str) -> int:
+        return await self.client.delete(*(self.key(key) for key in keys)) if keys else 0
+
+    async def execute_pipeline(self, pipe) -> List[Any]:
+        started = time.perf_counter()
+        error = False
+        try:
+            return await pipe.execute()
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.metrics.record("PIPELINE", time.perf_counter() - started, error)
+
+    async def get_many(self, keys: Iterable[str]) -> List[Any]:
+        keys = [self.key(key) for key in keys]
+        if not keys:
+            return []
+        return [self.serializer.loads(value) for value in await self.client.mget(keys)]
+
+    async def set_many(self, items: Dict[str, Any], ex: Optional[int] = None) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.key(key), self.serializer.dumps(value), ex=ex)
+        await self.execute_pipeline(pipe)
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        return await self.delete(*keys)
+
+
+# ---------------------------------------------------------------------------
+# Connections
+# ---------------------------------------------------------------------------
+
+class RedisConnection:
+    """Shared pools, clients and metrics for one Redis URL"""
+
+    def __init__(self, url: Optional[str] = None, max_connections: int = REDIS_MAX_CONNECTIONS,
+                 serializer: Optional[ValueSerializer] = None):
+        self.url = url or redis_url_from_env()
+        self.max_connections = max_connections
+        self.serializer = serializer or ValueSerializer()
+        self.metrics = CommandMetrics()
+        self._pool_options = {
+            "max_connections": max_connections,
+            "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+            "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        }
+        self._lock = threading.Lock()
+        self._sync_client: Optional[_TimedRedis] = None
+        self._async_client: Optional[_TimedAsyncRedis] = None
+
+    @property
+    def sync(self) -> redis.Redis:
+        """Blocking client on the shared pool (bytes responses)"""
+        with self._lock:
+            if self._sync_client is None:
+                # Blocks for a free connection instead of failing when the pool is exhausted
+                pool = redis.BlockingConnectionPool.from_url(self.url, timeout=REDIS_SOCKET_TIMEOUT,
+                                                             **self._pool_options)
+                client = _TimedRedis(connection_pool=pool)
+                client.metrics = self.metrics
+                self._sync_client = client
+            return self._sync_client
+
+    @property
+    def async_client(self) -> aioredis.Redis:
+        """asyncio client on the shared pool (bytes responses); use from one event loop"""
+        with self._lock:
+            if self._async_client is None:
+                pool = aioredis.BlockingConnectionPool.from_url(self.url, timeout=REDIS_SOCKET_TIMEOUT,
+                                                                **self._pool_options)
+                client = _TimedAsyncRedis(connection_pool=pool)
+                client.metrics = self.metrics
+                self._async_client = client
+            return self._async_client
+
+    def store(self, namespace: str = "") -> RedisStore:
+        return RedisStore(self.sync, self.serializer, self.metrics, namespace)
+
+    def async_store(self, namespace: str = "") -> AsyncRedisStore:
+        return AsyncRedisStore(self.async_client, self.serializer, self.metrics, namespace)
+
+    def ping(self) -> bool:
+        return bool(self.sync.ping())
+
+    def close(self):
+        """Disconnect the blocking pool (the async pool needs aclose())"""
+        with self._lock:
+            client, self._sync_client = self._sync_client, None
+        if client is not None:
+            client.connection_pool.disconnect()
+
+    async def aclose(self):
+        """Disconnect both pools"""
+        with self._lock:
+            client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.connection_pool.disconnect()
+        self.close()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "codec": self.serializer.codec.name,
+            "compress_min_bytes": self.serializer.compress_min_bytes,
+            "max_connections": self.max_connections,
+            "commands": self.metrics.snapshot(),
+        }
+
+
+_connections: Dict[str, RedisConnection] = {}
+_connections_lock = threading.Lock()
+
+
+def get_redis_connection(url: Optional[str] = None) -> RedisConnection:
+    """The process-wide RedisConnection for url (default: from the environment)"""
+    url = url or redis_url_from_env()
+    with _connections_lock:
+        connection = _connections.get(url)
+        if connection is None:
+            connection = _connections[url] = RedisConnection(url)
+        return connection
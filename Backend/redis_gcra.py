@@ -0,0 +1,133 @@
+"""
+Shared GCRA Rate Limiting Core for Gurukul Platform
+===================================================
+
+The one Lua script and key layout behind both Redis rate limiters (the
+Financial Crew RedisRateLimiter and the security middleware's async one).
+
+Limits are enforced with GCRA (the generic cell rate algorithm), which stores
+one timestamp per key and policy instead of a counter per fixed window. Bursts
+are capped at the limit and requests are then admitted at limit/window, so any
+t seconds admit at most limit + t * limit / window; fixed windows let twice
+the limit through within moments of a window edge. The whole check-and-update
+runs server-side in a single script invoked with EVALSHA: one round-trip per
+check, and concurrent requests cannot both see the last free slot.
+
+Usage:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from redis_gcra import GcraLimiter
+
+    limiter = GcraLimiter(redis_client, prefix="rate_limit")
+    reply = limiter.check("203.0.113.7", [("10r1s", 10, 1), ("1000r3600s", 1000, 3600)])
+    reply = await async_limiter.acheck(...)   # on a redis.asyncio client
+"""
+
+from collections import namedtuple
+from typing import Any, List, Sequence, Tuple
+
+# KEYS: one key per policy
+# ARGV: cost, apply (1 to record the request, 0 to only look), then limit and
+#       window in milliseconds for each policy, in KEYS order
+# Returns: limited, index of the reported policy (1-based), remaining,
+#          reset after (ms), retry after (ms, 0 unless limited)
+#
+# Each key holds the policy's theoretical arrival time (TAT): the point at
+# which its bucket drains completely. A request of cost c is allowed when
+# TAT + c * window / limit - window <= now. The request is recorded against
+# every policy only if all of them allow it. The clock is the Redis server's,
+# so application servers with skewed clocks still share one limit.
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + tonumber(clock[2]) / 1000
+local cost = tonumber(ARGV[1])
+local apply = ARGV[2] == '1'
+
+local tats, new_tats, intervals, windows = {}, {}, {}, {}
+local limited = false
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    local interval = window / limit
+    local tat = tonumber(redis.call('GET', KEYS[i]) or 0)
+    if tat < now then tat = now end
+    tats[i], intervals[i], windows[i] = tat, interval, window
+    new_tats[i] = tat + interval * cost
+    if new_tats[i] - window > now then limited = true end
+end
+
+local admitted = apply and not limited
+local report, report_remaining, report_reset, retry_after = 1, nil, 0, 0
+for i = 1, #KEYS do
+    local tat = tats[i]
+    if admitted then
+        tat = new_tats[i]
+        redis.call('SET', KEYS[i], string.format('%.3f', tat), 'PX', math.max(1, math.ceil(tat - now)))
+    end
+    local remaining = math.max(0, math.floor((now - (tat - windows[i])) / intervals[i]))
+    local reset = tat - now
+    if limited then
+        local wait = new_tats[i] - windows[i] - now
+        if wait > retry_after then
+            report, report_remaining, report_reset, retry_after = i, remaining, reset, wait
+        end
+    elseif report_remaining == nil or remaining < report_remaining
+            or (remaining == report_remaining and reset > report_reset) then
+        report, report_remaining, report_reset = i, remaining, reset
+    end
+end
+
+if report_remaining == nil then report_remaining = 0 end
+return {limited and 1 or 0, report, report_remaining, math.ceil(report_reset), math.ceil(retry_after)}
+"""
+
+# (name, limit, window in seconds)
+GcraPolicy = Tuple[str, int, float]
+
+GcraReply = namedtuple("GcraReply", ["limited", "index", "remaining", "reset_after", "retry_after"])
+GcraReply.__doc__ = (
+    "Decoded script reply: index (0-based) of the policy that denied the "
+    "request or came closest to denying it, and whole seconds until it is "
+    "fully replenished (reset_after) and until the request would be allowed "
+    "(retry_after, 0 unless limited)"
+)
+
+
+def _ceil_seconds(milliseconds) -> int:
+    return -(-int(milliseconds) // 1000)
+
+
+class GcraLimiter:
+    """GCRA_SCRIPT registered on one client; check() for redis.Redis, acheck() for redis.asyncio"""
+
+    def __init__(self, redis_client, prefix: str = "rate_limit"):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        # register_script uses EVALSHA and reloads the script on NOSCRIPT
+        self._script = redis_client.register_script(GCRA_SCRIPT)
+
+    def keys(self, key: str, policies: Sequence[GcraPolicy]) -> List[str]:
+        # The hash tag keeps a client's policy keys in one cluster slot, which
+        # a multi-key script requires
+        return [f"{self.prefix}:{{{key}}}:{name}" for name, _, _ in policies]
+
+    def _invoke(self, key: str, policies: Sequence[GcraPolicy], cost: int, record: bool) -> Any:
+        args: List[int] = [cost, 1 if record else 0]
+        for _, limit, window in policies:
+            args.extend([limit, int(window * 1000)])
+        return self._script(keys=self.keys(key, policies), args=args)
+
+    @staticmethod
+    def _decode(reply) -> GcraReply:
+        limited, index, remaining, reset_ms, retry_ms = reply
+        return GcraReply(bool(limited), int(index) - 1, int(remaining),
+                         _ceil_seconds(reset_ms), _ceil_seconds(retry_ms))
+
+    def check(self, key: str, policies: Sequence[GcraPolicy], cost: int = 1, record: bool = True) -> GcraReply:
+        """Check key against every policy, recording the request if all allow it"""
+        return self._decode(self._invoke(key, policies, cost, record))
+
+    async def acheck(self, key: str, policies: Sequence[GcraPolicy], cost: int = 1,
+                     record: bool = True) -> GcraReply:
+        """check() on a redis.asyncio client"""
+        return self._decode(await self._invoke(key, policies, cost, record))
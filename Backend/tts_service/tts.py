@@ -2,15 +2,30 @@
 from fastapi import FastAPI, Form, Request, HTTPException
 from fastapi.responses import FileResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import pyttsx3
-import uuid
 import os
 import sys
+import time
+import asyncio
 from pathlib import Path
 
+# Make sibling modules importable when mounted from Backend/main.py
+sys.path.insert(0, str(Path(__file__).parent))
+
 # Load environment variables from centralized configuration
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared_config import load_shared_config
+from audio_cache import AudioCache
+from tts_streaming import (
+    TimeToFirstAudioMetrics,
+    iter_synthesized_chunks,
+    prefetch_first_chunk,
+    record_time_to_first_audio,
+    split_sentences,
+    split_wav,
+    wav_stream_header
+)
+from tts_engine import TTS_RATE, TTS_VOICE, TTS_VOLUME
+from tts_worker_pool import TTSWorkerPool
 
 # Load centralized configuration
 load_shared_config("tts_service")
@@ -30,6 +45,22 @@ app.add_middleware(
 OUTPUT_DIR = "tts_outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Generated files live in a size-capped, content-addressed cache
+audio_cache = AudioCache(OUTPUT_DIR)
+
+# Synthesis runs in long-lived pyttsx3 worker processes; handlers only
+# enqueue jobs and await them, so runAndWait() never blocks the event loop
+tts_pool = TTSWorkerPool()
+stream_metrics = TimeToFirstAudioMetrics()
+
+@app.on_event("startup")
+async def start_tts_pool():
+    tts_pool.start()
+
+@app.on_event("shutdown")
+async def stop_tts_pool():
+    tts_pool.stop()
+
 @app.get("/")
 async def root():
     return {
@@ -67,52 +98,28 @@ async def list_audio_files():
 
 @app.post("/api/generate")
 async def text_to_speech(text: str = Form(...)):
-    """Generate TTS audio from text"""
+    """Generate TTS audio from text, reusing cached audio for repeated text"""
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
 
     if len(text) > 10000:  # Limit text length
         raise HTTPException(status_code=400, detail="Text too long (max 10000 characters)")
 
-    filename = f"{uuid.uuid4()}.mp3"
-    filepath = os.path.join(OUTPUT_DIR, filename)
+    cache_key = audio_cache.make_key(text, engine="pyttsx3", voice=TTS_VOICE, rate=f"{TTS_RATE}/{TTS_VOLUME}")
 
     try:
         print(f"Generating TTS for text: {text[:100]}...")
 
-        # Initialize TTS engine
-        engine = pyttsx3.init()
-
-        # Configure TTS settings for better quality
-        voices = engine.getProperty('voices')
-        if voices:
-            # Try to use a female voice if available
-            for voice in voices:
-                if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                    engine.setProperty('voice', voice.id)
-                    break
-
-        # Set speech rate (words per minute)
-        engine.setProperty('rate', 180)  # Slightly slower for clarity
-
-        # Set volume (0.0 to 1.0)
-        engine.setProperty('volume', 0.9)
-
-        # Generate audio file
-        engine.save_to_file(text, filepath)
-        engine.runAndWait()
-
-        # Verify file was created
-        if not os.path.exists(filepath):
-            raise HTTPException(status_code=500, detail="Audio generation failed - file not created")
-
-        # Check file size
+        filepath, cached = await audio_cache.get_or_create_async(
+            cache_key, lambda tmp_path: tts_pool.synthesize_file(text, tmp_path)
+        )
+        filename = os.path.basename(filepath)
         file_size = os.path.getsize(filepath)
-        if file_size == 0:
-            os.remove(filepath)  # Remove empty file
-            raise HTTPException(status_code=500, detail="Audio generation failed - empty file")
 
-        print(f"TTS generated successfully: {filename} ({file_size} bytes)")
+        if cached:
+            print(f"TTS cache hit: {filename} ({file_size} bytes)")
+        else:
+            print(f"TTS generated successfully: {filename} ({file_size} bytes)")
 
         return JSONResponse({
             "status": "success",
@@ -120,113 +127,118 @@ async def text_to_speech(text: str = Form(...)):
             "audio_url": f"/api/audio/{filename}",
             "filename": filename,
             "file_size": file_size,
-            "text_length": len(text)
+            "text_length": len(text),
+            "cached": cached
         })
 
+    except asyncio.TimeoutError:
+        print("TTS generation timed out")
+        raise HTTPException(status_code=504, detail="Audio generation timed out")
     except Exception as e:
-        # Clean up failed file
-        if os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except:
-                pass
-
         print(f"TTS generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Audio generation failed: {str(e)}")
 
 
 @app.post("/api/generate/stream")
-async def text_to_speech_stream(text: str = Form(...)):
-    """Generate TTS audio and stream directly without saving to disk"""
+async def text_to_speech_stream(text: str = Form(...), chunked: bool = Form(True)):
+    """
+    Generate TTS audio and stream it without saving to disk.
+
+    By default the text is split into sentences that are synthesised in a
+    small worker pool and streamed as one WAV as soon as each chunk is ready.
+    Send chunked=false to render the whole text before responding.
+    """
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
 
     if len(text) > 10000:  # Limit text length
         raise HTTPException(status_code=400, detail="Text too long (max 10000 characters)")
 
-    try:
-        import io
-        import tempfile
-        import wave
-
-        print(f"Generating streaming TTS for text: {text[:100]}...")
+    started_at = time.perf_counter()
+    print(f"Generating streaming TTS for text: {text[:100]}...")
 
-        # Initialize TTS engine
-        engine = pyttsx3.init()
+    if not chunked:
+        try:
+            audio_data = await tts_pool.synthesize_bytes(text)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="TTS streaming timed out")
+        except Exception as e:
+            print(f"TTS streaming error: {e}")
+            raise HTTPException(status_code=500, detail=f"TTS streaming failed: {str(e)}")
 
-        # Configure TTS settings for better quality
-        voices = engine.getProperty('voices')
-        if voices:
-            # Try to use a female voice if available
-            for voice in voices:
-                if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                    engine.setProperty('voice', voice.id)
-                    break
+        if not audio_data:
+            raise HTTPException(status_code=500, detail="Audio generation failed - no data")
 
-        # Set speech rate (words per minute)
-        engine.setProperty('rate', 180)  # Slightly slower for clarity
+        async def whole_audio():
+            yield audio_data
 
-        # Set volume (0.0 to 1.0)
-        engine.setProperty('volume', 0.9)
+        audio_stream = whole_audio()
+    else:
+        chunks = split_sentences(text)
 
-        # Create temporary file for audio generation
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_filepath = temp_file.name
+        async def chunked_audio():
+            header_sent = False
+            try:
+                async for wav_bytes in iter_synthesized_chunks(
+                    chunks, tts_pool.synthesize_bytes, window=tts_pool.workers + 1
+                ):
+                    params, frames = split_wav(wav_bytes)
+                    if not header_sent:
+                        yield wav_stream_header(*params) + frames
+                        header_sent = True
+                    else:
+                        yield frames
+            except Exception as e:
+                if not header_sent:
+                    raise
+                # The response has already started; end the stream and log it
+                print(f"TTS streaming error: {e}")
 
         try:
-            # Generate audio to temporary file
-            engine.save_to_file(text, temp_filepath)
-            engine.runAndWait()
-
-            # Read the generated audio file into memory
-            with open(temp_filepath, 'rb') as audio_file:
-                audio_data = audio_file.read()
-
-            # Clean up temporary file
-            os.unlink(temp_filepath)
-
-            if not audio_data:
-                raise HTTPException(status_code=500, detail="Audio generation failed - no data")
-
-            # Create streaming response
-            def generate_audio():
-                yield audio_data
-
-            return StreamingResponse(
-                generate_audio(),
-                media_type="audio/wav",
-                headers={
-                    "Content-Disposition": "inline; filename=tts_audio.wav",
-                    "Cache-Control": "no-cache",
-                    "X-Text-Length": str(len(text))
-                }
-            )
-
-        except Exception as cleanup_error:
-            # Ensure temp file is cleaned up even on error
-            if os.path.exists(temp_filepath):
-                os.unlink(temp_filepath)
-            raise cleanup_error
+            # Surface a failure on the first chunk as an error status
+            audio_stream = await prefetch_first_chunk(chunked_audio())
+        except Exception as e:
+            print(f"TTS streaming error: {e}")
+            raise HTTPException(status_code=500, detail=f"TTS streaming failed: {str(e)}")
+
+    return StreamingResponse(
+        record_time_to_first_audio(audio_stream, stream_metrics, started_at),
+        media_type="audio/wav",
+        headers={
+            "Content-Disposition": "inline; filename=tts_audio.wav",
+            "Cache-Control": "no-cache",
+            "X-Text-Length": str(len(text))
+        }
+    )
 
-    except Exception as e:
-        print(f"TTS streaming error: {e}")
-        raise HTTPException(status_code=500, detail=f"TTS streaming failed: {str(e)}")
+
+@app.get("/api/metrics")
+async def tts_metrics():
+    """Streaming and cache metrics for the TTS service"""
+    return {
+        "streaming": stream_metrics.summary(),
+        "worker_pool": tts_pool.metrics(),
+        "audio_cache": audio_cache.info()
+    }
 
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     try:
-        # Test TTS engine
-        engine = pyttsx3.init()
-        voices = engine.getProperty('voices')
+        # Report on the engine workers instead of initialising an engine here
+        pool_metrics = tts_pool.metrics()
+        pool_state = pool_metrics["state"]
 
         return {
-            "status": "healthy",
+            "status": {"ready": "healthy", "failed": "unhealthy"}.get(pool_state, "degraded"),
             "service": "TTS",
+            "engine_error": tts_pool.init_error,
             "tts_engine": "pyttsx3",
-            "voices_available": len(voices) if voices else 0,
+            "voices_available": tts_pool.voices_available,
+            "worker_pool": pool_metrics,
             "output_directory": OUTPUT_DIR,
+            "audio_cache": audio_cache.info(),
             "audio_files_count": len([f for f in os.listdir(OUTPUT_DIR) if f.endswith('.mp3')])
         }
     except Exception as e:
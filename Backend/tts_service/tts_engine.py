@@ -0,0 +1,57 @@
+# pyttsx3 synthesis helpers for the Gurukul TTS Service
+# Kept in their own module so they can run inside worker processes
+import os
+import tempfile
+
+import pyttsx3
+
+# Voice settings; these are part of the audio cache key
+TTS_VOICE = "female"
+TTS_RATE = 180
+TTS_VOLUME = 0.9
+
+
+def create_engine():
+    """Initialise and configure a pyttsx3 engine once for reuse"""
+    # Initialize TTS engine
+    engine = pyttsx3.init()
+
+    # Configure TTS settings for better quality
+    voices = engine.getProperty('voices')
+    if voices:
+        # Try to use a female voice if available
+        for voice in voices:
+            if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
+                engine.setProperty('voice', voice.id)
+                break
+
+    # Set speech rate (words per minute)
+    engine.setProperty('rate', TTS_RATE)  # Slightly slower for clarity
+
+    # Set volume (0.0 to 1.0)
+    engine.setProperty('volume', TTS_VOLUME)
+
+    return engine
+
+
+def synthesize_to_file(engine, text: str, filepath: str):
+    """Render text to an audio file with an already configured engine"""
+    engine.save_to_file(text, filepath)
+    engine.runAndWait()
+
+    if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
+        raise RuntimeError("Audio generation failed - empty file")
+
+
+def synthesize_wav_bytes(engine, text: str) -> bytes:
+    """Render text to WAV and return the bytes, cleaning up the temp file"""
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+        temp_filepath = temp_file.name
+
+    try:
+        synthesize_to_file(engine, text, temp_filepath)
+        with open(temp_filepath, 'rb') as audio_file:
+            return audio_file.read()
+    finally:
+        if os.path.exists(temp_filepath):
+            os.unlink(temp_filepath)
@@ -0,0 +1,325 @@
+# Persistent pyttsx3 worker processes for the Gurukul TTS Service
+#
+# Each worker initialises and configures one engine at startup and then
+# serves synthesis jobs from a shared request queue. The FastAPI handlers only
+# enqueue jobs and await their futures, so runAndWait() never blocks the
+# event loop and engines are not re-created per request.
+import os
+import sys
+import time
+import uuid
+import queue
+import asyncio
+import threading
+import multiprocessing
+from collections import deque
+from typing import Any, Dict, Optional
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+TTS_MAX_PENDING = int(os.getenv("TTS_MAX_PENDING", str(TTS_WORKERS * 4)))
+TTS_JOB_TIMEOUT = float(os.getenv("TTS_JOB_TIMEOUT", "120"))
+# Seconds before respawning a worker whose engine failed to initialise,
+# doubling on each further failure up to the maximum
+TTS_RESPAWN_BACKOFF = float(os.getenv("TTS_RESPAWN_BACKOFF", "5"))
+TTS_RESPAWN_BACKOFF_MAX = float(os.getenv("TTS_RESPAWN_BACKOFF_MAX", "300"))
+
+
+class TTSUnavailable(RuntimeError):
+    """No worker has a usable engine (e.g. no audio driver or espeak)"""
+
+
+def _worker_main(worker_id: int, request_queue, result_queue, module_dir: str):
+    """Worker process loop: one long-lived engine, many jobs"""
+    sys.path.insert(0, module_dir)
+
+    try:
+        from tts_engine import create_engine, synthesize_to_file, synthesize_wav_bytes
+        engine = create_engine()
+        voices = engine.getProperty('voices')
+    except Exception as e:
+        result_queue.put(("failed", worker_id, None, str(e)))
+        return
+    result_queue.put(("ready", worker_id, None, len(voices) if voices else 0))
+
+    while True:
+        job = request_queue.get()
+        if job is None:
+            break
+
+        job_id, kind, text, filepath, deadline = job
+        if time.time() > deadline:
+            result_queue.put(("expired", worker_id, job_id, None))
+            continue
+
+        result_queue.put(("started", worker_id, job_id, None))
+        started = time.perf_counter()
+        try:
+            if kind == "file":
+                synthesize_to_file(engine, text, filepath)
+                payload = None
+            else:
+                payload = synthesize_wav_bytes(engine, text)
+            result_queue.put(("done", worker_id, job_id, (payload, time.perf_counter() - started)))
+        except Exception as e:
+            result_queue.put(("error", worker_id, job_id, str(e)))
+
+
+class TTSWorkerPool:
+    """Pool of long-lived TTS engine processes fed by a request queue"""
+
+    def __init__(self, workers: int = TTS_WORKERS, max_pending: int = TTS_MAX_PENDING,
+                 job_timeout: float = TTS_JOB_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._processes: Dict[int, Any] = {}
+        # Per worker: "starting" until it reports "ready" or "failed"
+        self._worker_state: Dict[int, str] = {}
+        self._respawn_at: Dict[int, float] = {}
+        self._backoff: Dict[int, float] = {}
+        self.init_error: Optional[str] = None
+        self._request_queue = None
+        self._result_queue = None
+        self._listener: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._synthesis_times = deque(maxlen=500)
+        self._waiting = 0
+        self.voices_available = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "expired": 0,
+            "worker_restarts": 0
+        }
+
+    # ---- lifecycle ----
+
+    def start(self):
+        """Start worker processes; safe to call more than once"""
+        if self._listener is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+        self._request_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+        self._listener = threading.Thread(target=self._listen, name="tts-pool-results", daemon=True)
+        self._listener.start()
+
+    def _spawn(self, worker_id: int):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._request_queue, self._result_queue, os.path.dirname(os.path.abspath(__file__))),
+            name=f"tts-worker-{worker_id}",
+            daemon=True
+        )
+        with self._lock:
+            self._worker_state[worker_id] = "starting"
+        process.start()
+        self._processes[worker_id] = process
+
+    def _restart_worker(self, worker_id: int):
+        process = self._processes.get(worker_id)
+        if process is not None and process.is_alive():
+            process.terminate()
+            process.join(timeout=5)
+        self.stats["worker_restarts"] += 1
+        self._spawn(worker_id)
+
+    def _ensure_workers(self):
+        now = time.monotonic()
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            with self._lock:
+                init_failed = self._worker_state.get(worker_id) == "failed"
+            if init_failed:
+                # Respawning cannot help until the environment changes; retry on a backoff
+                if now < self._respawn_at.get(worker_id, 0.0):
+                    continue
+                print(f"TTS worker {worker_id} failed to initialise earlier; retrying")
+            else:
+                print(f"TTS worker {worker_id} exited unexpectedly; restarting")
+            self._restart_worker(worker_id)
+
+    def _has_worker(self, *states: str) -> bool:
+        with self._lock:
+            return any(state in states for state in self._worker_state.values())
+
+    def state(self) -> str:
+        """not_started, starting, ready or failed (no worker could initialise an engine)"""
+        if self._listener is None:
+            return "not_started"
+        if self._has_worker("ready"):
+            return "ready"
+        if self._has_worker("starting"):
+            return "starting"
+        return "failed"
+
+    def stop(self):
+        if self._listener is None:
+            return
+        for _ in self._processes:
+            self._request_queue.put(None)
+        for process in self._processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._result_queue.put(None)
+        self._listener.join(timeout=5)
+        self._listener = None
+
+    # ---- result handling ----
+
+    def _listen(self):
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                break
+            kind, worker_id, job_id, payload = message
+
+            if kind == "ready":
+                self.voices_available = payload
+                with self._lock:
+                    self._worker_state[worker_id] = "ready"
+                    self._backoff.pop(worker_id, None)
+                    self.init_error = None
+                continue
+            if kind == "failed":
+                print(f"TTS worker {worker_id} failed to initialise: {payload}")
+                with self._lock:
+                    self._worker_state[worker_id] = "failed"
+                    backoff = self._backoff.get(worker_id, TTS_RESPAWN_BACKOFF / 2) * 2
+                    self._backoff[worker_id] = min(backoff, TTS_RESPAWN_BACKOFF_MAX)
+                    self._respawn_at[worker_id] = time.monotonic() + self._backoff[worker_id]
+                    self.init_error = payload
+                    no_engine = not any(state in ("ready", "starting") for state in self._worker_state.values())
+                    stranded = list(self._futures.items()) if no_engine else []
+                    if no_engine:
+                        self._futures.clear()
+                if stranded:
+                    self._drain_requests()
+                    for _, future in stranded:
+                        self.stats["failed"] += 1
+                        self._resolve(future, error=TTSUnavailable(f"TTS engine unavailable: {payload}"))
+                continue
+
+            with self._lock:
+                if kind == "started":
+                    self._running[job_id] = worker_id
+                    continue
+                self._running.pop(job_id, None)
+                future = self._futures.pop(job_id, None)
+
+            if kind == "done":
+                self._synthesis_times.append(payload[1])
+                self.stats["completed"] += 1
+                self._resolve(future, result=payload[0])
+            elif kind == "expired":
+                self.stats["expired"] += 1
+                self._resolve(future, error=asyncio.TimeoutError("TTS job expired in queue"))
+            else:
+                self.stats["failed"] += 1
+                self._resolve(future, error=RuntimeError(payload))
+
+    def _drain_requests(self):
+        """Drop queued jobs nobody can serve; their callers have been failed"""
+        try:
+            while True:
+                self._request_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _resolve(self, future: Optional[asyncio.Future], result=None, error: Exception = None):
+        if future is None:
+            return  # the caller already gave up (timeout)
+
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        self._loop.call_soon_threadsafe(_set)
+
+    # ---- job submission ----
+
+    async def _submit(self, kind: str, text: str, filepath: Optional[str] = None):
+        self.start()
+        self._ensure_workers()
+        if not self._has_worker("ready", "starting"):
+            raise TTSUnavailable(f"TTS engine unavailable: {self.init_error}")
+
+        # Concurrency limit: at most max_pending jobs are queued or running
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            job_id = uuid.uuid4().hex
+            future = self._loop.create_future()
+            with self._lock:
+                # Checked under the lock the listener fails stranded jobs with
+                if not any(state in ("ready", "starting") for state in self._worker_state.values()):
+                    raise TTSUnavailable(f"TTS engine unavailable: {self.init_error}")
+                self._futures[job_id] = future
+            self.stats["submitted"] += 1
+            self._request_queue.put((job_id, kind, text, filepath, time.time() + self.job_timeout))
+
+            try:
+                return await asyncio.wait_for(future, timeout=self.job_timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                with self._lock:
+                    self._futures.pop(job_id, None)
+                    worker_id = self._running.pop(job_id, None)
+                if worker_id is not None:
+                    # The engine is stuck in runAndWait(); replace the process
+                    print(f"TTS job {job_id} timed out on worker {worker_id}; restarting it")
+                    await asyncio.to_thread(self._restart_worker, worker_id)
+                raise
+        finally:
+            self._semaphore.release()
+
+    async def synthesize_file(self, text: str, filepath: str):
+        """Render text to filepath in a worker"""
+        await self._submit("file", text, filepath)
+
+    async def synthesize_bytes(self, text: str) -> bytes:
+        """Render text to WAV bytes in a worker"""
+        return await self._submit("bytes", text)
+
+    # ---- metrics ----
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._futures)
+            running = len(self._running)
+            ready = sum(1 for state in self._worker_state.values() if state == "ready")
+        times = sorted(self._synthesis_times)
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "workers_alive": sum(1 for p in self._processes.values() if p.is_alive()),
+            "workers_ready": ready,
+            "state": self.state(),
+            "init_error": self.init_error,
+            "queue_depth": in_flight - running,
+            "waiting_for_admission": self._waiting,
+            "running": running,
+            "max_pending": self.max_pending,
+            "synthesis_time_avg": round(sum(times) / len(times), 4) if times else 0.0,
+            "synthesis_time_p95": round(times[min(len(times) - 1, int(0.95 * len(times)))], 4) if times else 0.0
+        }
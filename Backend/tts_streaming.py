@@ -0,0 +1,218 @@
+"""
+Progressive TTS Streaming Helpers for Gurukul Platform
+======================================================
+
+Long lesson text is split into sentence-sized chunks that are synthesised by
+a small worker pool. Chunks are yielded strictly in order as soon as each one
+is ready, so playback can start after the first sentence instead of after the
+whole lesson has been rendered.
+
+Usage:
+    chunks = split_sentences(text)
+    audio = iter_synthesized_chunks(chunks, synthesize_mp3_bytes, executor, window=3)
+    return StreamingResponse(record_time_to_first_audio(audio, metrics, started), ...)
+"""
+
+import re
+import time
+import struct
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+# Sentence ends: ASCII terminators plus the Devanagari danda used in Hindi text
+_SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+DEFAULT_MIN_CHARS = 60
+DEFAULT_MAX_CHARS = 400
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Break an over-long sentence at clause boundaries, then at spaces"""
+    pieces: List[str] = []
+    current = ""
+    for part in _CLAUSE_END.split(sentence):
+        while len(part) > max_chars:
+            cut = part.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(part[:cut].strip())
+            part = part[cut:].strip()
+        if current and len(current) + 1 + len(part) > max_chars:
+            pieces.append(current)
+            current = part
+        else:
+            current = f"{current} {part}".strip()
+    if current:
+        pieces.append(current)
+    return [p for p in pieces if p]
+
+
+def split_sentences(text: str, min_chars: int = DEFAULT_MIN_CHARS, max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    """
+    Split text into synthesis chunks of whole sentences.
+
+    Very short sentences are merged with their neighbours (fewer engine
+    round-trips), and very long ones are broken at clause boundaries so no
+    chunk exceeds max_chars.
+    """
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        for piece in _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}".strip()
+            if len(current) >= min_chars:
+                chunks.append(current)
+                current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def iter_synthesized_chunks(
+    chunks: List[str],
+    synthesize: Callable[[str], Union[bytes, Awaitable[bytes]]],
+    executor: Optional[Executor] = None,
+    window: int = 3,
+) -> AsyncIterator[bytes]:
+    """
+    Synthesise chunks concurrently and yield their audio in input order.
+
+    synthesize is run in `executor` when one is given; otherwise it must be
+    a coroutine function (e.g. one that enqueues work on a worker pool).
+    At most `window` chunks are in flight, so the pool works ahead of the
+    listener without rendering the whole text up front. Pending work is
+    cancelled if the consumer stops early (e.g. the client disconnects).
+    """
+    loop = asyncio.get_running_loop()
+    pending: Deque[asyncio.Future] = deque()
+    remaining = iter(chunks)
+
+    def submit_next() -> bool:
+        chunk = next(remaining, None)
+        if chunk is None:
+            return False
+        if executor is not None:
+            pending.append(loop.run_in_executor(executor, synthesize, chunk))
+        else:
+            pending.append(asyncio.ensure_future(synthesize(chunk)))
+        return True
+
+    try:
+        while len(pending) < window and submit_next():
+            pass
+        while pending:
+            audio = await pending.popleft()
+            submit_next()
+            if audio:
+                yield audio
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def prefetch_first_chunk(audio: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Wait for the first chunk before the response starts, so a synthesis
+    failure can still be reported as an error status. Returns an iterator
+    that replays the first chunk followed by the rest.
+    """
+    try:
+        first = await audio.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def replay():
+        if first is not None:
+            yield first
+            async for data in audio:
+                yield data
+
+    return replay()
+
+
+class TimeToFirstAudioMetrics:
+    """Rolling record of time-to-first-audio for streamed synthesis"""
+
+    def __init__(self, max_samples: int = 500):
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+        self.streams_started = 0
+        self.streams_completed = 0
+        self._lock = threading.Lock()
+
+    def record_first_audio(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            ordered = sorted(self.samples)
+            count = len(ordered)
+
+            def percentile(p: float) -> float:
+                if not count:
+                    return 0.0
+                return round(ordered[min(count - 1, int(p * count))], 4)
+
+            return {
+                "streams_started": self.streams_started,
+                "streams_completed": self.streams_completed,
+                "samples": count,
+                "time_to_first_audio_avg": round(sum(ordered) / count, 4) if count else 0.0,
+                "time_to_first_audio_p50": percentile(0.50),
+                "time_to_first_audio_p95": percentile(0.95)
+            }
+
+
+async def record_time_to_first_audio(
+    audio: AsyncIterator[bytes],
+    metrics: TimeToFirstAudioMetrics,
+    started_at: float,
+) -> AsyncIterator[bytes]:
+    """Pass audio through, recording the delay until the first bytes are ready"""
+    metrics.streams_started += 1
+    first = True
+    async for data in audio:
+        if first:
+            metrics.record_first_audio(time.perf_counter() - started_at)
+            first = False
+        yield data
+    metrics.streams_completed += 1
+
+
+def split_wav(wav_bytes: bytes) -> Tuple[Tuple[int, int, int], bytes]:
+    """Return ((channels, sample_width, frame_rate), pcm_frames) of a WAV file"""
+    import io
+    import wave
+
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wav:
+        params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+        frames = wav.readframes(wav.getnframes())
+    return params, frames
+
+
+def wav_stream_header(channels: int, sample_width: int, frame_rate: int) -> bytes:
+    """
+    RIFF/WAVE header for a PCM stream of unknown length.
+
+    Sizes are set to the maximum value, which players treat as "read until
+    the connection closes", so PCM frames from later chunks can simply be
+    appended.
+    """
+    unknown = 0xFFFFFFFF
+    block_align = channels * sample_width
+    return (
+        b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, frame_rate,
+                                frame_rate * block_align, block_align, sample_width * 8)
+        + b"data" + struct.pack("<I", unknown)
+    )
@@ -0,0 +1,76 @@
+"""
+Shared Worker Pool Helpers for Gurukul Platform
+===============================================
+
+Small pieces the services running CPU-bound work in process pools all need:
+
+- LatencyHistogram, a thread-safe cumulative histogram in the Prometheus
+  bucket style for per-stage and queue-wait timings;
+- terminate_pool, which shuts a ProcessPoolExecutor down without waiting and
+  kills workers still busy with abandoned work (a stuck fit in C code cannot
+  be interrupted any other way).
+
+Usage:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from worker_pools import LatencyHistogram, terminate_pool
+
+    histogram = LatencyHistogram((0.1, 0.5, 1.0, 5.0))
+    histogram.observe(elapsed)
+    histogram.snapshot()
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram in the Prometheus bucket style"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            for i, upper in enumerate(self.buckets):
+                if seconds <= upper:
+                    self.counts[i] += 1
+                    return
+            self.counts[-1] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for upper, count in zip(self.buckets, self.counts):
+                cumulative += count
+                buckets[str(upper)] = cumulative
+            buckets["+Inf"] = self.count
+            return {
+                "count": self.count,
+                "sum": round(self.total, 4),
+                "avg": round(self.total / self.count, 4) if self.count else 0.0,
+                "buckets": buckets
+            }
+
+
+def terminate_pool(executor: Optional[ProcessPoolExecutor]):
+    """Shut the pool down without waiting, cancel queued work and kill busy workers"""
+    if executor is None:
+        return
+    # shutdown() drops the executor's process table, so take it first
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()